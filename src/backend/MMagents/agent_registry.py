@@ -0,0 +1,141 @@
+# src/backend/MMagents/agent_registry.py
+import asyncio
+import httpx
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Type, Union
+from .base_agent import BaseAgent
+from .key_pool import KeyPool
+from .chat_agent import ChatAgent
+from .quiz_agent import QuizAgent
+from .evaluator_agent import EvaluatorAgent
+from .planning_agent import PlanningAgent
+
+if TYPE_CHECKING:
+    from google import genai
+
+# Agent types served by the registry, keyed by the name routes ask for
+AGENT_TYPES: Dict[str, Type[BaseAgent]] = {
+    "chat": ChatAgent,
+    "quiz": QuizAgent,
+    "evaluator": EvaluatorAgent,
+    "planning": PlanningAgent,
+}
+
+# Concurrent async LLM calls allowed per agent and per API key (one lane each), so cheap
+# evaluations and chats never queue behind slow plan or quiz generations
+CONCURRENCY_LIMITS: Dict[str, int] = {
+    "evaluator": 16,
+    "chat": 8,
+    "quiz": 4,
+    # A plan fans out into one call per topic (see PlanningAgent), so this lane is wider than its request rate
+    "planning": 12,
+}
+
+class AgentRegistry:
+    """
+    Process-wide holder of long-lived Gemini clients and agent instances
+    - One client per API key, all sharing one bounded HTTP connection pool, behind a KeyPool
+      (per-key rate budgets, least-loaded key selection, 429 cooldowns) shared by every agent
+    - Agents are built on first use and reused, so prompts and configs are built once
+    - Each agent gets its own semaphore lane sized by CONCURRENCY_LIMITS times the number of keys
+    - client_factory (called once per key) lets tests or benchmarks swap in a local fake client
+    - agent_options: extra constructor arguments per agent name (e.g. the evaluator's verdict memo)
+    """
+    def __init__(
+        self,
+        api_key: Union[str, Sequence[str], None],
+        client_factory: Optional[Callable[[Optional[str]], "genai.Client"]] = None,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: int = 10,
+        concurrency_limits: Optional[Dict[str, int]] = None,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        max_wait: float = 10.0,
+        agent_options: Optional[Dict[str, dict]] = None,
+    ):
+        keys = [api_key] if isinstance(api_key, str) or api_key is None else list(api_key)
+        self.api_keys: List[str] = [key for key in keys if key]
+        self.api_key = self.api_keys[0] if self.api_keys else None
+        self.rpm, self.tpm, self.max_wait = rpm, tpm, max_wait
+        self.agent_options = agent_options or {}
+        # Every key brings its own quota, so each lane can keep that many more calls in flight
+        scale = max(1, len(self.api_keys))
+        self.concurrency_limits = {
+            name: limit * scale for name, limit in {**CONCURRENCY_LIMITS, **(concurrency_limits or {})}.items()
+        }
+        # Size the pool so every lane can be busy at once without lanes waiting on each other
+        if max_connections is None:
+            max_connections = sum(self.concurrency_limits.values())
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self._http_client: Optional[httpx.Client] = None
+        self._async_http_client: Optional[httpx.AsyncClient] = None
+        self._client_factory = client_factory or self._default_client
+        self._key_pool: Optional[KeyPool] = None
+        self._agents: Dict[str, BaseAgent] = {}
+        self._lock = threading.Lock()
+
+    def _default_client(self, api_key: Optional[str]) -> "genai.Client":
+        # The SDK is imported here, when the first agent needs a client, rather than at app import
+        from google import genai
+        from google.genai import types
+        # Built once and shared by every key's client (keys differ only in a request header)
+        if self._http_client is None:
+            self._http_client = httpx.Client(limits=self.limits)
+            self._async_http_client = httpx.AsyncClient(limits=self.limits)
+        return genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(
+                httpx_client=self._http_client,
+                httpx_async_client=self._async_http_client,
+            ),
+        )
+
+    @property
+    def available(self) -> bool:
+        """True when an API key is configured and agents can be served"""
+        return bool(self.api_key)
+
+    @property
+    def key_pool(self) -> KeyPool:
+        with self._lock:
+            if self._key_pool is None:
+                clients = [self._client_factory(key) for key in self.api_keys or [self.api_key]]
+                self._key_pool = KeyPool(clients, rpm=self.rpm, tpm=self.tpm, max_wait=self.max_wait)
+            return self._key_pool
+
+    @property
+    def client(self) -> "genai.Client":
+        """The first key's client"""
+        return self.key_pool.clients[0]
+
+    def get(self, name: str) -> BaseAgent:
+        """Return the shared agent registered under name, building it on first use"""
+        agent = self._agents.get(name)
+        if agent is None:
+            key_pool = self.key_pool
+            with self._lock:
+                agent = self._agents.get(name)
+                if agent is None:
+                    agent = AGENT_TYPES[name](
+                        api_key=self.api_key,
+                        client=key_pool.clients[0],
+                        limiter=asyncio.Semaphore(self.concurrency_limits.get(name, 4 * len(key_pool))),
+                        key_pool=key_pool,
+                        **self.agent_options.get(name, {}),
+                    )
+                    self._agents[name] = agent
+        return agent
+
+    async def aclose(self) -> None:
+        """Release pooled connections (called from the FastAPI lifespan on shutdown)"""
+        self._agents.clear()
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
+        if self._async_http_client is not None:
+            await self._async_http_client.aclose()
+            self._async_http_client = None
+        self._key_pool = None
@@ -1,5 +1,47 @@
 # src/backend/MMagents/base_agent.py
-from typing import Any, Dict
+import asyncio
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Optional, Sequence, Tuple, Type, TypeVar
+from functools import lru_cache
+from pydantic import BaseModel
+from .call_policy import AgentTimeoutError, CallPolicy, LatencyWindow, TextResponse, is_timeout, is_transient, repair_json, repair_prompt
+from .key_pool import KeyPool, estimate_tokens, rate_limit_delay
+
+# The genai SDK is imported on first use (building a client or config), not when the app is imported
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai import types
+
+DEFAULT_MODEL = "gemini-2.5-flash-preview-09-2025"
+# Fallbacks, tried only while every key is rate limited for the agent's own model
+STABLE_MODEL = "gemini-2.5-flash"
+LITE_MODEL = "gemini-2.5-flash-lite"
+
+T = TypeVar("T")
+
+PROMPTS_DIR = Path(__file__).resolve().parent / "system_instructions"
+
+@lru_cache(maxsize=None)
+def load_prompt(file_name: str) -> str:
+    """Read (once, on first use) a system prompt from system_instructions/"""
+    return (PROMPTS_DIR / file_name).read_text(encoding="utf-8")
+
+@lru_cache(maxsize=None)
+def json_config(schema: Type[BaseModel]) -> "types.GenerateContentConfig":
+    """Build (once per schema) the structured-output config for a pydantic model"""
+    from google.genai import types
+    return types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=schema.model_json_schema(),
+    )
+
+@lru_cache(maxsize=None)
+def text_config() -> "types.GenerateContentConfig":
+    """Build (once) the plain-text config used for natural explanations"""
+    from google.genai import types
+    return types.GenerateContentConfig(response_mime_type="text/plain")
 
 class BaseAgent:
     """
@@ -8,11 +50,249 @@ class BaseAgent:
     - name: identifier for the agent
     - system_prompt: guiding prompt for the agent
     - memory: optional memory to store context or past interactions
+    - client: Gemini client, shared across agents when built by the AgentRegistry
+    - config: GenerateContentConfig reused for every call of this agent
+    - limiter: optional semaphore bounding this agent's concurrent async calls
+    - key_pool: API keys the calls are spread over (the registry passes a shared one;
+      standalone agents get a single-key pool around their client)
+    - fallback_models: models to use, in order, while every key is rate limited for model_name
+    - policy: CallPolicy (timeouts, retries, hedging, output repair) applied to every generate call
     """
-    def __init__(self, name: str, system_prompt: str = "", memory: Any = None):
+    def __init__(
+        self,
+        name: str,
+        system_prompt: str = "",
+        memory: Any = None,
+        api_key: Optional[str] = None,
+        client: Optional["genai.Client"] = None,
+        model_name: str = DEFAULT_MODEL,
+        config: Optional["types.GenerateContentConfig"] = None,
+        limiter: Optional[asyncio.Semaphore] = None,
+        key_pool: Optional[KeyPool] = None,
+        fallback_models: Sequence[str] = (),
+        policy: Optional[CallPolicy] = None,
+    ):
         self.name = name
         self.system_prompt = system_prompt
         self.memory = memory
+        self.api_key = api_key
+        # Standalone agents still get their own client; the registry passes a shared one
+        if client is None:
+            from google import genai
+            client = genai.Client(api_key=api_key)
+        self.client = client
+        self.model_name = model_name
+        self.config = config
+        self.limiter = limiter
+        self.key_pool = key_pool if key_pool is not None else KeyPool([self.client])
+        self.fallback_models = tuple(fallback_models)
+        self.policy = policy or CallPolicy()
+        self.latency = LatencyWindow()
+        self.counters = dict.fromkeys(("calls", "retries", "timeouts", "hedges", "hedge_wins", "repairs", "reasks"), 0)
+
+    @property
+    def models(self) -> Tuple[str, ...]:
+        """model_name first, then its fallbacks"""
+        return (self.model_name, *(m for m in self.fallback_models if m != self.model_name))
+
+    def call_stats(self) -> dict:
+        """Call counters plus the latency percentiles hedging works from"""
+        return {
+            **self.counters,
+            "p50": self.latency.percentile(50),
+            "p95": self.latency.percentile(95),
+            "samples": len(self.latency)
+        }
+
+    def _give_up(self, error: Exception) -> Exception:
+        if is_timeout(error):
+            self.counters["timeouts"] += 1
+            return AgentTimeoutError(
+                f"{self.name} timed out (attempt timeout {self.policy.attempt_timeout:g}s, deadline {self.policy.deadline:g}s)"
+            )
+        return error
+
+    def generate(self, contents: list, config: Optional["types.GenerateContentConfig"] = None) -> Any:
+        """
+        Send contents to the model with this agent's cached config (or an override), on a pooled key
+        Each attempt gets the policy's timeout; transient failures are retried with jittered backoff
+        until the deadline (hedging is async only)
+        """
+        from google.genai import types
+        policy = self.policy
+        config = (config or self.config or types.GenerateContentConfig()).model_copy(
+            update={"http_options": types.HttpOptions(timeout=int(policy.attempt_timeout * 1000))}
+        )
+        deadline = time.monotonic() + policy.deadline
+        self.counters["calls"] += 1
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                response = self.key_pool.call_sync(
+                    self.models,
+                    estimate_tokens(contents),
+                    lambda client, model: client.models.generate_content(
+                        model=model,
+                        contents=contents,
+                        config=config,
+                    ),
+                )
+                self.latency.add(time.monotonic() - started)
+                return response
+            except Exception as e:
+                delay = policy.backoff(attempt)
+                if not is_transient(e) or attempt >= policy.max_retries or time.monotonic() + delay >= deadline:
+                    raise self._give_up(e)
+            attempt += 1
+            self.counters["retries"] += 1
+            time.sleep(delay)
+
+    async def agenerate(self, contents: list, config: Optional["types.GenerateContentConfig"] = None) -> Any:
+        """
+        Async `generate` on the aio client, waiting for a free slot in this agent's lane
+        Attempts are cancelled at the policy's timeout and transient failures retried with jittered
+        backoff until the deadline; with hedging on, a slow attempt races a second one
+        """
+        policy = self.policy
+        config = config or self.config
+        deadline = time.monotonic() + policy.deadline
+        self.counters["calls"] += 1
+        attempt = 0
+        async with self.limiter or nullcontext():
+            while True:
+                timeout = min(policy.attempt_timeout, deadline - time.monotonic())
+                try:
+                    return await asyncio.wait_for(self._ahedged(contents, config), timeout)
+                except Exception as e:
+                    delay = policy.backoff(attempt)
+                    if not is_transient(e) or attempt >= policy.max_retries or time.monotonic() + delay >= deadline:
+                        raise self._give_up(e)
+                attempt += 1
+                self.counters["retries"] += 1
+                await asyncio.sleep(delay)
+
+    async def _aattempt(self, contents: list, config: Optional["types.GenerateContentConfig"]) -> Any:
+        started = time.monotonic()
+        response = await self.key_pool.call(
+            self.models,
+            estimate_tokens(contents),
+            lambda client, model: client.aio.models.generate_content(
+                model=model,
+                contents=contents,
+                config=config,
+            ),
+        )
+        self.latency.add(time.monotonic() - started)
+        return response
+
+    async def _ahedged(self, contents: list, config: Optional["types.GenerateContentConfig"]) -> Any:
+        """
+        One attempt, or with hedging on and enough latency history, a race: once the first request
+        outlives the p95 a second is fired (the key pool puts it on the least-loaded key), the first
+        good answer wins and the other request is cancelled
+        """
+        policy = self.policy
+        if not policy.hedge or len(self.latency) < policy.hedge_min_samples:
+            return await self._aattempt(contents, config)
+        hedge_after = max(policy.hedge_min_delay, self.latency.percentile(policy.hedge_percentile))
+        first = asyncio.ensure_future(self._aattempt(contents, config))
+        tasks = [first]
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                self.counters["hedges"] += 1
+                tasks.append(asyncio.ensure_future(self._aattempt(contents, config)))
+                pending = set(tasks)
+            error = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.counters["hedge_wins"] += 1
+                        return task.result()
+                    error = error or task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            losers = [task for task in tasks if not task.done()]
+            for task in losers:
+                task.cancel()
+            await asyncio.gather(*losers, return_exceptions=True)
+
+    def _validated(self, response: Any, parse: Callable[[Any], T]) -> Tuple[Optional[T], Optional[Exception]]:
+        """parse(response), falling back to a locally repaired copy of its JSON; (result, None) or (None, error)"""
+        try:
+            return parse(response), None
+        except ValueError as e:
+            error = e
+        repaired = repair_json(getattr(response, "text", None))
+        if repaired is not None and repaired != response.text:
+            try:
+                result = parse(TextResponse(repaired))
+                self.counters["repairs"] += 1
+                return result, None
+            except ValueError:
+                pass
+        return None, error
+
+    def generate_validated(self, contents: list, parse: Callable[[Any], T], config: Optional["types.GenerateContentConfig"] = None) -> T:
+        """`generate` + parse; output that fails validation is repaired locally or re-asked (policy.repair_attempts times)"""
+        response = self.generate(contents, config)
+        for attempt in range(self.policy.repair_attempts + 1):
+            result, error = self._validated(response, parse)
+            if error is None:
+                return result
+            if attempt == self.policy.repair_attempts:
+                raise error
+            self.counters["reasks"] += 1
+            response = self.generate([*contents, repair_prompt(error)], config)
+
+    async def agenerate_validated(self, contents: list, parse: Callable[[Any], T], config: Optional["types.GenerateContentConfig"] = None) -> T:
+        """Async counterpart of `generate_validated`"""
+        response = await self.agenerate(contents, config)
+        for attempt in range(self.policy.repair_attempts + 1):
+            result, error = self._validated(response, parse)
+            if error is None:
+                return result
+            if attempt == self.policy.repair_attempts:
+                raise error
+            self.counters["reasks"] += 1
+            response = await self.agenerate([*contents, repair_prompt(error)], config)
+
+    async def agenerate_stream(self, contents: list) -> AsyncIterator[Any]:
+        """
+        Stream response chunks from the aio client, holding a lane slot until the stream ends
+        Closing this generator (e.g. on client disconnect) closes the upstream stream too
+        """
+        async with self.limiter or nullcontext():
+            # The key is held for the whole stream; only opening it moves to another key on a 429
+            tokens = estimate_tokens(contents)
+            deadline = self.key_pool.clock() + self.key_pool.max_wait
+            while True:
+                lease = await self.key_pool.acquire(self.models, tokens, deadline)
+                try:
+                    stream = await lease.client.aio.models.generate_content_stream(
+                        model=lease.model,
+                        contents=contents,
+                        config=self.config,
+                    )
+                    break
+                except Exception as e:
+                    cooldown = rate_limit_delay(e)
+                    self.key_pool.release(lease, cooldown)
+                    if cooldown is None:
+                        raise
+                except BaseException:
+                    self.key_pool.release(lease)
+                    raise
+            try:
+                async for chunk in stream:
+                    yield chunk
+            finally:
+                self.key_pool.release(lease)
+                await stream.aclose()
 
     def run(self, input: str, context: Dict = {}) -> str:
         """
@@ -20,3 +300,10 @@ class BaseAgent:
         - Must be implemented by subclasses
         """
         raise NotImplementedError("Subclasses must implement the `run` method")
+
+    async def arun(self, input: str, context: Dict = {}) -> str:
+        """
+        - Async counterpart of `run` used by the FastAPI routes
+        - Must be implemented by subclasses
+        """
+        raise NotImplementedError("Subclasses must implement the `arun` method")
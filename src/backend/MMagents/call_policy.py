@@ -0,0 +1,122 @@
+# src/backend/MMagents/call_policy.py
+import asyncio
+import random
+import re
+import threading
+from collections import deque
+from typing import Optional
+import httpx
+
+# Upstream status codes worth another attempt (the key pool already handles 429 by switching keys)
+TRANSIENT_STATUS_CODES = frozenset({408, 500, 502, 503, 504})
+
+class AgentTimeoutError(TimeoutError):
+    """An agent call used up its whole deadline (every attempt timed out or kept failing transiently)"""
+
+class CallPolicy:
+    """
+    How an agent invokes the model
+    - attempt_timeout: seconds one attempt may take before it is abandoned
+    - deadline: seconds for the whole call, retries and backoff included
+    - max_retries: further attempts after a transient failure (timeout, connection error, 5xx)
+    - base_delay / max_delay: full-jitter exponential backoff between attempts
+    - hedge: fire a second attempt once the first has run longer than the agent's p95 latency,
+      keep whichever answers first and cancel the other (needs hedge_min_samples observed calls)
+    - repair_attempts: re-asks after a response fails schema validation even after local JSON repair
+    """
+    __slots__ = (
+        "attempt_timeout", "deadline", "max_retries", "base_delay", "max_delay",
+        "hedge", "hedge_percentile", "hedge_min_samples", "hedge_min_delay", "repair_attempts"
+    )
+
+    def __init__(
+        self,
+        attempt_timeout: float = 60.0,
+        deadline: float = 120.0,
+        max_retries: int = 2,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        hedge: bool = False,
+        hedge_percentile: float = 95.0,
+        hedge_min_samples: int = 20,
+        hedge_min_delay: float = 1.0,
+        repair_attempts: int = 1,
+    ):
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.repair_attempts = repair_attempts
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number attempt + 1, so synchronized failures spread out"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+class LatencyWindow:
+    """Durations of an agent's most recent successful attempts, for the hedging threshold"""
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+def is_transient(error: BaseException) -> bool:
+    """Timeouts, dropped connections and 5xx-style API errors; not rate limits, 4xx or bad output"""
+    if isinstance(error, (asyncio.TimeoutError, httpx.TransportError)):
+        return True
+    return getattr(error, "code", None) in TRANSIENT_STATUS_CODES
+
+def is_timeout(error: BaseException) -> bool:
+    return isinstance(error, (asyncio.TimeoutError, httpx.TimeoutException))
+
+class TextResponse:
+    """Stand-in response carrying repaired text to an agent's _parse"""
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+_FENCE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+def repair_json(text: Optional[str]) -> Optional[str]:
+    """
+    Best-effort fix of common structured-output slips: markdown fences, prose around the JSON,
+    trailing commas. Returns None when there is no JSON object or array to recover
+    """
+    if not text:
+        return None
+    text = _FENCE.sub("", text.strip())
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return None
+    start = min(starts)
+    end = text.rfind("}" if text[start] == "{" else "]")
+    if end < start:
+        return None
+    return _TRAILING_COMMA.sub(r"\1", text[start:end + 1])
+
+def repair_prompt(error: Exception) -> str:
+    """Follow-up instruction after a response failed validation (the raw output is left out to save tokens)"""
+    reason = str(error).split("\nRaw output:")[0][:500]
+    return (
+        f"Your previous reply could not be used ({reason}). "
+        "Reply again with only the JSON object described above, complete and matching the schema exactly."
+    )
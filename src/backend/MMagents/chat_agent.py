@@ -1,40 +1,186 @@
 # src/backend/MMagents/chat_agent.py
-from .base_agent import BaseAgent
-from google import genai
-from google.genai import types
-from pathlib import Path
+import asyncio
+from .base_agent import BaseAgent, LITE_MODEL, text_config, load_prompt
+from .call_policy import CallPolicy
+from .chat_memory import ChatMemory, Message
+from .key_pool import KeyPool
+from .response_cache import ResponseCache
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Hashable, List, Optional, Set
 
-CURRENT_DIR = Path(__file__).resolve().parent
-SYSTEM_PROMPT = (CURRENT_DIR / "system_instructions" / "CA.md").read_text(encoding="utf-8")
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai import types
+
+# system_instructions/ file, read when the first agent is built
+PROMPT_FILE = "CA.md"
+# Interactive answers: hedge the slow tail
+CALL_POLICY = CallPolicy(attempt_timeout=30, deadline=60, hedge=True)
 
 class ChatAgent(BaseAgent):
-    def __init__(self, api_key: str, name: str = "ChatAgent"):
-        super().__init__(name=name, system_prompt=SYSTEM_PROMPT)
-        self.api_key = api_key
-        self.client = genai.Client(api_key=self.api_key)
-        self.model_name = "gemini-2.5-flash-preview-09-2025"
+    def __init__(self, api_key: Optional[str] = None, name: str = "ChatAgent", client: Optional["genai.Client"] = None, limiter: Optional[asyncio.Semaphore] = None, key_pool: Optional[KeyPool] = None, cache: Optional[ResponseCache] = None, memory: Optional[ChatMemory] = None):
+        super().__init__(
+            name=name,
+            system_prompt=load_prompt(PROMPT_FILE),
+            # Per-session conversation history, kept within a token budget
+            memory=memory if memory is not None else ChatMemory(),
+            api_key=api_key,
+            client=client,
+            limiter=limiter,
+            key_pool=key_pool,
+            fallback_models=(LITE_MODEL,),
+            policy=CALL_POLICY,
+            config=text_config(),
+        )
+        # Answers are reused per (skill, topic) for repeated and near-identical questions
+        self.cache = cache if cache is not None else ResponseCache()
+        # Background summary compactions still running (kept referenced until they finish)
+        self._compactions: Set[asyncio.Task] = set()
 
-    def run(self, user_query: str) -> str:
+    def run(self, user_query: str, skill_id: Optional[str] = None, topic_id: Optional[str] = None, session_id: Optional[str] = None, context: Optional[Dict] = None) -> str:
         """
         Run the chat agent to provide helpful, clear explanations with examples.
+        A cached answer to the same (or a near-identical) question in this skill and topic is returned without a call
+        (only at the start of a conversation, as later answers depend on the history).
         Args:
             user_query: The user's question or request for help
+            skill_id, topic_id: Where the question was asked (scopes the response cache)
+            session_id: Chat session; with it, earlier turns in this skill and session are sent along
+            context: The learner's current position (get_current_learning_context), given to the model once per request
         Returns:
             str: A friendly, clear explanation with examples as needed
         """
-        prompt = f"""
-            {self.system_prompt}
-            User Query: {user_query}
+        key = self._session_key(skill_id, session_id)
+        summary, history = self.memory.history(key) if key else ("", [])
+        scope = (skill_id, topic_id)
+        cached = None if history else self.cache.get(user_query, scope)
+        if cached is not None:
+            explanation = cached
+        else:
+            explanation = self._parse(self.generate(self._build_contents(user_query, history, summary, context)))
+            if not history:
+                self.cache.put(user_query, explanation, scope)
+        if key:
+            fold = self.memory.record(key, user_query, explanation)
+            if fold:
+                self._compact(key, *fold)
+        return explanation
+
+    async def arun(self, user_query: str, skill_id: Optional[str] = None, topic_id: Optional[str] = None, session_id: Optional[str] = None, context: Optional[Dict] = None) -> str:
+        """Async counterpart of `run`, awaited by the FastAPI routes (the summary is compacted in the background)"""
+        key = self._session_key(skill_id, session_id)
+        summary, history = self.memory.history(key) if key else ("", [])
+        scope = (skill_id, topic_id)
+        cached = None if history else self.cache.get(user_query, scope)
+        if cached is not None:
+            explanation = cached
+        else:
+            explanation = self._parse(await self.agenerate(self._build_contents(user_query, history, summary, context)))
+            if not history:
+                self.cache.put(user_query, explanation, scope)
+        self._remember(key, user_query, explanation)
+        return explanation
+
+    async def astream(self, user_query: str, skill_id: Optional[str] = None, topic_id: Optional[str] = None, session_id: Optional[str] = None, context: Optional[Dict] = None) -> AsyncIterator[str]:
+        """
+        Stream the explanation as text chunks as soon as the model produces them.
+        A cached answer arrives as a single chunk; a streamed one is cached (and remembered) once it completes.
+        Closing the generator stops the upstream generation.
+        """
+        key = self._session_key(skill_id, session_id)
+        summary, history = self.memory.history(key) if key else ("", [])
+        scope = (skill_id, topic_id)
+        cached = None if history else self.cache.get(user_query, scope)
+        if cached is not None:
+            yield cached
+            self._remember(key, user_query, cached)
+            return
+        parts = []
+        chunks = self.agenerate_stream(self._build_contents(user_query, history, summary, context))
+        try:
+            async for chunk in chunks:
+                if chunk.text:
+                    parts.append(chunk.text)
+                    yield chunk.text
+        finally:
+            await chunks.aclose()
+        explanation = "".join(parts).strip()
+        if not history:
+            self.cache.put(user_query, explanation, scope)
+        self._remember(key, user_query, explanation)
+
+    @staticmethod
+    def _session_key(skill_id: Optional[str], session_id: Optional[str]) -> Optional[Hashable]:
+        # No session: a one-off question, nothing remembered
+        return (skill_id, session_id) if session_id else None
+
+    def _remember(self, key: Optional[Hashable], user_query: str, explanation: str) -> None:
+        """Record the exchange; when the session outgrows its budget, fold the oldest turns into the summary in the background"""
+        if not key:
+            return
+        fold = self.memory.record(key, user_query, explanation)
+        if fold:
+            task = asyncio.ensure_future(self._acompact(key, *fold))
+            self._compactions.add(task)
+            task.add_done_callback(self._compactions.discard)
+
+    def _compact(self, key: Hashable, summary: str, turns: List[Message]) -> None:
+        try:
+            folded = self._parse(self.generate([self._build_summary_prompt(summary, turns)]))
+        except Exception as e:
+            print(f"DEBUG: Chat summary compaction failed, keeping an extractive one: {e}")
+            folded = None
+        self.memory.complete_fold(key, folded)
+
+    async def _acompact(self, key: Hashable, summary: str, turns: List[Message]) -> None:
+        try:
+            folded = self._parse(await self.agenerate([self._build_summary_prompt(summary, turns)]))
+        except Exception as e:
+            print(f"DEBUG: Chat summary compaction failed, keeping an extractive one: {e}")
+            folded = None
+        self.memory.complete_fold(key, folded)
+
+    def _build_contents(self, user_query: str, history: List[Message], summary: str, context: Optional[Dict]) -> List["types.Content"]:
+        """
+        Multi-turn contents: the system prompt, learner context and conversation summary lead the first
+        user turn (sent once, not per turn), then the remembered turns, then the new question
+        """
+        preamble = [self.system_prompt]
+        prefix = self._context_prefix(context)
+        if prefix:
+            preamble.append(prefix)
+        if summary:
+            preamble.append(f"Summary of the conversation so far: {summary}")
+        from google.genai import types
+        messages = [*history, ("user", f"User Query: {user_query}")]
+        role, text = messages[0]
+        messages[0] = (role, "\n".join([*preamble, text]))
+        return [types.Content(role=role, parts=[types.Part(text=text)]) for role, text in messages]
+
+    @staticmethod
+    def _context_prefix(context: Optional[Dict]) -> str:
+        """One compact line on where the learner is (long descriptions are cut short)"""
+        if not context:
+            return ""
+        fields = [
+            ("Skill", context.get("skill_name")),
+            ("Current topic", context.get("current_topic")),
+            ("Current subtopic", context.get("current_subtopic_name")),
+            ("About", " ".join(str(context.get("current_subtopic_description") or "").split())[:300]),
+        ]
+        return "Learner context: " + "; ".join(f"{label}: {value}" for label, value in fields if value)
+
+    def _build_summary_prompt(self, summary: str, turns: List[Message]) -> str:
+        transcript = "\n".join(f"{'Learner' if role == 'user' else 'Tutor'}: {text}" for role, text in turns)
+        return f"""
+            Summarize this tutoring conversation in at most {self.memory.summary_tokens * 3 // 4} words so it can
+            stand in for the earlier turns: what the learner asked, what was explained, and what they struggled with.
+            Plain text only.
+            Earlier summary: {summary or "None"}
+            Conversation:
+            {transcript}
             """
-        config = types.GenerateContentConfig(
-            # Plain text is fine since we want natural explanations
-            response_mime_type="text/plain",
-        )
-        response = self.client.models.generate_content(
-            model=self.model_name,
-            contents=[prompt],
-            config=config,
-        )
+
+    def _parse(self, response) -> str:
         try:
             explanation = response.text.strip()
             return explanation
@@ -0,0 +1,142 @@
+# src/backend/MMagents/chat_memory.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+from .key_pool import estimate_tokens
+
+# (role, text) with role "user" or "model", as sent in multi-turn contents
+Message = Tuple[str, str]
+
+class Turn:
+    __slots__ = ("role", "text", "tokens")
+
+    def __init__(self, role: str, text: str):
+        self.role = role
+        self.text = text
+        self.tokens = estimate_tokens([text])
+
+class Conversation:
+    """One chat session: a rolling summary of older exchanges plus the recent ones verbatim"""
+    __slots__ = ("summary", "turns", "folding", "used_at")
+
+    def __init__(self, now: float):
+        self.summary = ""
+        self.turns: List[Turn] = []
+        # Oldest turns being folded into the summary; still sent until the new summary is in
+        self.folding: List[Turn] = []
+        self.used_at = now
+
+def fallback_summary(summary: str, turns: List[Turn]) -> str:
+    """Extractive stand-in when the summarizing call fails: the earlier summary plus the learner's questions"""
+    questions = "; ".join(" ".join(t.text.split())[:120] for t in turns if t.role == "user")
+    return f"{summary} Earlier questions: {questions}".strip()
+
+def truncate_tokens(text: str, tokens: int) -> str:
+    """Keep the end of text (the most recent part of a summary) within about tokens tokens"""
+    limit = tokens * 4
+    return text if len(text) <= limit else "…" + text[-limit:]
+
+class ChatMemory:
+    """
+    Bounded per-session chat history for the Chat Agent (its BaseAgent.memory)
+    - Sessions are keyed by (skill_id, session_id); at most max_sessions are kept (least recently used
+      evicted) and sessions idle for ttl seconds are dropped
+    - history() returns the rolling summary and the turns to resend; together they stay within
+      budget_tokens + summary_tokens however long the conversation gets
+    - Once the recent turns exceed budget_tokens, record() hands back the oldest exchanges (keeping about
+      keep_tokens of recent turns verbatim) for the agent to fold into the summary in the background;
+      complete_fold() installs the new summary. Until then the folded turns are still sent, capped at
+      twice the budget, oldest exchanges dropped first
+    """
+    def __init__(
+        self,
+        budget_tokens: int = 1500,
+        keep_tokens: int = 600,
+        summary_tokens: int = 250,
+        max_sessions: int = 512,
+        ttl: float = 2 * 3600,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.budget_tokens = budget_tokens
+        self.keep_tokens = keep_tokens
+        self.summary_tokens = summary_tokens
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.clock = clock
+        self._sessions: "OrderedDict[Hashable, Conversation]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(("turns", "folds", "fallback_folds", "evictions", "expirations"), 0)
+
+    def history(self, key: Hashable) -> Tuple[str, List[Message]]:
+        """(summary, recent turns) for a session; empty for a new or expired one"""
+        with self._lock:
+            conversation = self._get(key)
+            if conversation is None:
+                return "", []
+            turns = conversation.folding + conversation.turns
+            total = sum(t.tokens for t in turns)
+            # Whole exchanges go, so the turns still start with the learner and alternate
+            while total > 2 * self.budget_tokens and len(turns) > 2:
+                total -= turns[0].tokens + turns[1].tokens
+                turns = turns[2:]
+            return conversation.summary, [(t.role, t.text) for t in turns]
+
+    def record(self, key: Hashable, user_text: str, model_text: str) -> Optional[Tuple[str, List[Message]]]:
+        """
+        Append one exchange; returns (summary, turns to fold) when the session went over budget
+        (and no fold is running for it yet), else None
+        """
+        with self._lock:
+            conversation = self._get(key)
+            if conversation is None:
+                conversation = self._sessions[key] = Conversation(self.clock())
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self._counts["evictions"] += 1
+            conversation.turns += [Turn("user", user_text), Turn("model", model_text)]
+            self._counts["turns"] += 1
+            if conversation.folding or sum(t.tokens for t in conversation.turns) <= self.budget_tokens:
+                return None
+            # Fold the oldest exchanges until about keep_tokens remain; the latest exchange always stays
+            kept, split = 0, len(conversation.turns)
+            while split > 2 and kept + conversation.turns[split - 1].tokens + conversation.turns[split - 2].tokens <= self.keep_tokens:
+                kept += conversation.turns[split - 1].tokens + conversation.turns[split - 2].tokens
+                split -= 2
+            split = min(split, len(conversation.turns) - 2)
+            conversation.folding, conversation.turns = conversation.turns[:split], conversation.turns[split:]
+            self._counts["folds"] += 1
+            return conversation.summary, [(t.role, t.text) for t in conversation.folding]
+
+    def complete_fold(self, key: Hashable, summary: Optional[str]) -> None:
+        """Install the summary of the folded turns (None: the summarizing call failed, keep an extractive one)"""
+        with self._lock:
+            conversation = self._sessions.get(key)
+            if conversation is None or not conversation.folding:
+                return
+            if summary is None:
+                summary = fallback_summary(conversation.summary, conversation.folding)
+                self._counts["fallback_folds"] += 1
+            conversation.summary = truncate_tokens(summary.strip(), self.summary_tokens)
+            conversation.folding = []
+
+    def clear(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._sessions.pop(key, None) is not None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counts, "sessions": len(self._sessions)}
+
+    def _get(self, key: Hashable) -> Optional[Conversation]:
+        conversation = self._sessions.get(key)
+        if conversation is None:
+            return None
+        now = self.clock()
+        if now - conversation.used_at > self.ttl:
+            del self._sessions[key]
+            self._counts["expirations"] += 1
+            return None
+        conversation.used_at = now
+        self._sessions.move_to_end(key)
+        return conversation
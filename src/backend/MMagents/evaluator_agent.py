@@ -1,43 +1,175 @@
-# src/backend/MMagents/planning_agent.py
-from .base_agent import BaseAgent
-from .schemas.EA_schemas import EvaluationInput, EvaluationOutput
-from google import genai
-from google.genai import types
-from pathlib import Path
+# src/backend/MMagents/evaluator_agent.py
+import asyncio
+from .base_agent import BaseAgent, LITE_MODEL, json_config, load_prompt
+from .call_policy import CallPolicy
+from .key_pool import KeyPool
+from .local_grader import grade_locally, grader_stats
+from .verdict_memo import VerdictMemo
+from .schemas.EA_schemas import EvaluationInput, EvaluationOutput, EvaluationBatchInput, EvaluationBatchOutput
+from typing import TYPE_CHECKING, List, Optional
 
-CURRENT_DIR = Path(__file__).resolve().parent
-SYSTEM_PROMPT = (CURRENT_DIR / "system_instructions" / "EA.md").read_text(encoding="utf-8")
+if TYPE_CHECKING:
+    from google import genai
+
+# system_instructions/ file, read when the first agent is built
+PROMPT_FILE = "EA.md"
+# Short answers: cut stuck calls early and hedge the slow tail
+CALL_POLICY = CallPolicy(attempt_timeout=20, deadline=45, hedge=True)
 
 class EvaluatorAgent(BaseAgent):
-    def __init__(self, api_key: str, name: str = "EvaluatorAgent"):
-        super().__init__(name=name, system_prompt=SYSTEM_PROMPT)
-        self.api_key = api_key
-        self.client = genai.Client(api_key=self.api_key)
-        self.model_name = "gemini-2.5-flash-preview-09-2025"
+    def __init__(self, api_key: Optional[str] = None, name: str = "EvaluatorAgent", client: Optional["genai.Client"] = None, limiter: Optional[asyncio.Semaphore] = None, key_pool: Optional[KeyPool] = None, memo: Optional[VerdictMemo] = None):
+        super().__init__(
+            name=name,
+            system_prompt=load_prompt(PROMPT_FILE),
+            api_key=api_key,
+            client=client,
+            limiter=limiter,
+            key_pool=key_pool,
+            fallback_models=(LITE_MODEL,),
+            policy=CALL_POLICY,
+            config=json_config(EvaluationOutput),
+        )
+        # Persistent verdicts for answers graded before (retaken quizzes); None = always ask the LLM
+        self.memo = memo
 
     def run(self, eval_input: EvaluationInput) -> EvaluationOutput:
         """
         Evaluate user’s answer and optionally generate feedback for the Quiz Agent.
+        Answers the local grader is certain about, or already graded (memo), never reach the LLM.
         Args:
             eval_input: EvaluationInput object containing question, true answer, and user answer
         Returns:
             EvaluationOutput: Object containing evaluation, feedback, and quiz_agent_feedback
         """
-        prompt = f"""
+        verdict = self._recall([eval_input], self._grade_locally([eval_input]))[0]
+        if verdict is not None:
+            return verdict
+        eval_output = self.generate_validated([self._build_prompt(eval_input)], self._parse)
+        self._remember([eval_input], [eval_output])
+        return eval_output
+
+    async def arun(self, eval_input: EvaluationInput) -> EvaluationOutput:
+        """Async counterpart of `run`, awaited by the FastAPI routes"""
+        verdict = (await self._arecall([eval_input], self._grade_locally([eval_input])))[0]
+        if verdict is not None:
+            return verdict
+        eval_output = await self.agenerate_validated([self._build_prompt(eval_input)], self._parse)
+        await self._aremember([eval_input], [eval_output])
+        return eval_output
+
+    def run_batch(self, batch_input: EvaluationBatchInput) -> EvaluationBatchOutput:
+        """
+        Evaluate a whole quiz in a single LLM call (one system prompt for all answers).
+        Answers the local grader is certain about, or already graded (memo), are left out of the call.
+        Falls back to per-item evaluation only if the model returns the wrong number of results.
+        Args:
+            batch_input: EvaluationBatchInput with the (true answer, user answer) pairs
+        Returns:
+            EvaluationBatchOutput: One EvaluationOutput per pair plus an aggregated quiz_agent_feedback
+        """
+        verdicts = self._recall(batch_input.items, self._grade_locally(batch_input.items, batch_input.give_feedback), batch_input.give_feedback)
+        pending = self._pending_batch(batch_input, verdicts)
+        if not pending.items:
+            return EvaluationBatchOutput(evaluations=verdicts, quiz_agent_feedback=None)
+        batch_output = self.generate_validated([self._build_batch_prompt(pending)], self._parse_batch, config=json_config(EvaluationBatchOutput))
+        if len(batch_output.evaluations) != len(pending.items):
+            batch_output.evaluations = [
+                self.generate_validated([self._build_prompt(item)], self._parse) for item in self._unbatched_items(pending)
+            ]
+        self._remember(pending.items, batch_output.evaluations)
+        batch_output.evaluations = self._merge(verdicts, batch_output.evaluations)
+        return batch_output
+
+    async def arun_batch(self, batch_input: EvaluationBatchInput) -> EvaluationBatchOutput:
+        """Async counterpart of `run_batch`; the per-item fallback runs concurrently"""
+        verdicts = await self._arecall(batch_input.items, self._grade_locally(batch_input.items, batch_input.give_feedback), batch_input.give_feedback)
+        pending = self._pending_batch(batch_input, verdicts)
+        if not pending.items:
+            return EvaluationBatchOutput(evaluations=verdicts, quiz_agent_feedback=None)
+        batch_output = await self.agenerate_validated(
+            [self._build_batch_prompt(pending)], self._parse_batch, config=json_config(EvaluationBatchOutput)
+        )
+        if len(batch_output.evaluations) != len(pending.items):
+            batch_output.evaluations = list(await asyncio.gather(
+                *(self.agenerate_validated([self._build_prompt(item)], self._parse) for item in self._unbatched_items(pending))
+            ))
+        await self._aremember(pending.items, batch_output.evaluations)
+        batch_output.evaluations = self._merge(verdicts, batch_output.evaluations)
+        return batch_output
+
+    def _grade_locally(self, items: List[EvaluationInput], give_feedback: bool = False) -> List[Optional[EvaluationOutput]]:
+        # A batch-level feedback request needs every answer in front of the LLM
+        verdicts = [None if give_feedback else grade_locally(item) for item in items]
+        hits = sum(1 for v in verdicts if v is not None)
+        grader_stats.record(fast_path=True, count=hits)
+        grader_stats.record(fast_path=False, count=len(items) - hits)
+        return verdicts
+
+    def _recall(self, items: List[EvaluationInput], verdicts: list, give_feedback: bool = False) -> List[Optional[EvaluationOutput]]:
+        """Fill the verdicts the local grader left open from the memo (not for batch-level feedback)"""
+        open_items = [item for item, verdict in zip(items, verdicts) if verdict is None]
+        if self.memo is None or give_feedback or not open_items:
+            return verdicts
+        memoized = iter(self.memo.get_many(open_items))
+        return [verdict if verdict is not None else next(memoized) for verdict in verdicts]
+
+    def _remember(self, items: List[EvaluationInput], outputs: List[EvaluationOutput]) -> None:
+        if self.memo is not None:
+            self.memo.put_many(zip(items, outputs))
+
+    # The memo is SQLite (its writes wait up to busy_timeout for other processes): off the event loop
+    async def _arecall(self, items: List[EvaluationInput], verdicts: list, give_feedback: bool = False) -> List[Optional[EvaluationOutput]]:
+        if self.memo is None or give_feedback or all(verdict is not None for verdict in verdicts):
+            return verdicts
+        return await asyncio.to_thread(self._recall, items, verdicts, give_feedback)
+
+    async def _aremember(self, items: List[EvaluationInput], outputs: List[EvaluationOutput]) -> None:
+        if self.memo is not None:
+            await asyncio.to_thread(self._remember, items, outputs)
+
+    def _pending_batch(self, batch_input: EvaluationBatchInput, verdicts: list) -> EvaluationBatchInput:
+        pending = [item for item, verdict in zip(batch_input.items, verdicts) if verdict is None]
+        return batch_input.model_copy(update={"items": pending})
+
+    def _merge(self, verdicts: list, llm_evaluations: List[EvaluationOutput]) -> List[EvaluationOutput]:
+        llm_results = iter(llm_evaluations)
+        return [verdict if verdict is not None else next(llm_results) for verdict in verdicts]
+
+    def _build_prompt(self, eval_input: EvaluationInput) -> str:
+        return f"""
         {self.system_prompt}
         True Answer: {eval_input.true_answer}
         User Answer: {eval_input.user_answer}
         Give Feedback: {eval_input.give_feedback}
         """
-        config = types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema=EvaluationOutput.model_json_schema(),
-        )
-        response = self.client.models.generate_content(
-            model=self.model_name,
-            contents=[prompt],
-            config=config,
+
+    def _build_batch_prompt(self, batch_input: EvaluationBatchInput) -> str:
+        answers = "\n".join(
+            f"""
+        Answer {index}:
+        True Answer: {item.true_answer}
+        User Answer: {item.user_answer}"""
+            for index, item in enumerate(batch_input.items, start=1)
         )
+        return f"""
+        {self.system_prompt}
+        \nBatch mode: evaluate each of the {len(batch_input.items)} numbered answers below independently.
+        Return exactly {len(batch_input.items)} objects in `evaluations`, in the same order, with quiz_agent_feedback "None" on each.
+        Give Feedback: {batch_input.give_feedback} (if True, put one note covering the whole quiz in the top-level quiz_agent_feedback, else "None")
+        {answers}
+        """
+
+    def _unbatched_items(self, batch_input: EvaluationBatchInput) -> list:
+        # Per-item fallback never asks for Quiz Agent feedback; the batch keeps its aggregated note
+        return [item.model_copy(update={"give_feedback": False}) for item in batch_input.items]
+
+    def _parse_batch(self, response) -> EvaluationBatchOutput:
+        try:
+            return EvaluationBatchOutput.model_validate_json(response.text)
+        except Exception as e:
+            raise ValueError(f"Failed to generate valid batch evaluation: {e}\nRaw output: {response.text}")
+
+    def _parse(self, response) -> EvaluationOutput:
         try:
             eval_output = EvaluationOutput.model_validate_json(response.text)
             return eval_output
@@ -0,0 +1,247 @@
+# src/backend/MMagents/key_pool.py
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+# Back-off for a 429 that carries neither a Retry-After header nor a RetryInfo delay
+DEFAULT_COOLDOWN = 30.0
+
+def load_api_keys(environ: Mapping[str, str] = os.environ) -> List[str]:
+    """
+    Gemini API keys from the environment, in order and without duplicates:
+    GEMINI_KEYS (comma separated), GEMINI_KEY_1..N (up to the first gap), then GEMINI_PRIMARY_KEY
+    """
+    keys = [key.strip() for key in environ.get("GEMINI_KEYS", "").split(",")]
+    number = 1
+    while environ.get(f"GEMINI_KEY_{number}"):
+        keys.append(environ[f"GEMINI_KEY_{number}"].strip())
+        number += 1
+    keys.append(environ.get("GEMINI_PRIMARY_KEY", "").strip())
+    return list(dict.fromkeys(key for key in keys if key))
+
+def estimate_tokens(contents: Sequence[Any]) -> int:
+    """Rough prompt size for tokens-per-minute accounting (~4 characters per token)"""
+    return max(1, sum(len(str(part)) for part in contents) // 4)
+
+def rate_limit_delay(error: BaseException) -> Optional[float]:
+    """
+    Seconds to back off when error is a rate limit (HTTP 429 / RESOURCE_EXHAUSTED), else None
+    Duck-typed on .code/.status/.response/.details like google.genai.errors.APIError, so a local stub
+    raising APIError(429, ...) (or any exception with those attributes) exercises the same path
+    """
+    if getattr(error, "code", None) != 429 and "RESOURCE_EXHAUSTED" not in str(getattr(error, "status", "") or ""):
+        return None
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    retry_after = headers.get("retry-after") if headers is not None else None
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+    # google.rpc.RetryInfo in the error body: "retryDelay": "12s"
+    details = getattr(error, "details", None)
+    match = re.search(r'retryDelay"?\s*:\s*"(\d+(?:\.\d+)?)s"', json.dumps(details, default=str))
+    return float(match.group(1)) if match else DEFAULT_COOLDOWN
+
+class RateLimitedError(RuntimeError):
+    """Every key (and fallback model) is rate limited for longer than the caller is willing to wait"""
+    def __init__(self, retry_after: float, message: Optional[str] = None):
+        self.retry_after = retry_after
+        super().__init__(message or f"Gemini rate limit reached on every API key; retry in {retry_after:.0f}s")
+
+class TokenBucket:
+    """Refills at rate_per_minute up to one minute's worth; a rate of None never runs dry"""
+    __slots__ = ("rate", "capacity", "level", "updated_at")
+
+    def __init__(self, rate_per_minute: Optional[float], now: float):
+        self.rate = rate_per_minute / 60.0 if rate_per_minute else None
+        self.capacity = float(rate_per_minute or 0)
+        self.level = self.capacity
+        self.updated_at = now
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken (requests larger than the bucket only wait for a full one)"""
+        if self.rate is None:
+            return 0.0
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float, now: float) -> None:
+        if self.rate is not None:
+            self._refill(now)
+            self.level -= min(amount, self.capacity)
+
+class _Slot:
+    """Quota of one (key, model) pair: Gemini limits each model separately per key"""
+    __slots__ = ("requests", "tokens", "cooldown_until")
+
+    def __init__(self, rpm: Optional[float], tpm: Optional[float], now: float):
+        self.requests = TokenBucket(rpm, now)
+        self.tokens = TokenBucket(tpm, now)
+        self.cooldown_until = 0.0
+
+    def wait_time(self, tokens: int, now: float) -> float:
+        return max(self.cooldown_until - now, self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+
+class KeyLease:
+    """One call's claim on a key and model (give it back with KeyPool.release)"""
+    __slots__ = ("key_index", "model", "client")
+
+    def __init__(self, key_index: int, model: str, client: Any):
+        self.key_index = key_index
+        self.model = model
+        self.client = client
+
+class KeyPool:
+    """
+    Gemini clients for one or more API keys, shared by every agent
+    - Per (key, model) token buckets for requests/min (rpm) and estimated tokens/min (tpm); None = unmetered
+    - Least-loaded selection: of the keys with budget for a model, the one with the fewest calls in flight
+    - A model's fallbacks are used only while every key is out of budget or cooling down for it
+    - A 429 / RESOURCE_EXHAUSTED cools that key+model down for its Retry-After, and the call moves on
+      to another key; once nothing frees up within max_wait seconds, RateLimitedError is raised
+    """
+    def __init__(
+        self,
+        clients: Sequence[Any],
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        max_wait: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not clients:
+            raise ValueError("KeyPool needs at least one client")
+        self.clients = list(clients)
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_wait = max_wait
+        self.clock = clock
+        self._slots: Dict[Tuple[int, str], _Slot] = {}
+        self._in_flight = [0] * len(self.clients)
+        self._calls = [0] * len(self.clients)
+        self._rate_limited = [0] * len(self.clients)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def _slot(self, key_index: int, model: str, now: float) -> _Slot:
+        slot = self._slots.get((key_index, model))
+        if slot is None:
+            slot = self._slots[(key_index, model)] = _Slot(self.rpm, self.tpm, now)
+        return slot
+
+    def _try_acquire(self, models: Sequence[str], tokens: int) -> Tuple[Optional[KeyLease], float]:
+        """A lease on the least-loaded ready key for the first model that has one, else the shortest wait"""
+        with self._lock:
+            now = self.clock()
+            shortest = float("inf")
+            for model in models:
+                ready = []
+                for key_index in range(len(self.clients)):
+                    wait = self._slot(key_index, model, now).wait_time(tokens, now)
+                    if wait <= 0:
+                        ready.append(key_index)
+                    shortest = min(shortest, wait)
+                if ready:
+                    key_index = min(ready, key=lambda i: (self._in_flight[i], self._calls[i]))
+                    slot = self._slot(key_index, model, now)
+                    slot.requests.take(1, now)
+                    slot.tokens.take(tokens, now)
+                    self._in_flight[key_index] += 1
+                    self._calls[key_index] += 1
+                    return KeyLease(key_index, model, self.clients[key_index]), 0.0
+            return None, shortest
+
+    async def acquire(self, models: Sequence[str], tokens: int = 1, deadline: Optional[float] = None) -> KeyLease:
+        """Lease a key for the first of models with budget, waiting (until deadline, default max_wait) if none has"""
+        deadline = deadline if deadline is not None else self.clock() + self.max_wait
+        while True:
+            lease, wait = self._try_acquire(models, tokens)
+            if lease is not None:
+                return lease
+            if self.clock() + wait > deadline:
+                raise RateLimitedError(wait)
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, models: Sequence[str], tokens: int = 1, deadline: Optional[float] = None) -> KeyLease:
+        deadline = deadline if deadline is not None else self.clock() + self.max_wait
+        while True:
+            lease, wait = self._try_acquire(models, tokens)
+            if lease is not None:
+                return lease
+            if self.clock() + wait > deadline:
+                raise RateLimitedError(wait)
+            time.sleep(wait)
+
+    def release(self, lease: KeyLease, cooldown: Optional[float] = None) -> None:
+        """Return a lease; cooldown (seconds, from a 429) benches that key for that model"""
+        with self._lock:
+            self._in_flight[lease.key_index] -= 1
+            if cooldown is not None:
+                now = self.clock()
+                slot = self._slot(lease.key_index, lease.model, now)
+                slot.cooldown_until = max(slot.cooldown_until, now + cooldown)
+                self._rate_limited[lease.key_index] += 1
+
+    async def call(self, models: Sequence[str], tokens: int, request: Callable[[Any, str], Awaitable[Any]]) -> Any:
+        """await request(client, model) on a leased key, moving to another key/model on rate limits"""
+        deadline = self.clock() + self.max_wait
+        while True:
+            lease = await self.acquire(models, tokens, deadline)
+            try:
+                result = await request(lease.client, lease.model)
+            except Exception as e:
+                cooldown = rate_limit_delay(e)
+                self.release(lease, cooldown)
+                if cooldown is None:
+                    raise
+                continue
+            except BaseException:
+                self.release(lease)
+                raise
+            self.release(lease)
+            return result
+
+    def call_sync(self, models: Sequence[str], tokens: int, request: Callable[[Any, str], Any]) -> Any:
+        """Blocking counterpart of call"""
+        deadline = self.clock() + self.max_wait
+        while True:
+            lease = self.acquire_sync(models, tokens, deadline)
+            try:
+                result = request(lease.client, lease.model)
+            except Exception as e:
+                cooldown = rate_limit_delay(e)
+                self.release(lease, cooldown)
+                if cooldown is None:
+                    raise
+                continue
+            except BaseException:
+                self.release(lease)
+                raise
+            self.release(lease)
+            return result
+
+    def stats(self) -> List[dict]:
+        """Per-key counters (calls, in flight, 429s seen, models cooling down)"""
+        with self._lock:
+            now = self.clock()
+            return [
+                {
+                    "key": index + 1,
+                    "calls": self._calls[index],
+                    "in_flight": self._in_flight[index],
+                    "rate_limited": self._rate_limited[index],
+                    "cooling_down": sorted(m for (i, m), slot in self._slots.items() if i == index and slot.cooldown_until > now)
+                }
+                for index in range(len(self.clients))
+            ]
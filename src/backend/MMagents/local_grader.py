@@ -0,0 +1,146 @@
+# src/backend/MMagents/local_grader.py
+import re
+import string
+import threading
+from typing import Dict, FrozenSet, Optional
+from .schemas.EA_schemas import EvaluationInput, EvaluationOutput
+
+# "A) Option", "b. Option", "(C) Option" lines embedded in QuizQuestion.Q
+OPTION_LINE = re.compile(r"^\s*\(?([A-Ha-h])[\)\.:]\s+(.+?)\s*$", re.MULTILINE)
+# Answers that are nothing but option letters: "B", "b)", "A, C", "A and C", "(A) & (D)"
+LETTERS_ONLY = re.compile(r"^\s*\(?[A-Ha-h]\)?(?:\s*(?:,|&|/|and|\s)\s*\(?[A-Ha-h]\)?)*\s*[\.\)]?\s*$")
+# Answers that start with an option letter followed by its text: "B) Option two"
+LEADING_LETTER = re.compile(r"^\s*\(?([A-Ha-h])[\)\.:]\s+(.+)$", re.DOTALL)
+NUMBER = re.compile(r"^[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:e[-+]?\d+)?$")
+# Short identifier / code-like answers: len(), __init__, O(n log n), x += 1
+CODE_CHARS = set("()[]{}_=<>+-*/%.:")
+PUNCTUATION = str.maketrans("", "", string.punctuation)
+
+class GraderStats:
+    """Counts answers graded locally versus answers that still needed the LLM"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.fast_path_hits = 0
+        self.llm_fallbacks = 0
+
+    def record(self, fast_path: bool, count: int = 1) -> None:
+        with self._lock:
+            if fast_path:
+                self.fast_path_hits += count
+            else:
+                self.llm_fallbacks += count
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.fast_path_hits + self.llm_fallbacks
+            return {
+                "fast_path_hits": self.fast_path_hits,
+                "llm_fallbacks": self.llm_fallbacks,
+                "fast_path_rate": round(self.fast_path_hits / total, 3) if total else 0.0,
+            }
+
+grader_stats = GraderStats()
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace (MCQ option text only)"""
+    return " ".join(text.lower().translate(PUNCTUATION).split())
+
+def normalize_exact(text: str) -> str:
+    """Case and whitespace only: signs, operators and decimal points change the answer, so they stay"""
+    return " ".join(text.casefold().split())
+
+def parse_options(question: Optional[str]) -> Dict[str, str]:
+    """Map option letter -> normalized option text for MCQ options embedded in the question"""
+    if not question:
+        return {}
+    return {letter.upper(): normalize(text) for letter, text in OPTION_LINE.findall(question)}
+
+def parse_choice(answer: str, options: Dict[str, str]) -> Optional[FrozenSet[str]]:
+    """
+    Resolve an answer to a set of option letters, or None when it cannot be done with confidence
+    Accepts bare letters ("B", "A, C"), a letter with its text ("B) ...") or the exact option text
+    """
+    stripped = answer.strip().strip("`*")
+    if LETTERS_ONLY.match(stripped):
+        letters = frozenset(re.findall(r"[A-H]", re.sub(r"\band\b", " ", stripped, flags=re.IGNORECASE).upper()))
+        if letters and letters <= options.keys():
+            return letters
+        return None
+    leading = LEADING_LETTER.match(stripped)
+    if leading:
+        letter = leading.group(1).upper()
+        # Letter and text must agree, otherwise leave it to the LLM
+        if options.get(letter) == normalize(leading.group(2)):
+            return frozenset(letter)
+        return None
+    matches = [letter for letter, text in options.items() if text and text == normalize(stripped)]
+    return frozenset(matches) if len(matches) == 1 else None
+
+def parse_number(text: str) -> Optional[float]:
+    cleaned = text.strip().strip("`").replace(",", "").rstrip(".")
+    if NUMBER.match(cleaned.lower()):
+        return float(cleaned)
+    return None
+
+def code_token(text: str) -> Optional[str]:
+    """Return a whitespace-insensitive code token if the text looks like a short code answer"""
+    cleaned = text.strip().strip("`").strip()
+    if not cleaned or len(cleaned) > 40 or "\n" in cleaned:
+        return None
+    if not any(ch in CODE_CHARS for ch in cleaned):
+        return None
+    return "".join(cleaned.split())
+
+def _verdict(correct: bool, feedback: Optional[str] = None) -> EvaluationOutput:
+    return EvaluationOutput(
+        evaluation="1" if correct else "0",
+        feedback=None if correct else feedback,
+        quiz_agent_feedback=None,
+    )
+
+def grade_locally(eval_input: EvaluationInput) -> Optional[EvaluationOutput]:
+    """
+    Deterministic grading stage run before the Evaluator Agent
+    - Returns an EvaluationOutput when the verdict is certain (MCQ letters, numeric, code token, exact);
+      a mismatch between numbers is only certain when both are integers
+    - Returns None for anything ambiguous so the LLM judges it semantically
+    - Quiz Agent feedback needs the LLM, so give_feedback always falls through
+    """
+    if eval_input.give_feedback:
+        return None
+    true_answer, user_answer = eval_input.true_answer, eval_input.user_answer
+    if not user_answer.strip():
+        return _verdict(False, "No answer was given — give it a try next time!")
+    # MCQ / multi-select: compare option letter sets
+    options = parse_options(eval_input.question)
+    if options:
+        expected = parse_choice(true_answer, options)
+        if expected is not None:
+            given = parse_choice(user_answer, options)
+            if given is None:
+                return None
+            if given == expected:
+                return _verdict(True)
+            if len(expected) > 1:
+                return _verdict(False, "Close — this one has more than one right option, re-check each choice.")
+            return _verdict(False, "Not quite — revisit why the other options don't fit here.")
+    # Numeric answers (before any text comparison, so "-1" never matches "1")
+    expected_number = parse_number(true_answer)
+    if expected_number is not None:
+        given_number = parse_number(user_answer)
+        if given_number is None:
+            return None
+        if abs(given_number - expected_number) <= 1e-9 * max(1.0, abs(expected_number)):
+            return _verdict(True)
+        # Only whole numbers are certainly wrong: "3.14" for 3.14159 may be an accepted rounding
+        if not (expected_number.is_integer() and given_number.is_integer()):
+            return None
+        return _verdict(False, "The value is off — re-check your calculation step by step.")
+    # Short code answers: match ignoring whitespace and backticks
+    expected_code = code_token(true_answer)
+    if expected_code is not None and expected_code == code_token(user_answer):
+        return _verdict(True)
+    # Exact match ignoring only case and whitespace
+    if normalize_exact(true_answer) and normalize_exact(true_answer) == normalize_exact(user_answer):
+        return _verdict(True)
+    return None
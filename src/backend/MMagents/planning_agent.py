@@ -1,39 +1,148 @@
 # src/backend/MMagents/planning_agent.py
-from .base_agent import BaseAgent
-from .schemas.PA_schemas import PlanOutput
-from google import genai
-from google.genai import types
-from pathlib import Path
+import asyncio
+from .base_agent import BaseAgent, STABLE_MODEL, json_config, load_prompt
+from .call_policy import CallPolicy
+from .key_pool import KeyPool
+from .schemas.PA_schemas import ConceptTopic, PlanOutline, PlanOutput, TopicDetails, TopicOutline
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional
 
-CURRENT_DIR = Path(__file__).resolve().parent
-SYSTEM_PROMPT = (CURRENT_DIR / "system_instructions" / "PA.md").read_text(encoding="utf-8")
+if TYPE_CHECKING:
+    from google import genai
+
+# system_instructions/ file, read when the first agent is built
+PROMPT_FILE = "PA.md"
+# Outline and per-topic calls are small: short timeouts, hedged like the other interactive agents
+CALL_POLICY = CallPolicy(attempt_timeout=40, deadline=100, hedge=True)
+# Topics of one plan expanded at the same time (PA.md asks for 10, so normally all at once)
+EXPAND_CONCURRENCY = 10
 
 class PlanningAgent(BaseAgent):
-    def __init__(self, api_key: str, name: str = "PlanningAgent"):
-        super().__init__(name=name, system_prompt=SYSTEM_PROMPT)
-        self.api_key = api_key
-        self.client = genai.Client(api_key=self.api_key)
-        self.model_name = "gemini-2.5-flash-preview-09-2025"
+    """
+    Plans are built in two stages instead of one large structured call:
+    1. an outline call for the topics (name, description, difficulty, suggested_time)
+    2. one call per topic for its subtopics and focus areas, EXPAND_CONCURRENCY at a time
+    Each call validates (and repairs or retries) on its own, so one bad topic no longer discards the plan,
+    and wall-clock time is about the outline plus the slowest topic
+    aoutline + aexpand hand out the topics one at a time, for plans stored while still being generated
+    """
+    def __init__(self, api_key: Optional[str] = None, name: str = "PlanningAgent", client: Optional["genai.Client"] = None, limiter: Optional[asyncio.Semaphore] = None, key_pool: Optional[KeyPool] = None):
+        super().__init__(
+            name=name,
+            system_prompt=load_prompt(PROMPT_FILE),
+            api_key=api_key,
+            client=client,
+            limiter=limiter,
+            key_pool=key_pool,
+            fallback_models=(STABLE_MODEL,),
+            policy=CALL_POLICY,
+        )
 
     def run(self, skill: str, context: str) -> PlanOutput:
         """
         Run the planning agent for any skill and user context.
         """
-        prompt = f"""
+        outline = self.generate_validated([self._build_outline_prompt(skill, context)], self._parse_outline, config=json_config(PlanOutline))
+        with ThreadPoolExecutor(max_workers=EXPAND_CONCURRENCY) as pool:
+            details = list(pool.map(
+                lambda index: self.generate_validated(
+                    [self._build_topic_prompt(skill, context, outline, index)], self._parse_details, config=json_config(TopicDetails)
+                ),
+                range(len(outline.topics))
+            ))
+        return self._assemble(outline, details)
+
+    async def arun(self, skill: str, context: str) -> PlanOutput:
+        """Async counterpart of `run`, awaited by the FastAPI routes"""
+        outline = await self.aoutline(skill, context)
+        topics = [topic async for topic in self.aexpand(skill, context, outline)]
+        return PlanOutput(skill=outline.skill, topics=topics)
+
+    async def aoutline(self, skill: str, context: str) -> PlanOutline:
+        """Stage 1 on its own: the plan's topics without subtopics"""
+        return await self.agenerate_validated(
+            [self._build_outline_prompt(skill, context)], self._parse_outline, config=json_config(PlanOutline)
+        )
+
+    async def aexpand(self, skill: str, context: str, outline: PlanOutline, start: int = 0) -> AsyncIterator[ConceptTopic]:
+        """
+        Stage 2: the outline's topics from index start on, complete, in outline order; each is yielded as soon
+        as it and every topic before it are expanded (all of them are expanded concurrently). Closing the
+        iterator early cancels the expansions still running
+        """
+        expanding = asyncio.Semaphore(EXPAND_CONCURRENCY)
+
+        async def expand(index: int) -> TopicDetails:
+            async with expanding:
+                return await self.agenerate_validated(
+                    [self._build_topic_prompt(skill, context, outline, index)], self._parse_details, config=json_config(TopicDetails)
+                )
+
+        tasks = [asyncio.ensure_future(expand(index)) for index in range(start, len(outline.topics))]
+        try:
+            for topic, task in zip(outline.topics[start:], tasks):
+                yield self._topic(topic, await task)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _build_outline_prompt(self, skill: str, context: str) -> str:
+        return f"""
             {self.system_prompt}\n
+            Outline stage: list the main topics only, each with name, description, difficulty and suggested_time.
+            Subtopics and focus areas are written for each topic separately afterwards.\n
             Skill: {skill}\n
             Context: {context}\n
             """
-        config = types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema=PlanOutput.model_json_schema(),
+
+    def _build_topic_prompt(self, skill: str, context: str, outline: PlanOutline, index: int) -> str:
+        topic = outline.topics[index]
+        others = "\n".join(f"            {number}. {t.name}" for number, t in enumerate(outline.topics, start=1))
+        return f"""
+            {self.system_prompt}\n
+            Topic stage: the outline below is fixed. Expand only topic {index + 1} with its 3–5 subtopics
+            (name and description each) and its focus_areas, without repeating material from the other topics.\n
+            Skill: {skill}\n
+            Context: {context}\n
+            Outline:
+{others}\n
+            Topic {index + 1}: {topic.name} ({topic.difficulty}, {topic.suggested_time})
+            Description: {topic.description}\n
+            """
+
+    def _assemble(self, outline: PlanOutline, details: List[TopicDetails]) -> PlanOutput:
+        """Merge outline and expansions into the PlanOutput a single call used to return"""
+        return PlanOutput(
+            skill=outline.skill,
+            topics=[self._topic(topic, detail) for topic, detail in zip(outline.topics, details)]
         )
-        response = self.client.models.generate_content(
-            model=self.model_name,
-            contents=[prompt],
-            config=config,
+
+    @staticmethod
+    def _topic(topic: TopicOutline, detail: TopicDetails) -> ConceptTopic:
+        return ConceptTopic(
+            name=topic.name,
+            description=topic.description,
+            subtopics=detail.subtopics,
+            difficulty=topic.difficulty,
+            suggested_time=topic.suggested_time,
+            focus_areas=detail.focus_areas,
         )
+
+    def _parse_outline(self, response) -> PlanOutline:
+        try:
+            outline = PlanOutline.model_validate_json(response.text)
+        except Exception as e:
+            raise ValueError(f"Failed to parse LLM output into PlanOutline: {e}\nRaw output: {response.text}")
+        if not outline.topics:
+            raise ValueError(f"Plan outline has no topics\nRaw output: {response.text}")
+        return outline
+
+    def _parse_details(self, response) -> TopicDetails:
         try:
-            return PlanOutput.model_validate_json(response.text)
+            details = TopicDetails.model_validate_json(response.text)
         except Exception as e:
-            raise ValueError(f"Failed to parse LLM output into PlanOutput: {e}\nRaw output: {response.text}")
+            raise ValueError(f"Failed to parse LLM output into TopicDetails: {e}\nRaw output: {response.text}")
+        if not details.subtopics:
+            raise ValueError(f"Topic expansion has no subtopics\nRaw output: {response.text}")
+        return details
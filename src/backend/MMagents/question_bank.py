@@ -0,0 +1,287 @@
+# src/backend/MMagents/question_bank.py
+import hashlib
+import random
+import re
+import sqlite3
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from .schemas.QA_schemas import QuizQuestion
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subtopics (
+    fingerprint TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    signature BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS subtopic_bands (
+    band BLOB NOT NULL,
+    fingerprint TEXT NOT NULL,
+    PRIMARY KEY (band, fingerprint)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    skill_id TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    question TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_questions_subtopic ON questions (fingerprint, difficulty);
+CREATE TABLE IF NOT EXISTS question_bands (
+    band BLOB NOT NULL,
+    question_id INTEGER NOT NULL,
+    PRIMARY KEY (band, question_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS served (
+    skill_id TEXT NOT NULL,
+    question_id INTEGER NOT NULL,
+    served_at REAL NOT NULL,
+    PRIMARY KEY (skill_id, question_id)
+) WITHOUT ROWID;
+"""
+
+# 64 hash functions in 16 bands of 4 rows: pairs above ~0.5 Jaccard share a band with high probability
+NUM_PERM = 64
+BANDS = 16
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x51A7)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_WORD = re.compile(r"\w+")
+
+def normalize_text(text: str) -> List[str]:
+    return _WORD.findall(text.casefold())
+
+def shingles(text: str, k: int) -> set:
+    """Word k-shingles of text (the whole text as one shingle when it is shorter than k words)"""
+    words = normalize_text(text)
+    if len(words) <= k:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+def minhash(features: Iterable[str]) -> Tuple[int, ...]:
+    """MinHash signature (NUM_PERM values) of a set of shingles"""
+    hashes = [int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "big") for f in features]
+    if not hashes:
+        return (0,) * NUM_PERM
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS)
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures"""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+def band_keys(signature: Sequence[int]) -> List[bytes]:
+    """LSH buckets of a signature: near-duplicates share at least one"""
+    rows = NUM_PERM // BANDS
+    return [
+        hashlib.blake2b(struct.pack(f">B{rows}Q", band, *signature[band * rows:(band + 1) * rows]), digest_size=8).digest()
+        for band in range(BANDS)
+    ]
+
+def pack(signature: Sequence[int]) -> bytes:
+    return struct.pack(f">{NUM_PERM}Q", *signature)
+
+def unpack(blob: bytes) -> Tuple[int, ...]:
+    return struct.unpack(f">{NUM_PERM}Q", blob)
+
+def question_signature(question: QuizQuestion) -> Tuple[int, ...]:
+    # Question text only (MCQ options included): the same question with a reworded explanation is still a repeat
+    return minhash(shingles(question.Q, 3))
+
+def subtopic_fingerprint(name: str, description: Optional[str]) -> str:
+    """Exact identity of a subtopic across skills: its normalized name and description"""
+    text = " ".join(normalize_text(name)) + "\x1f" + " ".join(normalize_text(description or ""))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=12).hexdigest()
+
+def normalize_difficulty(difficulty: Optional[str]) -> str:
+    return " ".join((difficulty or "").casefold().split())
+
+@dataclass
+class BankedQuestion:
+    id: int
+    question: QuizQuestion
+    signature: Tuple[int, ...]
+
+class QuestionBank:
+    """
+    Every generated quiz question, kept in a small SQLite file so quizzes can be assembled from earlier ones
+    - Questions are indexed by skill, subtopic fingerprint and difficulty; a subtopic also matches
+      similar subtopics of other skills (MinHash of name + description, >= subtopic_threshold)
+    - New questions are checked for near-duplicates (MinHash over word 3-shingles with LSH buckets,
+      >= duplicate_threshold); a repeat is not stored again, it maps to the banked question
+    - served records which questions each skill has had, so a retake or another subtopic never gets them again
+    - bypass=True turns the bank off without touching the file (quizzes are then always generated)
+    """
+    def __init__(self, db_path: Path, duplicate_threshold: float = 0.7, subtopic_threshold: float = 0.6, bypass: bool = False):
+        self.db_path = Path(db_path)
+        self.duplicate_threshold = duplicate_threshold
+        self.subtopic_threshold = subtopic_threshold
+        self.bypass = bypass
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        self.counters = dict.fromkeys(("banked_served", "generated_served", "duplicates", "assembled_without_call"), 0)
+
+    def draw(self, skill_id: str, subtopic_name: str, subtopic_description: Optional[str], difficulty: Optional[str], count: int) -> List[BankedQuestion]:
+        """
+        Up to count banked questions for this subtopic (or a similar one) and difficulty that skill_id
+        has not been served, no two of them near-duplicates; this subtopic's own questions come first
+        """
+        if self.bypass or count <= 0:
+            return []
+        fingerprint = subtopic_fingerprint(subtopic_name, subtopic_description)
+        with self._lock:
+            fingerprints = self._similar_subtopics(fingerprint, self._subtopic_signature(subtopic_name, subtopic_description))
+            placeholders = ",".join("?" * len(fingerprints))
+            rows = self._conn.execute(
+                f"""
+                SELECT id, question, signature FROM questions q
+                WHERE fingerprint IN ({placeholders}) AND difficulty = ?
+                  AND NOT EXISTS (SELECT 1 FROM served s WHERE s.skill_id = ? AND s.question_id = q.id)
+                ORDER BY fingerprint = ? DESC, id
+                """,
+                [*fingerprints, normalize_difficulty(difficulty), skill_id, fingerprint]
+            ).fetchall()
+        picked: List[BankedQuestion] = []
+        for question_id, question, signature in rows:
+            entry = BankedQuestion(question_id, QuizQuestion.model_validate_json(question), unpack(signature))
+            if not self._repeats(entry.signature, picked):
+                picked.append(entry)
+                if len(picked) == count:
+                    break
+        return picked
+
+    def add(self, skill_id: str, subtopic_name: str, subtopic_description: Optional[str], difficulty: Optional[str],
+            questions: Iterable[QuizQuestion]) -> List[Tuple[BankedQuestion, bool]]:
+        """
+        Bank freshly generated questions; returns (entry, is_new) per question, where a near-duplicate of a
+        banked question maps to that banked entry (is_new False) instead of being stored again
+        """
+        questions = list(questions)
+        if self.bypass:
+            return [(BankedQuestion(0, q, question_signature(q)), True) for q in questions]
+        fingerprint = subtopic_fingerprint(subtopic_name, subtopic_description)
+        subtopic_signature = self._subtopic_signature(subtopic_name, subtopic_description)
+        now = time.time()
+        results: List[Tuple[BankedQuestion, bool]] = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._conn.execute("INSERT OR IGNORE INTO subtopics (fingerprint, name, signature) VALUES (?, ?, ?)",
+                                      (fingerprint, subtopic_name, pack(subtopic_signature))).rowcount:
+                    self._conn.executemany("INSERT OR IGNORE INTO subtopic_bands (band, fingerprint) VALUES (?, ?)",
+                                           [(band, fingerprint) for band in band_keys(subtopic_signature)])
+                for question in questions:
+                    signature = question_signature(question)
+                    bands = band_keys(signature)
+                    existing = self._nearest_question(signature, bands)
+                    if existing is not None:
+                        results.append((existing, False))
+                        continue
+                    question_id = self._conn.execute(
+                        "INSERT INTO questions (skill_id, fingerprint, difficulty, question, signature, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                        (skill_id, fingerprint, normalize_difficulty(difficulty), question.model_dump_json(), pack(signature), now)
+                    ).lastrowid
+                    self._conn.executemany("INSERT OR IGNORE INTO question_bands (band, question_id) VALUES (?, ?)",
+                                           [(band, question_id) for band in bands])
+                    results.append((BankedQuestion(question_id, question, signature), True))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return results
+
+    def assemble(self, skill_id: str, banked: List[BankedQuestion], added: List[Tuple[BankedQuestion, bool]], count: int) -> List[QuizQuestion]:
+        """
+        The quiz: banked questions, then fresh ones that skill_id has not seen and that do not repeat an
+        earlier pick; topped up with the remaining fresh ones if the model repeated itself. All are marked served
+        """
+        picked = list(banked)
+        leftovers = []
+        served = self._served(skill_id, [entry.id for entry, is_new in added if not is_new])
+        for entry, is_new in added:
+            if len(picked) < count and (is_new or entry.id not in served) and not self._repeats(entry.signature, picked):
+                picked.append(entry)
+            else:
+                # Still usable if the quiz would otherwise come up short
+                leftovers.append(entry)
+        picked += leftovers[:max(0, count - len(picked))]
+        with self._lock:
+            self.counters["banked_served"] += len(banked)
+            self.counters["generated_served"] += len(picked) - len(banked)
+            self.counters["duplicates"] += sum(1 for _, is_new in added if not is_new)
+            if not added and banked:
+                self.counters["assembled_without_call"] += 1
+        self.mark_served(skill_id, [entry.id for entry in picked])
+        return [entry.question for entry in picked]
+
+    def mark_served(self, skill_id: str, question_ids: Iterable[int]) -> None:
+        rows = [(skill_id, question_id, time.time()) for question_id in set(question_ids) if question_id]
+        if self.bypass or not rows:
+            return
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO served (skill_id, question_id, served_at) VALUES (?, ?, ?)", rows)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            questions = self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+            subtopics = self._conn.execute("SELECT COUNT(*) FROM subtopics").fetchone()[0]
+            return {**self.counters, "bank_questions": questions, "bank_subtopics": subtopics, "bank_bypass": self.bypass}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _repeats(self, signature: Sequence[int], picked: List[BankedQuestion]) -> bool:
+        return any(similarity(signature, entry.signature) >= self.duplicate_threshold for entry in picked)
+
+    @staticmethod
+    def _subtopic_signature(name: str, description: Optional[str]) -> Tuple[int, ...]:
+        return minhash(shingles(f"{name} {description or ''}", 2))
+
+    def _similar_subtopics(self, fingerprint: str, signature: Tuple[int, ...]) -> List[str]:
+        """This subtopic's fingerprint plus those of banked subtopics similar enough to share questions"""
+        bands = band_keys(signature)
+        rows = self._conn.execute(
+            f"""
+            SELECT fingerprint, signature FROM subtopics WHERE fingerprint IN
+                (SELECT fingerprint FROM subtopic_bands WHERE band IN ({",".join("?" * len(bands))}))
+            """,
+            bands
+        ).fetchall()
+        similar = [f for f, blob in rows if f != fingerprint and similarity(signature, unpack(blob)) >= self.subtopic_threshold]
+        return [fingerprint, *similar]
+
+    def _nearest_question(self, signature: Tuple[int, ...], bands: List[bytes]) -> Optional[BankedQuestion]:
+        """The most similar banked question at or above duplicate_threshold, if any"""
+        rows = self._conn.execute(
+            f"""
+            SELECT id, question, signature FROM questions WHERE id IN
+                (SELECT question_id FROM question_bands WHERE band IN ({",".join("?" * len(bands))}))
+            """,
+            bands
+        ).fetchall()
+        best, best_score = None, self.duplicate_threshold
+        for question_id, question, blob in rows:
+            candidate = unpack(blob)
+            score = similarity(signature, candidate)
+            if score >= best_score:
+                best, best_score = BankedQuestion(question_id, QuizQuestion.model_validate_json(question), candidate), score
+        return best
+
+    def _served(self, skill_id: str, question_ids: List[int]) -> set:
+        if self.bypass or not question_ids:
+            return set()
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT question_id FROM served WHERE skill_id = ? AND question_id IN ({','.join('?' * len(question_ids))})",
+                [skill_id, *question_ids]
+            ).fetchall()
+        return {row[0] for row in rows}
@@ -1,19 +1,35 @@
 # src/backend/MMagents/quiz_agent.py
-from .base_agent import BaseAgent
-from .schemas.QA_schemas import QuizInput, QuizOutput
-from google import genai
-from google.genai import types
-from pathlib import Path
+import asyncio
+from .base_agent import BaseAgent, STABLE_MODEL, json_config, load_prompt
+from .call_policy import CallPolicy
+from .key_pool import KeyPool
+from .question_bank import BankedQuestion, QuestionBank
+from .schemas.QA_schemas import QuizInput, QuizOutput, QuizQuestion
+from typing import TYPE_CHECKING, List, Optional
 
-CURRENT_DIR = Path(__file__).resolve().parent
-SYSTEM_PROMPT = (CURRENT_DIR / "system_instructions" / "QA.md").read_text(encoding="utf-8")
+if TYPE_CHECKING:
+    from google import genai
+
+# system_instructions/ file, read when the first agent is built
+PROMPT_FILE = "QA.md"
+# Five questions per call; hedged since the learning screen waits on it
+CALL_POLICY = CallPolicy(attempt_timeout=45, deadline=100, hedge=True)
 
 class QuizAgent(BaseAgent):
-    def __init__(self, api_key: str, name: str = "QuizAgent"):
-        super().__init__(name=name, system_prompt=SYSTEM_PROMPT)
-        self.api_key = api_key
-        self.client = genai.Client(api_key=self.api_key)
-        self.model_name = "gemini-2.5-flash-preview-09-2025"
+    def __init__(self, api_key: Optional[str] = None, name: str = "QuizAgent", client: Optional["genai.Client"] = None, limiter: Optional[asyncio.Semaphore] = None, key_pool: Optional[KeyPool] = None, bank: Optional[QuestionBank] = None):
+        super().__init__(
+            name=name,
+            system_prompt=load_prompt(PROMPT_FILE),
+            api_key=api_key,
+            client=client,
+            limiter=limiter,
+            key_pool=key_pool,
+            fallback_models=(STABLE_MODEL,),
+            policy=CALL_POLICY,
+            config=json_config(QuizOutput),
+        )
+        # Earlier questions quizzes are assembled from before generating; None = always generate the whole quiz
+        self.bank = bank
 
     def run(self, quiz_input: QuizInput) -> QuizOutput:
         """
@@ -23,7 +39,56 @@ class QuizAgent(BaseAgent):
         Returns:
             QuizOutput: Object containing 5 questions with answers and explanations
         """
-        prompt = f"""
+        return self.generate_validated([self._build_prompt(quiz_input)], self._parse)
+
+    async def arun(self, quiz_input: QuizInput) -> QuizOutput:
+        """Async counterpart of `run`, awaited by the FastAPI routes"""
+        return await self.agenerate_validated([self._build_prompt(quiz_input)], self._parse)
+
+    def compose(self, quiz_input: QuizInput, skill_id: str, difficulty: Optional[str] = None) -> QuizOutput:
+        """
+        A quiz of quiz_input.question_count questions for skill_id: unseen banked questions for this subtopic
+        (or a similar one) and difficulty first, with only the shortfall generated and banked.
+        """
+        if self.bank is None:
+            return self.run(quiz_input)
+        banked = self.bank.draw(skill_id, quiz_input.subtopic_name, quiz_input.subtopic_description, difficulty, quiz_input.question_count)
+        shortfall = self._shortfall(quiz_input, banked)
+        generated = self.run(shortfall).questions if shortfall else []
+        return self._assemble(quiz_input, skill_id, difficulty, banked, generated)
+
+    async def acompose(self, quiz_input: QuizInput, skill_id: str, difficulty: Optional[str] = None) -> QuizOutput:
+        """Async counterpart of `compose`, awaited by the FastAPI routes (bank reads and writes run in a worker thread)"""
+        if self.bank is None:
+            return await self.arun(quiz_input)
+        banked = await asyncio.to_thread(self.bank.draw, skill_id, quiz_input.subtopic_name, quiz_input.subtopic_description, difficulty, quiz_input.question_count)
+        shortfall = self._shortfall(quiz_input, banked)
+        generated = (await self.arun(shortfall)).questions if shortfall else []
+        return await asyncio.to_thread(self._assemble, quiz_input, skill_id, difficulty, banked, generated)
+
+    def retire(self, quiz_input: QuizInput, skill_id: str, difficulty: Optional[str], questions: List[QuizQuestion]) -> None:
+        """Bank a quiz skill_id has already had (e.g. before a retake) and mark its questions as served"""
+        if self.bank is not None:
+            added = self.bank.add(skill_id, quiz_input.subtopic_name, quiz_input.subtopic_description, difficulty, questions)
+            self.bank.mark_served(skill_id, [entry.id for entry, _ in added])
+
+    @staticmethod
+    def _shortfall(quiz_input: QuizInput, banked: List[BankedQuestion]) -> Optional[QuizInput]:
+        """The input asking only for the questions the bank could not supply (None if it supplied them all)"""
+        missing = quiz_input.question_count - len(banked)
+        if missing <= 0:
+            return None
+        return quiz_input.model_copy(update={
+            "question_count": missing,
+            "avoid_questions": [*quiz_input.avoid_questions, *(entry.question.Q for entry in banked)]
+        })
+
+    def _assemble(self, quiz_input: QuizInput, skill_id: str, difficulty: Optional[str], banked: List[BankedQuestion], generated: List[QuizQuestion]) -> QuizOutput:
+        added = self.bank.add(skill_id, quiz_input.subtopic_name, quiz_input.subtopic_description, difficulty, generated) if generated else []
+        return QuizOutput(questions=self.bank.assemble(skill_id, banked, added, quiz_input.question_count))
+
+    def _build_prompt(self, quiz_input: QuizInput) -> str:
+        return f"""
             {self.system_prompt}
             Topic: {quiz_input.topic_name}
             Subtopic: {quiz_input.subtopic_name}
@@ -32,18 +97,18 @@ class QuizAgent(BaseAgent):
             User Context: {quiz_input.user_context}
             Current Mastery: {quiz_input.current_mastery}
             Evaluator Feedback: {quiz_input.evaluator_feedback or 'None provided'}
+            Number of Questions: {quiz_input.question_count}
+            Avoid Questions: {self._format_avoid(quiz_input.avoid_questions)}
             \nIf MCQ questions are being generated : embed MCQ options directly inside the Q string.
             Format options on new lines prefixed with A), B), C), etc.
             """  
-        config = types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema=QuizOutput.model_json_schema(),
-        )
-        response = self.client.models.generate_content(
-            model=self.model_name,
-            contents=[prompt],
-            config=config,
-        )
+
+    @staticmethod
+    def _format_avoid(questions: List[str]) -> str:
+        # First line of each (the question without its MCQ options) keeps the prompt short
+        return "; ".join(q.strip().splitlines()[0] for q in questions if q.strip()) or "None"
+
+    def _parse(self, response) -> QuizOutput:
         try:
             quiz_output = QuizOutput.model_validate_json(response.text)
             return quiz_output
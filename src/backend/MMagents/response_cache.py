@@ -0,0 +1,205 @@
+# src/backend/MMagents/response_cache.py
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, FrozenSet, Hashable, List, Optional, Set, Tuple
+
+# Sentence punctuation that never changes what is being asked; symbols such as + # * / = stay,
+# so "what is c++" and "what is c#" remain different questions (periods only go when not inside a token)
+QUERY_PUNCTUATION = re.compile(r"[?!,;:\"'`]|\.(?!\w)")
+DIGITS = re.compile(r"\S*\d\S*")
+CONTRACTED_NOT = re.compile(r"n['’]t\b")
+# Words that only pad a question ("what's a closure", "how do I sort", "can you explain the closure")
+# and would otherwise dominate the similarity of short queries
+FILLER_WORDS = frozenset({"a", "an", "the", "is", "are", "s", "please", "can", "could", "you", "me", "do", "does", "i", "to"})
+
+def fold_plural(word: str) -> str:
+    """'lists' and 'list' ask the same thing ('class' and 'is' keep their s)"""
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+# A question that differs from a cached one in any of these words asks something else
+# ("not a closure", "descending" vs "ascending"), however similar the rest is
+NEGATIONS = frozenset({"not", "no", "never", "without", "cannot", "none", "neither", "nor", "except", "avoid"})
+ANTONYMS = (
+    ("ascending", "descending"), ("increasing", "decreasing"), ("increase", "decrease"), ("min", "max"),
+    ("minimum", "maximum"), ("smallest", "largest"), ("smallest", "biggest"), ("first", "last"),
+    ("before", "after"), ("true", "false"), ("add", "remove"), ("insert", "delete"), ("push", "pop"),
+    ("encode", "decode"), ("encrypt", "decrypt"), ("serialize", "deserialize"), ("compress", "decompress"),
+    ("open", "close"), ("start", "end"), ("begin", "end"), ("left", "right"), ("upper", "lower"),
+    ("uppercase", "lowercase"), ("positive", "negative"), ("even", "odd"), ("sync", "async"),
+    ("synchronous", "asynchronous"), ("mutable", "immutable"), ("public", "private"), ("static", "dynamic"),
+    ("input", "output"), ("read", "write"), ("import", "export"), ("inner", "outer"), ("union", "intersection"),
+    ("stack", "queue"), ("shallow", "deep"), ("lazy", "eager"), ("top", "bottom"), ("head", "tail"),
+    ("prefix", "suffix"), ("preorder", "postorder"), ("row", "column"), ("more", "less"), ("greater", "less"),
+    ("higher", "lower"), ("best", "worst"), ("include", "exclude"), ("enable", "disable"), ("valid", "invalid"),
+)
+POLAR_WORDS = NEGATIONS | frozenset(fold_plural(word) for pair in ANTONYMS for word in pair)
+
+def normalize_query(query: str) -> str:
+    """Lowercase, spell out n't, drop sentence punctuation and filler words, fold plurals, collapse whitespace"""
+    words = QUERY_PUNCTUATION.sub(" ", CONTRACTED_NOT.sub(" not", query.lower())).split()
+    return " ".join(fold_plural(word) for word in ([word for word in words if word not in FILLER_WORDS] or words))
+
+def query_terms(normalized: str) -> Counter:
+    return Counter(normalized.split())
+
+class CacheEntry:
+    __slots__ = ("scope", "query", "terms", "numbers", "response", "expires_at", "size")
+
+    def __init__(self, scope: Hashable, query: str, terms: Counter, response: str, expires_at: float):
+        self.scope = scope
+        self.query = query
+        self.terms = terms
+        self.numbers = numbers_in(query)
+        self.response = response
+        self.expires_at = expires_at
+        self.size = len(query) + len(response)
+
+def numbers_in(query: str) -> FrozenSet[str]:
+    """Tokens containing digits: near-identical questions about different numbers must not share answers"""
+    return frozenset(DIGITS.findall(query))
+
+class ResponseCache:
+    """
+    Answers to earlier questions, reused for the same or a near-identical question in the same scope
+    - Exact hits on the normalized query; fuzzy hits by TF-IDF-weighted cosine similarity of words
+      (at least threshold) over the scope's entries, found through an inverted word index
+    - A fuzzy hit needs the same numbers, and the words the two questions do not share must not include
+      a negation or one side of an antonym pair (POLAR_WORDS)
+    - Scope (e.g. skill and topic) partitions the cache: the same words can need different answers per skill
+    - Entries expire after ttl seconds; beyond max_entries or max_bytes (queries + answers) the least
+      recently used ones are evicted
+    - Pure Python and in-memory, so lookups take microseconds to a few milliseconds and no quota
+    """
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        ttl: float = 6 * 3600,
+        max_entries: int = 2048,
+        max_bytes: int = 8 * 1024 * 1024,
+        max_candidates: int = 16,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_candidates = max_candidates
+        self.clock = clock
+        # (scope, normalized query) -> entry, least recently used first
+        self._entries: "OrderedDict[Tuple[Hashable, str], CacheEntry]" = OrderedDict()
+        # scope -> word -> keys of the entries containing it (also the document frequencies for IDF)
+        self._postings: Dict[Hashable, Dict[str, Set[Tuple[Hashable, str]]]] = {}
+        self._scope_sizes: Counter = Counter()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(("exact_hits", "fuzzy_hits", "misses", "stores", "evictions", "expirations"), 0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, query: str, scope: Hashable = None) -> Optional[str]:
+        """The cached answer for query in scope, or None (counted as a miss)"""
+        normalized = normalize_query(query)
+        with self._lock:
+            now = self.clock()
+            key = (scope, normalized)
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                self._remove(key, "expirations")
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._counts["exact_hits"] += 1
+                return entry.response
+            key = self._nearest(scope, normalized, now) if normalized else None
+            if key is None:
+                self._counts["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counts["fuzzy_hits"] += 1
+            return self._entries[key].response
+
+    def put(self, query: str, response: str, scope: Hashable = None) -> None:
+        normalized = normalize_query(query)
+        if not normalized or not response:
+            return
+        with self._lock:
+            key = (scope, normalized)
+            if key in self._entries:
+                self._remove(key)
+            entry = CacheEntry(scope, normalized, query_terms(normalized), response, self.clock() + self.ttl)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._scope_sizes[scope] += 1
+            postings = self._postings.setdefault(scope, {})
+            for term in entry.terms:
+                postings.setdefault(term, set()).add(key)
+            self._counts["stores"] += 1
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)), "evictions")
+
+    def _remove(self, key: Tuple[Hashable, str], reason: Optional[str] = None) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        self._scope_sizes[entry.scope] -= 1
+        postings = self._postings[entry.scope]
+        for term in entry.terms:
+            keys = postings[term]
+            keys.discard(key)
+            if not keys:
+                del postings[term]
+        if not postings:
+            del self._postings[entry.scope]
+            del self._scope_sizes[entry.scope]
+        if reason:
+            self._counts[reason] += 1
+
+    def _nearest(self, scope: Hashable, normalized: str, now: float) -> Optional[Tuple[Hashable, str]]:
+        """Key of the most similar live entry in scope at or above the threshold"""
+        postings = self._postings.get(scope)
+        if not postings:
+            return None
+        terms = query_terms(normalized)
+        # Shortlist by shared words before scoring, so cost follows overlap rather than cache size
+        overlap: Counter = Counter()
+        for term in terms:
+            overlap.update(postings.get(term, ()))
+        total = self._scope_sizes[scope]
+        idf = lambda term: math.log((1 + total) / (1 + len(postings.get(term, ())))) + 1
+        query_vector = {term: count * idf(term) for term, count in terms.items()}
+        query_norm = math.sqrt(sum(w * w for w in query_vector.values()))
+        numbers = numbers_in(normalized)
+        best_key, best_score = None, self.threshold
+        expired: List[Tuple[Hashable, str]] = []
+        for key, _ in overlap.most_common(self.max_candidates):
+            entry = self._entries[key]
+            if entry.expires_at <= now:
+                expired.append(key)
+                continue
+            if entry.numbers != numbers or POLAR_WORDS.intersection(entry.terms.keys() ^ terms.keys()):
+                continue
+            dot, norm = 0.0, 0.0
+            for term, count in entry.terms.items():
+                weight = count * idf(term)
+                norm += weight * weight
+                dot += weight * query_vector.get(term, 0.0)
+            score = dot / (query_norm * math.sqrt(norm)) if norm and query_norm else 0.0
+            if score >= best_score:
+                best_key, best_score = key, score
+        for key in expired:
+            self._remove(key, "expirations")
+        return best_key
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            hits = self._counts["exact_hits"] + self._counts["fuzzy_hits"]
+            lookups = hits + self._counts["misses"]
+            return {
+                **self._counts,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            }
@@ -1,13 +1,24 @@
 # src/backend/MMagents/schemas/EA_schemas.py
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class EvaluationInput(BaseModel):
     true_answer: str            
     user_answer: str          
     give_feedback: bool = False  
+    # the quiz question (with any embedded MCQ options), used by the local grader
+    question: Optional[str] = None
 
 class EvaluationOutput(BaseModel):
     evaluation: str              
     feedback: Optional[str]  
     quiz_agent_feedback: Optional[str]  
+
+class EvaluationBatchInput(BaseModel):
+    """A whole quiz graded in one call; give_feedback asks for one aggregated note"""
+    items: List[EvaluationInput]
+    give_feedback: bool = False
+
+class EvaluationBatchOutput(BaseModel):
+    evaluations: List[EvaluationOutput]
+    quiz_agent_feedback: Optional[str]
@@ -17,3 +17,19 @@ class ConceptTopic(BaseModel):
 class PlanOutput(BaseModel):
     skill: str
     topics: List[ConceptTopic]
+
+class TopicOutline(BaseModel):
+    name: str
+    description: str
+    difficulty: str
+    suggested_time: str
+
+class PlanOutline(BaseModel):
+    """Stage 1 of plan generation: the topics without their subtopics"""
+    skill: str
+    topics: List[TopicOutline]
+
+class TopicDetails(BaseModel):
+    """Stage 2 of plan generation: one outline topic expanded"""
+    subtopics: List[Subtopic]
+    focus_areas: List[str]
@@ -15,6 +15,9 @@ class QuizInput(BaseModel):
     user_context: str
     current_mastery: float
     evaluator_feedback: Optional[str] = None
+    # Fewer when part of the quiz comes from the question bank; avoid_questions are already in it
+    question_count: int = 5
+    avoid_questions: List[str] = []
 
 class QuizOutput(BaseModel):
     """Output schema containing x quiz questions"""
@@ -0,0 +1,126 @@
+# src/backend/MMagents/verdict_memo.py
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from .schemas.EA_schemas import EvaluationInput, EvaluationOutput
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS verdicts (
+    key BLOB PRIMARY KEY,
+    version TEXT NOT NULL,
+    output TEXT NOT NULL,
+    used_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_verdicts_used ON verdicts (used_at);
+"""
+
+def prompt_version(system_prompt: str) -> str:
+    """Fingerprint of the evaluator prompt: editing EA.md retires every earlier verdict"""
+    return hashlib.blake2b(system_prompt.encode("utf-8"), digest_size=8).hexdigest()
+
+def normalize_answer(text: str) -> str:
+    """Case and whitespace only; punctuation can change a code or math answer, so it stays"""
+    return " ".join(text.casefold().split())
+
+def verdict_key(version: str, eval_input: EvaluationInput) -> bytes:
+    """Hash of everything the single-answer prompt sees (the question text is not part of it)"""
+    parts = (version, normalize_answer(eval_input.true_answer), normalize_answer(eval_input.user_answer), str(eval_input.give_feedback))
+    return hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=16).digest()
+
+class VerdictMemo:
+    """
+    Evaluator verdicts persisted in a small SQLite file, so a retaken quiz is graded without the LLM
+    - Keyed by a hash of prompt version, normalized true answer, normalized user answer and give_feedback
+    - Bounded to max_entries; the least recently used verdicts are evicted in batches
+    - version (normally prompt_version of EA.md) is part of every key and verdicts from other versions
+      are dropped on open; bypass=True turns lookups and writes off without touching the file
+    """
+    def __init__(self, db_path: Path, version: str, max_entries: int = 50_000, bypass: bool = False):
+        self.db_path = Path(db_path)
+        self.version = version
+        self.max_entries = max_entries
+        self.bypass = bypass
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        if not bypass:
+            self._conn.execute("DELETE FROM verdicts WHERE version != ?", (version,))
+        self._count = self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_many(self, items: Iterable[EvaluationInput]) -> List[Optional[EvaluationOutput]]:
+        """Memoized verdict per item (None where there is none)"""
+        items = list(items)
+        if self.bypass or not items:
+            return [None] * len(items)
+        keys = [verdict_key(self.version, item) for item in items]
+        with self._lock:
+            placeholders = ",".join("?" * len(set(keys)))
+            rows = dict(self._conn.execute(
+                f"SELECT key, output FROM verdicts WHERE key IN ({placeholders})", list(set(keys))
+            ).fetchall())
+            if rows:
+                self._conn.executemany("UPDATE verdicts SET used_at = ? WHERE key = ?", [(time.time(), key) for key in rows])
+            found = [EvaluationOutput.model_validate_json(rows[key]) if key in rows else None for key in keys]
+            hits = sum(1 for verdict in found if verdict is not None)
+            self.hits += hits
+            self.misses += len(found) - hits
+            return found
+
+    def get(self, item: EvaluationInput) -> Optional[EvaluationOutput]:
+        return self.get_many([item])[0]
+
+    def put_many(self, pairs: Iterable[Tuple[EvaluationInput, EvaluationOutput]]) -> None:
+        if self.bypass:
+            return
+        now = time.time()
+        rows = [(verdict_key(self.version, item), self.version, output.model_dump_json(), now) for item, output in pairs]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                before = self._conn.total_changes
+                self._conn.executemany("INSERT OR IGNORE INTO verdicts (key, version, output, used_at) VALUES (?, ?, ?, ?)", rows)
+                self._count += self._conn.total_changes - before
+                if self._count > self.max_entries:
+                    # Other processes may share the file: evict from the real count, trimming to 90%
+                    # so eviction runs once per batch of inserts rather than on every one
+                    self._count = self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+                    excess = max(0, self._count - int(self.max_entries * 0.9))
+                    self._conn.execute(
+                        "DELETE FROM verdicts WHERE key IN (SELECT key FROM verdicts ORDER BY used_at LIMIT ?)", (excess,)
+                    )
+                    self._count -= excess
+                    self.evictions += excess
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def put(self, item: EvaluationInput, output: EvaluationOutput) -> None:
+        self.put_many([(item, output)])
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "memo_hits": self.hits,
+                "memo_misses": self.misses,
+                "memo_entries": self._count,
+                "memo_evictions": self.evictions,
+                "memo_hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "memo_bypass": self.bypass,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,30 +1,88 @@
 # src/backend/api_routes/chat_routes.py
-import os
-from fastapi import APIRouter, HTTPException
-from dotenv import load_dotenv
+import json
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from ..MMagents.chat_agent import ChatAgent
+from ..MMagents.call_policy import AgentTimeoutError
+from ..MMagents.key_pool import RateLimitedError
+from ..storage.base import LearningStore
+from .dependencies import agent_unavailable, get_chat_agent, get_learning_store
+from .utils import get_current_learning_context
 from pydantic import BaseModel
+from typing import Optional
 
-load_dotenv()
 router = APIRouter()
 
-# Request body schema 
+# Request body schema
 class ChatRequest(BaseModel):
     user_query: str
+    # Where the question was asked; scopes the Chat Agent's response cache
+    skill_id: Optional[str] = None
+    topic_id: Optional[str] = None
+    # Chat session (one per open chat panel); with it the tutor remembers earlier turns in this skill
+    session_id: Optional[str] = None
+
+def sse_event(data: dict, event: str = None) -> str:
+    """Format one Server-Sent Event (data is JSON so newlines in text stay intact)"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+def learner_context(store: LearningStore, skill_id: Optional[str]) -> Optional[dict]:
+    """The learner's current topic and subtopic for the Chat Agent's prompt (None when unknown)"""
+    if not skill_id:
+        return None
+    context = get_current_learning_context(store, skill_id)
+    return None if context.get("current_topic_id") == "Error" else context
 
 @router.post("/ask")
-def ask_question(request: ChatRequest):
+async def ask_question(request: ChatRequest, agent: ChatAgent = Depends(get_chat_agent), store: LearningStore = Depends(get_learning_store)):
     """Ask a question to the AI tutor."""
     try:
-        api_key = os.getenv("GEMINI_PRIMARY_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="Gemini API key not found.")
-        agent = ChatAgent(api_key=api_key)
-        response = agent.run(user_query=request.user_query)
+        context = await run_in_threadpool(learner_context, store, request.skill_id)
+        response = await agent.arun(request.user_query, request.skill_id, request.topic_id, request.session_id, context)
         return {
             "status": "success",
             "response": response,
             "user_query": request.user_query
         }
+    except (RateLimitedError, AgentTimeoutError) as e:
+        raise agent_unavailable(e)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/ask/stream")
+async def ask_question_stream(request: ChatRequest, http_request: Request, agent: ChatAgent = Depends(get_chat_agent), store: LearningStore = Depends(get_learning_store)):
+    """
+    Ask a question to the AI tutor and stream the answer as Server-Sent Events
+    - `data: {"text": ...}` for every chunk, then `event: done` (or `event: error`)
+    - If the client goes away the upstream generation is closed, so it stops using quota
+      (and the unfinished exchange is not remembered)
+    """
+    context = await run_in_threadpool(learner_context, store, request.skill_id)
+
+    async def event_stream():
+        chunks = agent.astream(request.user_query, request.skill_id, request.topic_id, request.session_id, context)
+        try:
+            async for text in chunks:
+                if await http_request.is_disconnected():
+                    break
+                yield sse_event({"text": text})
+            yield sse_event({"status": "success"}, event="done")
+        except RateLimitedError as e:
+            yield sse_event({"detail": str(e), "retry_after": e.retry_after}, event="error")
+        except Exception as e:
+            yield sse_event({"detail": str(e)}, event="error")
+        finally:
+            await chunks.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/cache-stats")
+async def chat_cache_stats(agent: ChatAgent = Depends(get_chat_agent)):
+    """Chat Agent response cache (exact / fuzzy hits, misses, evictions, size) and conversation memory."""
+    return {"status": "success", **agent.cache.stats(), "memory": agent.memory.stats()}
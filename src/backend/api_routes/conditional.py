@@ -0,0 +1,31 @@
+# src/backend/api_routes/conditional.py
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+
+# Browsers may keep the response but must revalidate it (a cheap 304 while the version is unchanged)
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(*parts) -> str:
+    """Strong ETag for the representation identified by parts (route, IDs, query, store version)"""
+    return '"' + hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in tags or "*" in tags
+
+def conditional_response(request: Request, response: Response, *parts) -> Optional[Response]:
+    """
+    Tag the response with an ETag built from parts and Cache-Control
+    Returns a 304 to send instead when the client's If-None-Match already has this version,
+    so the caller can skip loading and serializing the payload
+    """
+    etag = make_etag(*parts)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
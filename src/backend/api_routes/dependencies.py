@@ -0,0 +1,59 @@
+# src/backend/api_routes/dependencies.py
+import math
+from fastapi import Depends, HTTPException, Request
+from typing import TYPE_CHECKING, Union
+from ..MMagents.agent_registry import AgentRegistry
+from ..MMagents.chat_agent import ChatAgent
+from ..MMagents.quiz_agent import QuizAgent
+from ..MMagents.evaluator_agent import EvaluatorAgent
+from ..MMagents.planning_agent import PlanningAgent
+from ..MMagents.call_policy import AgentTimeoutError
+from ..MMagents.key_pool import RateLimitedError
+from ..storage.base import LearningStore
+
+if TYPE_CHECKING:
+    from .jobs import JobQueue
+    from .prefetch import QuizPrefetcher
+
+async def get_agent_registry(request: Request) -> AgentRegistry:
+    """Return the shared AgentRegistry created in the app lifespan"""
+    return request.app.state.agent_registry
+
+async def get_quiz_prefetcher(request: Request) -> "QuizPrefetcher":
+    """Return the background QuizPrefetcher created in the app lifespan"""
+    return request.app.state.quiz_prefetcher
+
+async def get_job_queue(request: Request) -> "JobQueue":
+    """Return the persistent JobQueue created in the app lifespan"""
+    return request.app.state.job_queue
+
+async def get_learning_store(request: Request) -> LearningStore:
+    """Return the LearningStore (SQLite or JSON files) created in the app lifespan"""
+    return request.app.state.learning_store
+
+def resolve_agent(registry: AgentRegistry, name: str):
+    """Fetch a shared agent, failing with the usual 500 when no API key is configured"""
+    if not registry.available:
+        raise HTTPException(status_code=500, detail="Gemini API key not found.")
+    return registry.get(name)
+
+def agent_unavailable(e: Union[RateLimitedError, AgentTimeoutError]) -> HTTPException:
+    """
+    Instead of the generic 500: 429 with Retry-After when every Gemini key is rate limited,
+    504 when the agent's call policy ran out of time
+    """
+    if isinstance(e, RateLimitedError):
+        return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+    return HTTPException(status_code=504, detail=str(e))
+
+async def get_chat_agent(registry: AgentRegistry = Depends(get_agent_registry)) -> ChatAgent:
+    return resolve_agent(registry, "chat")
+
+async def get_quiz_agent(registry: AgentRegistry = Depends(get_agent_registry)) -> QuizAgent:
+    return resolve_agent(registry, "quiz")
+
+async def get_evaluator_agent(registry: AgentRegistry = Depends(get_agent_registry)) -> EvaluatorAgent:
+    return resolve_agent(registry, "evaluator")
+
+async def get_planning_agent(registry: AgentRegistry = Depends(get_agent_registry)) -> PlanningAgent:
+    return resolve_agent(registry, "planning")
@@ -1,12 +1,16 @@
 # src/backend/api_routes/evaluator_routes.py
-import os
-from fastapi import APIRouter, HTTPException
-from dotenv import load_dotenv
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from ..MMagents.evaluator_agent import EvaluatorAgent
-from ..MMagents.schemas.EA_schemas import EvaluationInput, EvaluationOutput
-from pydantic import BaseModel
+from ..MMagents.call_policy import AgentTimeoutError
+from ..MMagents.key_pool import RateLimitedError
+from ..MMagents.schemas.EA_schemas import EvaluationInput, EvaluationOutput, EvaluationBatchInput, EvaluationBatchOutput
+from ..MMagents.local_grader import grader_stats
+from ..storage.base import LearningStore, new_event
+from .dependencies import agent_unavailable, get_evaluator_agent, get_learning_store
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
-load_dotenv()
 router = APIRouter()
 
 # Request body schema 
@@ -14,25 +18,103 @@ class EvaluateAnswerRequest(BaseModel):
     true_answer: str
     user_answer: str
     give_feedback: bool = False
+    # optional question text; lets MCQ answers be graded locally
+    question: Optional[str] = None
+    # optional quiz position; when skill_id is set the result goes to the skill's progress journal
+    skill_id: Optional[str] = None
+    topic_id: Optional[str] = None
+    subtopic_id: Optional[str] = None
+    question_number: Optional[int] = None
+
+class AnswerPair(BaseModel):
+    true_answer: str
+    user_answer: str
+    question: Optional[str] = None
+
+class EvaluateBatchRequest(BaseModel):
+    answers: List[AnswerPair] = Field(min_length=1)
+    # one aggregated quiz_agent_feedback for the whole quiz
+    give_feedback: bool = False
+    # optional quiz position; answers are journaled as question_number 1..n
+    skill_id: Optional[str] = None
+    topic_id: Optional[str] = None
+    subtopic_id: Optional[str] = None
+
+async def record_evaluations(store: LearningStore, skill_id: str, events: List[dict]) -> None:
+    """Journal graded answers; history must never fail the evaluation itself"""
+    try:
+        for event in events:
+            await run_in_threadpool(store.record_event, skill_id, event)
+    except Exception as e:
+        print(f"DEBUG: Could not record evaluations for {skill_id}: {e}")
+
+def evaluation_event(topic_id: Optional[str], subtopic_id: Optional[str], question_number: Optional[int], user_answer: str, output: EvaluationOutput) -> dict:
+    return new_event(
+        "evaluation",
+        topic_id=topic_id,
+        subtopic_id=subtopic_id,
+        question_number=question_number,
+        user_answer=user_answer,
+        is_correct=output.evaluation == "1"
+    )
 
 @router.post("/evaluate")
-def evaluate_answer(request: EvaluateAnswerRequest):
+async def evaluate_answer(request: EvaluateAnswerRequest, agent: EvaluatorAgent = Depends(get_evaluator_agent), store: LearningStore = Depends(get_learning_store)):
     """Evaluate user's answer against the correct answer."""
     try:
-        api_key = os.getenv("GEMINI_PRIMARY_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="Gemini API key not found.")
-        agent = EvaluatorAgent(api_key=api_key)
         eval_input = EvaluationInput(
             true_answer=request.true_answer,
             user_answer=request.user_answer,
-            give_feedback=request.give_feedback
+            give_feedback=request.give_feedback,
+            question=request.question
         )
-        eval_output: EvaluationOutput = agent.run(eval_input)
+        eval_output: EvaluationOutput = await agent.arun(eval_input)
+        if request.skill_id:
+            await record_evaluations(store, request.skill_id, [
+                evaluation_event(request.topic_id, request.subtopic_id, request.question_number, request.user_answer, eval_output)
+            ])
         return {
             "status": "success",
             "evaluation": eval_output.model_dump(),
             "is_correct": eval_output.evaluation == "1"
         }
+    except (RateLimitedError, AgentTimeoutError) as e:
+        raise agent_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/evaluate-batch")
+async def evaluate_answers_batch(request: EvaluateBatchRequest, agent: EvaluatorAgent = Depends(get_evaluator_agent), store: LearningStore = Depends(get_learning_store)):
+    """Evaluate all answers of a quiz in one LLM call."""
+    try:
+        batch_input = EvaluationBatchInput(
+            items=[
+                EvaluationInput(true_answer=pair.true_answer, user_answer=pair.user_answer, question=pair.question)
+                for pair in request.answers
+            ],
+            give_feedback=request.give_feedback
+        )
+        batch_output: EvaluationBatchOutput = await agent.arun_batch(batch_input)
+        correct_answers = sum(1 for e in batch_output.evaluations if e.evaluation == "1")
+        if request.skill_id:
+            await record_evaluations(store, request.skill_id, [
+                evaluation_event(request.topic_id, request.subtopic_id, number, pair.user_answer, output)
+                for number, (pair, output) in enumerate(zip(request.answers, batch_output.evaluations), start=1)
+            ])
+        return {
+            "status": "success",
+            "evaluations": [e.model_dump() for e in batch_output.evaluations],
+            "quiz_agent_feedback": batch_output.quiz_agent_feedback,
+            "correct_answers": correct_answers,
+            "total_questions": len(batch_output.evaluations)
+        }
+    except (RateLimitedError, AgentTimeoutError) as e:
+        raise agent_unavailable(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stats")
+def evaluation_stats(request: Request):
+    """Answers graded by the local fast path versus answers sent to the LLM, and verdict memo hits."""
+    memo = getattr(request.app.state, "verdict_memo", None)
+    return {"status": "success", **grader_stats.snapshot(), **(memo.stats() if memo is not None else {})}
@@ -0,0 +1,96 @@
+# src/backend/api_routes/job_routes.py
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
+from .chat_routes import sse_event
+from .dependencies import get_job_queue
+from .jobs import TERMINAL_STATUSES, JobQueue
+from .planning_routes import CreateSkillPlanRequest
+from .quiz_routes import GenerateQuizRequest
+
+router = APIRouter()
+
+# Request body schemas: the inline routes' bodies plus an optional priority (higher runs first)
+class PlanJobRequest(CreateSkillPlanRequest):
+    priority: Optional[int] = None
+
+class QuizJobRequest(GenerateQuizRequest):
+    priority: Optional[int] = None
+
+def require_agents(queue: JobQueue) -> None:
+    # Fail at submission, like the inline routes, rather than queueing work that cannot run
+    if not queue.registry.available:
+        raise HTTPException(status_code=500, detail="Gemini API key not found.")
+
+@router.post("/plan", status_code=202)
+async def submit_plan_job(request: PlanJobRequest, queue: JobQueue = Depends(get_job_queue)):
+    """Queue plan creation and return the job at once (an identical plan already queued or running is reused)"""
+    require_agents(queue)
+    try:
+        job, created = await run_in_threadpool(queue.submit_plan, request.skill_name.strip(), request.user_context.strip(), request.priority)
+        return {"status": "success", "job": job, "deduplicated": not created}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/quiz", status_code=202)
+async def submit_quiz_job(request: QuizJobRequest, queue: JobQueue = Depends(get_job_queue)):
+    """Queue quiz generation for a subtopic and return the job at once (one job per subtopic at a time)"""
+    require_agents(queue)
+    try:
+        job, created = await run_in_threadpool(queue.submit_quiz, GenerateQuizRequest(**request.model_dump(exclude={"priority"})), request.priority)
+        return {"status": "success", "job": job, "deduplicated": not created}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/")
+async def list_jobs(
+    skill_id: Optional[str] = None,
+    status: Optional[Literal["queued", "running", "succeeded", "failed", "cancelled"]] = None,
+    limit: int = 50,
+    queue: JobQueue = Depends(get_job_queue)
+):
+    """Most recent jobs first, optionally for one skill and/or status"""
+    return {"status": "success", "jobs": await run_in_threadpool(queue.list_jobs, skill_id, status, min(max(limit, 1), 500))}
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, queue: JobQueue = Depends(get_job_queue)):
+    """Job status, progress and (once succeeded) the same result the inline route returns"""
+    job = await run_in_threadpool(queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    return {"status": "success", "job": job}
+
+@router.get("/{job_id}/events")
+async def follow_job(job_id: str, http_request: Request, queue: JobQueue = Depends(get_job_queue)):
+    """
+    Follow a job as Server-Sent Events
+    - `event: status` with the job whenever it changes (status, progress), then `event: done` with the
+      finished job (succeeded, failed or cancelled)
+    - Safe to reconnect: the job keeps running without listeners and the stream starts with its current state
+    """
+    if await run_in_threadpool(queue.get, job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+
+    async def event_stream():
+        updates = queue.follow(job_id)
+        try:
+            async for job in updates:
+                if await http_request.is_disconnected():
+                    break
+                yield sse_event(job, event="done" if job["status"] in TERMINAL_STATUSES else "status")
+        finally:
+            await updates.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str, queue: JobQueue = Depends(get_job_queue)):
+    """Cancel a queued or running job (work already stored, e.g. a plan's first topics, is kept)"""
+    if await run_in_threadpool(queue.get, job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    return {"status": "success", "cancelled": await run_in_threadpool(queue.cancel, job_id)}
@@ -0,0 +1,451 @@
+# src/backend/api_routes/jobs.py
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from ..MMagents.agent_registry import AgentRegistry
+from ..MMagents.key_pool import RateLimitedError
+from ..storage.base import LearningStore
+from .planning_routes import plan_flight_key, stream_and_store_plan
+from .prefetch import QuizPrefetcher
+from .quiz_routes import GenerateQuizRequest, generate_and_store_quiz, quiz_flight_key, quiz_flights
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    seq INTEGER PRIMARY KEY,
+    job_id TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    dedupe_key TEXT NOT NULL,
+    skill_id TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    progress TEXT NOT NULL DEFAULT '{}',
+    checkpoint TEXT NOT NULL DEFAULT '{}',
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_after REAL NOT NULL DEFAULT 0,
+    lease_until REAL,
+    version INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active ON jobs (dedupe_key) WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, priority DESC, seq);
+CREATE INDEX IF NOT EXISTS idx_jobs_skill ON jobs (skill_id, seq);
+"""
+
+# Default priority per job kind (higher runs first): a learner is usually waiting on a quiz,
+# while a new plan already reports its topics as they are stored
+JOB_PRIORITIES = {"quiz": 10, "plan": 5}
+TERMINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+def quiz_job_key(request: GenerateQuizRequest) -> str:
+    # A retake is its own job: deduplicated onto a plain quiz job it would only get the old quiz back
+    key = f"quiz:{request.skill_id}:{request.topic_id}:{request.subtopic_id}"
+    return f"{key}:retake" if request.retake else key
+
+def plan_job_key(skill_name: str, user_context: str) -> str:
+    return "plan:" + json.dumps(plan_flight_key(skill_name, user_context))
+
+class JobQueue:
+    """
+    Persistent queue for long-running agent work (plan creation, quiz generation) in a small SQLite file
+    - submit() stores a job and returns at once; max_workers workers run jobs by priority (higher first),
+      then submission order, so request latency no longer depends on LLM latency
+    - De-duplicated: while a job with the same key (plan: skill name + context, quiz: skill/topic/subtopic and retake)
+      is queued or running, submitting it again returns that job (raising its priority if asked to)
+    - Running jobs hold a lease that is renewed while they run; a job whose lease ran out (the process was
+      restarted or crashed) is claimed again, up to max_attempts; jobs interrupted by a clean shutdown go
+      straight back to the queue, so queued and interrupted work resumes on the next start
+    - Plan jobs checkpoint their outline and skill_id, so a resumed plan pays neither for the outline nor
+      for the topics already stored; quizzes are stored by the Quiz Agent route helpers as usual
+    - Rate limited jobs return to the queue until the keys' retry_after has passed (not counted as attempts)
+    - Finished jobs are kept for keep_days, then purged on start
+    - The SQLite calls are blocking (BEGIN IMMEDIATE waits up to busy_timeout for other processes): the
+      workers run them with asyncio.to_thread, and the sync methods are safe to call from the threadpool
+    """
+    def __init__(
+        self,
+        db_path: Path,
+        registry: AgentRegistry,
+        store: LearningStore,
+        prefetcher: QuizPrefetcher,
+        max_workers: int = 4,
+        lease: float = 60.0,
+        max_attempts: int = 3,
+        poll_interval: float = 1.0,
+        keep_days: int = 7,
+    ):
+        self.db_path = Path(db_path)
+        self.registry = registry
+        self.store = store
+        self.prefetcher = prefetcher
+        self.max_workers = max_workers
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.keep_days = keep_days
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        self._handlers = {"plan": self._run_plan, "quiz": self._run_quiz}
+        # job_id -> task of the jobs this process is running; cancelled holds the ones cancel() stopped
+        self._running: Dict[str, asyncio.Task] = {}
+        self._cancelled: Set[str] = set()
+        self._workers: List[asyncio.Task] = []
+        self._changed: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self) -> None:
+        """Purge old finished jobs and start the workers and lease renewal (called from the FastAPI lifespan)"""
+        cutoff = (datetime.now() - timedelta(days=self.keep_days)).isoformat()
+        with self._lock:
+            placeholders = ",".join("?" * len(TERMINAL_STATUSES))
+            self._conn.execute(f"DELETE FROM jobs WHERE status IN ({placeholders}) AND updated_at < ?", (*TERMINAL_STATUSES, cutoff))
+        self._loop = asyncio.get_running_loop()
+        self._changed = asyncio.Event()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.max_workers)]
+        self._workers.append(asyncio.create_task(self._renew_leases()))
+
+    async def aclose(self) -> None:
+        """Stop the workers; jobs they were running are queued again for the next start"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        with self._lock:
+            self._conn.close()
+
+    # Submitting and reading jobs
+    def submit(self, kind: str, payload: dict, dedupe_key: str, skill_id: Optional[str] = None, priority: Optional[int] = None) -> Tuple[dict, bool]:
+        """Queue a job, or return the queued/running job with the same key; returns (job, created)"""
+        priority = JOB_PRIORITIES[kind] if priority is None else priority
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing = self._conn.execute(
+                    "SELECT * FROM jobs WHERE dedupe_key = ? AND status IN ('queued', 'running')", (dedupe_key,)
+                ).fetchone()
+                if existing is not None:
+                    if priority > existing["priority"]:
+                        self._conn.execute(
+                            "UPDATE jobs SET priority = ?, version = version + 1, updated_at = ? WHERE job_id = ?",
+                            (priority, now, existing["job_id"])
+                        )
+                    job_id, created = existing["job_id"], False
+                else:
+                    job_id, created = uuid.uuid4().hex, True
+                    self._conn.execute(
+                        """
+                        INSERT INTO jobs (job_id, kind, dedupe_key, skill_id, priority, status, payload, created_at, updated_at)
+                        VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?)
+                        """,
+                        (job_id, kind, dedupe_key, skill_id, priority, json.dumps(payload), now, now)
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._notify()
+        return self.get(job_id), created
+
+    def submit_plan(self, skill_name: str, user_context: str, priority: Optional[int] = None) -> Tuple[dict, bool]:
+        payload = {"skill_name": skill_name, "user_context": user_context}
+        return self.submit("plan", payload, plan_job_key(skill_name, user_context), priority=priority)
+
+    def submit_quiz(self, request: GenerateQuizRequest, priority: Optional[int] = None) -> Tuple[dict, bool]:
+        return self.submit("quiz", request.model_dump(), quiz_job_key(request), skill_id=request.skill_id, priority=priority)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._job_dict(row) if row else None
+
+    def list_jobs(self, skill_id: Optional[str] = None, status: Optional[str] = None, limit: int = 50) -> List[dict]:
+        """Most recent jobs first, optionally for one skill and/or status"""
+        clauses, params = [], []
+        if skill_id is not None:
+            clauses.append("skill_id = ?")
+            params.append(skill_id)
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT * FROM jobs {where} ORDER BY seq DESC LIMIT ?", (*params, limit)).fetchall()
+        return [self._job_dict(row) for row in rows]
+
+    async def follow(self, job_id: str) -> AsyncIterator[dict]:
+        """The job each time it changes, until it is finished (jobs run by other processes are polled)"""
+        version = None
+        while True:
+            changed = self._changed
+            job = await asyncio.to_thread(self.get, job_id)
+            if job is None:
+                return
+            if job["version"] != version:
+                version = job["version"]
+                yield job
+            if job["status"] in TERMINAL_STATUSES:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; False if it does not exist or has already finished"""
+        now = datetime.now().isoformat()
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                UPDATE jobs SET status = 'cancelled', lease_until = NULL, version = version + 1, updated_at = ?
+                WHERE job_id = ? AND status IN ('queued', 'running')
+                """,
+                (now, job_id)
+            )
+        if not cursor.rowcount:
+            return False
+        self._on_loop(self._stop, job_id)
+        self._notify()
+        return True
+
+    def _stop(self, job_id: str) -> None:
+        task = self._running.get(job_id)
+        if task is not None:
+            self._cancelled.add(job_id)
+            task.cancel()
+
+    @staticmethod
+    def _job_dict(row: sqlite3.Row) -> dict:
+        return {
+            "job_id": row["job_id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "priority": row["priority"],
+            "skill_id": row["skill_id"],
+            "attempts": row["attempts"],
+            "payload": json.loads(row["payload"]),
+            "progress": json.loads(row["progress"]),
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "version": row["version"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+
+    def _on_loop(self, callback, *args) -> None:
+        """Run callback now on the event loop, or hand it over from a worker thread"""
+        if self._loop is None:
+            return
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            callback(*args)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    def _notify(self) -> None:
+        """Wake idle workers and followers (a fresh event per change, so every waiter sees it once)"""
+        self._on_loop(self._wake)
+
+    def _wake(self) -> None:
+        if self._changed is not None:
+            changed, self._changed = self._changed, asyncio.Event()
+            changed.set()
+
+    def _update(self, job_id: str, status: Optional[str] = None, **fields) -> bool:
+        """Write fields of a job this process runs; False once the job is no longer running (e.g. cancelled)"""
+        columns = {name: json.dumps(value) if name in ("progress", "checkpoint", "result") else value for name, value in fields.items()}
+        if status is not None:
+            columns["status"] = status
+        assignments = "".join(f"{name} = ?, " for name in columns)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET {assignments}version = version + 1, updated_at = ? WHERE job_id = ? AND status = 'running'",
+                (*columns.values(), datetime.now().isoformat(), job_id)
+            )
+        self._notify()
+        return bool(cursor.rowcount)
+
+    # Running jobs
+    def _claim(self) -> Optional[dict]:
+        """Take the next job: the highest-priority queued one that is due, or one whose lease ran out"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self._conn.execute(
+                        """
+                        SELECT * FROM jobs
+                        WHERE (status = 'queued' AND run_after <= ?) OR (status = 'running' AND lease_until < ?)
+                        ORDER BY priority DESC, seq LIMIT 1
+                        """,
+                        (now, now)
+                    ).fetchone()
+                    if row is None or row["attempts"] < self.max_attempts:
+                        break
+                    # Interrupted every time it ran (e.g. it keeps crashing the process): give up on it
+                    self._conn.execute(
+                        """
+                        UPDATE jobs SET status = 'failed', error = ?, lease_until = NULL, version = version + 1, updated_at = ?
+                        WHERE job_id = ?
+                        """,
+                        (f"Interrupted after {row['attempts']} attempts", datetime.now().isoformat(), row["job_id"])
+                    )
+                if row is not None:
+                    self._conn.execute(
+                        """
+                        UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_until = ?,
+                            version = version + 1, updated_at = ?
+                        WHERE job_id = ?
+                        """,
+                        (now + self.lease, datetime.now().isoformat(), row["job_id"])
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(row["job_id"]) if row is not None else None
+
+    async def _work(self) -> None:
+        while True:
+            changed = self._changed
+            try:
+                job = await asyncio.to_thread(self._claim)
+            except sqlite3.Error as e:
+                print(f"DEBUG: Job queue claim failed: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(changed.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self._notify()
+            await self._run(job)
+
+    async def _run(self, job: dict) -> None:
+        job_id = job["job_id"]
+        task = asyncio.create_task(self._handlers[job["kind"]](job))
+        self._running[job_id] = task
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if job_id in self._cancelled:
+                self._cancelled.discard(job_id)
+                return
+            # Shutdown: back to the queue without using up an attempt
+            await asyncio.to_thread(self._requeue, job_id)
+            raise
+        except RateLimitedError as e:
+            await asyncio.to_thread(self._requeue, job_id, time.time() + e.retry_after, str(e))
+            self._notify()
+        except Exception as e:
+            print(f"DEBUG: Job {job_id} ({job['kind']}) failed: {e}")
+            await asyncio.to_thread(self._update, job_id, status="failed", error=str(e), lease_until=None)
+        else:
+            await asyncio.to_thread(self._update, job_id, status="succeeded", result=result, error=None, lease_until=None)
+        finally:
+            self._running.pop(job_id, None)
+
+    def _requeue(self, job_id: str, run_after: Optional[float] = None, error: Optional[str] = None) -> None:
+        """Put a running job back in the queue without using up an attempt (not before run_after, if given)"""
+        with self._lock:
+            self._conn.execute(
+                """
+                UPDATE jobs SET status = 'queued', attempts = MAX(attempts - 1, 0), run_after = COALESCE(?, run_after),
+                    lease_until = NULL, error = COALESCE(?, error), version = version + 1, updated_at = ?
+                WHERE job_id = ? AND status = 'running'
+                """,
+                (run_after, error, datetime.now().isoformat(), job_id)
+            )
+
+    async def _renew_leases(self) -> None:
+        """Extend the leases of this process's running jobs; stop the ones cancelled by another process"""
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            for job_id in await asyncio.to_thread(self._renew, list(self._running)):
+                self._stop(job_id)
+
+    def _renew(self, job_ids: List[str]) -> List[str]:
+        """Extend the leases of job_ids; returns the ones no longer running"""
+        lost = []
+        for job_id in job_ids:
+            with self._lock:
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET lease_until = ? WHERE job_id = ? AND status = 'running'",
+                    (time.time() + self.lease, job_id)
+                )
+            if not cursor.rowcount:
+                lost.append(job_id)
+        return lost
+
+    def _agent(self, name: str):
+        if not self.registry.available:
+            raise RuntimeError("Gemini API key not found.")
+        return self.registry.get(name)
+
+    async def _run_quiz(self, job: dict) -> dict:
+        request = GenerateQuizRequest(**job["payload"])
+        agent = self._agent("quiz")
+        # Joins an inline /quiz/generate-quiz or prefetch generating the same subtopic (a retake only joins a retake)
+        quiz_data = await quiz_flights.do(quiz_flight_key(request), lambda: generate_and_store_quiz(agent, self.store, request))
+        # Same shape as the /quiz/generate-quiz response
+        return {
+            "status": "success",
+            "quiz_data": quiz_data,
+            "skill_id": request.skill_id,
+            "topic_id": request.topic_id
+        }
+
+    async def _run_plan(self, job: dict) -> dict:
+        job_id, payload = job["job_id"], job["payload"]
+        agent = self._agent("planning")
+        progress = dict(job["progress"])
+        # Progress and checkpoint writes run in worker threads, one at a time in the order they were made;
+        # progress writes are fire-and-forget, checkpoints are awaited so a resume never recreates the skill
+        writes: List[asyncio.Task] = []
+        write_lock = asyncio.Lock()
+
+        async def write(**fields) -> None:
+            async with write_lock:
+                await asyncio.to_thread(self._update, job_id, **fields)
+
+        def emit(event: str, data: dict) -> None:
+            if event == "outline":
+                progress.update({"topic_count": data["topic_count"], "topics": data["topics"]})
+            elif event == "topic":
+                progress.update({"skill_id": data["skill_id"], "topics_ready": data["order"]})
+            writes.append(asyncio.ensure_future(write(progress=dict(progress))))
+
+        async def checkpoint(state: dict) -> None:
+            await write(checkpoint=state, skill_id=state.get("skill_id"))
+
+        try:
+            return await stream_and_store_plan(
+                agent, self.store, self.prefetcher, payload["skill_name"], payload["user_context"], emit,
+                checkpoint=checkpoint, resume=await asyncio.to_thread(self._checkpoint, job_id)
+            )
+        finally:
+            # The job's final update must not be overtaken by a progress write still in flight
+            await asyncio.gather(*writes, return_exceptions=True)
+
+    def _checkpoint(self, job_id: str) -> dict:
+        with self._lock:
+            row = self._conn.execute("SELECT checkpoint FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row["checkpoint"]) if row else {}
@@ -1,16 +1,22 @@
 # src/backend/api_routes/planning_routes.py
-import os
-import json
-from fastapi import APIRouter, HTTPException
-from dotenv import load_dotenv
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from ..MMagents.planning_agent import PlanningAgent
-from ..MMagents.schemas.PA_schemas import PlanOutput
+from ..MMagents.call_policy import AgentTimeoutError
+from ..MMagents.key_pool import RateLimitedError
+from ..MMagents.schemas.PA_schemas import PlanOutline, PlanOutput
 from pydantic import BaseModel
-from datetime import datetime
-from typing import List
-from .utils import init_learning_folders, get_all_skills_with_mastery, get_current_learning_context
+from typing import Awaitable, Callable, List, Literal, Optional, Set
+from ..storage.base import LearningStore, topic_id_for
+from .chat_routes import sse_event
+from .conditional import conditional_response
+from .dependencies import agent_unavailable, get_learning_store, get_planning_agent, get_quiz_prefetcher
+from .prefetch import QuizPrefetcher
+from .singleflight import SingleFlight
+from .utils import get_current_learning_context
 
-load_dotenv()
 router = APIRouter()
 
 # Request body schema for creating a skill plan
@@ -19,116 +25,212 @@ class CreateSkillPlanRequest(BaseModel):
     # e.g., difficulty, current mastery, learning style
     user_context: str  
 
-# Response model for skills
+# Response model for skills (one entry of the skill summary index)
 class SkillInfo(BaseModel):
     skill_id: str
     name: str
     mastery: float
+    topic_count: int = 0
+    current_topic_id: Optional[str] = None
+    current_topic: Optional[str] = None
+    last_activity: Optional[str] = None
 
-# Initialize learning folders and get paths
-paths = init_learning_folders(3)
-MM_LEARNING_ROOT = paths["MM_LEARNING_ROOT"]
-LEARNING_SKILLS_PATH = paths["LEARNING_SKILLS_PATH"]
-GLOBAL_STATS_PATH = paths["GLOBAL_STATS_PATH"]
-SKILLS_METADATA_PATH = paths["SKILLS_METADATA_PATH"]
+# Concurrent requests for the same skill and context share one plan generation
+plan_flights = SingleFlight()
+
+def plan_flight_key(skill_name: str, user_context: str) -> tuple:
+    """Normalize case and whitespace so trivially different requests still coalesce"""
+    return (" ".join(skill_name.casefold().split()), " ".join(user_context.casefold().split()))
+
+async def generate_and_store_plan(agent: PlanningAgent, store: LearningStore, skill_name: str, user_context: str) -> dict:
+    """Generate a plan and store it as a new skill, returning the create-skill-plan response"""
+    plan_output: PlanOutput = await agent.arun(skill=skill_name, context=user_context)
+    # Store assigns the skill ID plus topic/subtopic IDs and mastery fields
+    skill_id = await run_in_threadpool(store.create_skill, skill_name, user_context, plan_output.model_dump())
+    return {
+        "status": "success", 
+        "skill_id": skill_id, 
+        "topic_count": len(plan_output.topics),
+        "is_active": True
+    }
 
 @router.post("/create-skill-plan")
-def create_skill_plan(request: CreateSkillPlanRequest):
-    """Create a new skill plan folder with plan_config.json and progress.json"""
+async def create_skill_plan(request: CreateSkillPlanRequest, agent: PlanningAgent = Depends(get_planning_agent), store: LearningStore = Depends(get_learning_store)):
+    """Create a new skill with its plan in the learning store"""
     try:
         skill_name = request.skill_name.strip()
         user_context = request.user_context.strip()
-        api_key = os.getenv("GEMINI_PRIMARY_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="Gemini API key not found.")
-        agent = PlanningAgent(api_key=api_key)
-        plan_output: PlanOutput = agent.run(skill=skill_name, context=user_context)
-        if SKILLS_METADATA_PATH.exists():
-            metadata = json.loads(SKILLS_METADATA_PATH.read_text(encoding="utf-8"))
+        return await plan_flights.do(
+            plan_flight_key(skill_name, user_context),
+            lambda: generate_and_store_plan(agent, store, skill_name, user_context)
+        )
+    except (RateLimitedError, AgentTimeoutError) as e:
+        raise agent_unavailable(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Streamed plans keep generating after the client disconnects; held here so the tasks are not collected
+plan_builds: Set[asyncio.Task] = set()
+
+async def stream_and_store_plan(
+    agent: PlanningAgent,
+    store: LearningStore,
+    prefetcher: QuizPrefetcher,
+    skill_name: str,
+    user_context: str,
+    emit: Callable[[str, dict], None],
+    checkpoint: Optional[Callable[[dict], Awaitable[None]]] = None,
+    resume: Optional[dict] = None
+) -> dict:
+    """
+    Generate a plan topic by topic, storing each one as soon as it and every topic before it are ready,
+    and return the create-skill-plan response
+    - The skill is created with the first topic (and its first quiz prefetched) and the outline's topic count
+      as planned_topics, so it can be studied while the rest of the plan is still being expanded
+    - Later topics are appended to the stored plan in outline order; store calls run in the threadpool
+    - emit(event, data) reports the outline and each stored topic; errors propagate to the caller
+    - checkpoint(state) is awaited with {outline, skill_id} whenever either is settled, before generation goes on
+      (a crash right after create_skill must not lose the skill_id); passing that state back as resume skips
+      the outline call and the topics already stored
+    """
+    state = dict(resume or {})
+    if state.get("outline"):
+        outline = PlanOutline.model_validate(state["outline"])
+    else:
+        outline = await agent.aoutline(skill_name, user_context)
+        state["outline"] = outline.model_dump()
+        if checkpoint:
+            await checkpoint(dict(state))
+    emit("outline", {"skill": outline.skill, "topic_count": len(outline.topics), "topics": [t.name for t in outline.topics]})
+    skill_id = state.get("skill_id")
+    start = (await run_in_threadpool(store.get_skill, skill_id))["topic_count"] if skill_id else 0
+    async for topic in agent.aexpand(skill_name, user_context, outline, start=start):
+        if skill_id is None:
+            skill_id = await run_in_threadpool(
+                store.create_skill, skill_name, user_context, {"skill": outline.skill, "topics": [topic.model_dump()]}, len(outline.topics)
+            )
+            state["skill_id"] = skill_id
+            if checkpoint:
+                await checkpoint(dict(state))
+            topic_ids = [topic_id_for(1)]
+            await run_in_threadpool(prefetcher.schedule_upcoming, skill_id)
         else:
-            metadata = {"total_skills": 0, "skills": []}
-        # Create new skill folder 
-        new_skill_number = metadata["total_skills"] + 1
-        skill_id = f"skill_{new_skill_number:03d}"
-        skill_folder = LEARNING_SKILLS_PATH / skill_id
-        skill_folder.mkdir(exist_ok=True)
-        print(f"Created skill folder: {skill_folder}")
-        # Save plan_config.json with mastery fields and topic IDs 
-        plan_dict = plan_output.model_dump()
-        for index, topic in enumerate(plan_dict["topics"]):
-            topic_id = f"topic_{index + 1:03d}"  # e.g., topic_001
-            topic.update({
+            topic_ids = await run_in_threadpool(store.append_topics, skill_id, [topic.model_dump()])
+        for topic_id in topic_ids:
+            stored = await run_in_threadpool(store.get_topic, skill_id, topic_id)
+            emit("topic", {
+                "skill_id": skill_id,
                 "topic_id": topic_id,
-                "order": index + 1,
-                "mastery": 0,
-                "completed": False
+                "name": stored["name"],
+                "subtopic_ids": [st["subtopic_id"] for st in stored.get("subtopics", [])],
+                "order": stored["order"],
+                "topic_count": len(outline.topics)
             })
-            # Add IDs to subtopics if they exist
-            if "subtopics" in topic:
-                for sub_index, subtopic in enumerate(topic["subtopics"]):
-                    subtopic_id = f"{topic_id}_sub_{sub_index + 1:02d}"  # e.g., topic_001_sub_01
-                    subtopic.update({
-                        "subtopic_id": subtopic_id,
-                        "order": sub_index + 1,
-                        "completed": False,
-                        "mastery": 0
-                    })
-        # Add metadata about topics structure
-        plan_dict.update({
-            "total_topics": len(plan_dict["topics"]),
-            "current_topic_id": plan_dict["topics"][0]["topic_id"] if plan_dict["topics"] else None,
-            "current_subtopic_id": plan_dict["topics"][0]["subtopics"][0]["subtopic_id"] if plan_dict["topics"] and plan_dict["topics"][0].get("subtopics") else None
-        })
-        plan_config_path = skill_folder / "plan_config.json"
-        plan_config_path.write_text(json.dumps(plan_dict, indent=2), encoding="utf-8")
-        # Initialize progress.json 
-        progress_path = skill_folder / "progress.json"
-        progress_path.write_text(json.dumps({"progress": []}, indent=2), encoding="utf-8")
-        # Update skills_metadata.json 
-        metadata["total_skills"] = new_skill_number
-        metadata["skills"].append({
-            "id": skill_id,
-            "name": skill_name,
-            "created_at": datetime.now().isoformat(),
-            "topic_count": len(plan_output.topics),
-            "status": "active",
-            "user_context": user_context
-        })
-        SKILLS_METADATA_PATH.write_text(json.dumps(metadata, indent=2), encoding="utf-8")
-        return {
-            "status": "success", 
-            "skill_id": skill_id, 
-            "topic_count": len(plan_output.topics),
-            "is_active": True
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "status": "success",
+        "skill_id": skill_id,
+        "topic_count": len(outline.topics),
+        "is_active": True
+    }
+
+@router.post("/create-skill-plan/stream")
+async def create_skill_plan_stream(
+    request: CreateSkillPlanRequest,
+    http_request: Request,
+    agent: PlanningAgent = Depends(get_planning_agent),
+    store: LearningStore = Depends(get_learning_store),
+    prefetcher: QuizPrefetcher = Depends(get_quiz_prefetcher)
+):
+    """
+    Create a new skill and stream its plan as Server-Sent Events while it is generated
+    - `event: outline` with the topic names, then `event: topic` (skill_id, topic_id, subtopic_ids) as each
+      topic is stored, so the skill can be opened from the first one; finally `event: done` (or `event: error`,
+      carrying the skill_id if the skill was already created)
+    - Generation runs in its own task: a client that disconnects early still gets the whole plan stored
+    """
+    skill_name = request.skill_name.strip()
+    user_context = request.user_context.strip()
+    events: asyncio.Queue = asyncio.Queue()
+    emit = lambda event, data: events.put_nowait((event, data))
+
+    async def build():
+        state = {}
+
+        async def checkpoint(settled: dict) -> None:
+            state.update(settled)
+
+        try:
+            emit("done", await stream_and_store_plan(agent, store, prefetcher, skill_name, user_context, emit, checkpoint=checkpoint))
+        except RateLimitedError as e:
+            emit("error", {"detail": str(e), "retry_after": e.retry_after, "skill_id": state.get("skill_id")})
+        except Exception as e:
+            emit("error", {"detail": str(e), "skill_id": state.get("skill_id")})
+        finally:
+            events.put_nowait(None)
+
+    task = asyncio.create_task(build())
+    plan_builds.add(task)
+    task.add_done_callback(plan_builds.discard)
+
+    async def event_stream():
+        while True:
+            item = await events.get()
+            if item is None or await http_request.is_disconnected():
+                break
+            yield sse_event(item[1], event=item[0])
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/all-skills", response_model=List[SkillInfo])
-def get_skills():
-    """Get all available skills"""
+def get_skills(
+    request: Request,
+    response: Response,
+    sort: Literal["created", "mastery", "recent"] = "created",
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    store: LearningStore = Depends(get_learning_store)
+):
+    """
+    Get all available skills from the skill summary index (no plan files are read)
+    - sort: created (default), mastery (highest first) or recent (latest activity first)
+    - limit/offset paginate; X-Total-Count carries the total number of skills
+    - ETag follows the store's skills version, so unchanged lists come back as 304
+    """
     try:
-        skills = get_all_skills_with_mastery(SKILLS_METADATA_PATH)
+        not_modified = conditional_response(request, response, "all-skills", sort, limit, offset, store.get_skills_version())
+        if not_modified:
+            return not_modified
+        skills, total = store.list_skill_summaries(sort, limit, offset)
+        response.headers["X-Total-Count"] = str(total)
         return [SkillInfo(**skill) for skill in skills]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/skill-details/{skill_id}")
-def get_skill_info(skill_id: str):
-    """Get skill name and current topic"""
-    details = get_current_learning_context(LEARNING_SKILLS_PATH, SKILLS_METADATA_PATH, skill_id)
+def get_skill_info(skill_id: str, request: Request, response: Response, store: LearningStore = Depends(get_learning_store)):
+    """Get skill name and current topic (304 if If-None-Match has the skill's current version)"""
+    version = store.get_skill_version(skill_id)
+    if version is not None:
+        not_modified = conditional_response(request, response, "skill-details", skill_id, version)
+        if not_modified:
+            return not_modified
+    details = get_current_learning_context(store, skill_id)
     return details
 
 @router.get("/get-topic-data/{skill_id}/{topic_id}")
-def get_topic_data(skill_id: str, topic_id: str):
-    """Get topic data including subtopics from plan_config.json"""
+def get_topic_data(skill_id: str, topic_id: str, request: Request, response: Response, store: LearningStore = Depends(get_learning_store)):
+    """Get topic data including subtopics (304 if If-None-Match has the skill's current version)"""
     try:
-        skill_folder = LEARNING_SKILLS_PATH / skill_id
-        plan_config_path = skill_folder / "plan_config.json"
-        if not plan_config_path.exists():
-            raise HTTPException(status_code=404, detail="Plan config not found for this skill.")
-        plan_config = json.loads(plan_config_path.read_text(encoding="utf-8"))
-        topic = next((t for t in plan_config["topics"] if t["topic_id"] == topic_id), None)
+        version = store.get_skill_version(skill_id)
+        if version is not None:
+            not_modified = conditional_response(request, response, "topic-data", skill_id, topic_id, version)
+            if not_modified:
+                return not_modified
+        topic = store.get_topic(skill_id, topic_id)
         if not topic:
             raise HTTPException(status_code=404, detail=f"Topic {topic_id} not found.")
         return {
@@ -136,5 +238,7 @@ def get_topic_data(skill_id: str, topic_id: str):
             "topic": topic,
             "subtopics": topic.get("subtopics", [])
         }
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
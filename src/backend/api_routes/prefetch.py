@@ -0,0 +1,104 @@
+# src/backend/api_routes/prefetch.py
+import asyncio
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, List, Optional, Tuple
+from ..MMagents.agent_registry import AgentRegistry
+from ..storage.base import LearningStore
+from .quiz_routes import GenerateQuizRequest, generate_and_store_quiz, quiz_flight_key, quiz_flights, quiz_request_for
+
+def upcoming_quiz_requests(store: LearningStore, skill_id: str, include_next_topic: bool = False) -> List[GenerateQuizRequest]:
+    """Build generate-quiz requests (as the frontend would send them) for the upcoming subtopics"""
+    current_topic_id, current_subtopic_id = store.get_progress_pointer(skill_id)
+    index = store.get_plan_index(skill_id)
+    ref = index.subtopics.get(current_subtopic_id) if index and current_subtopic_id else None
+    if ref is None or ref.topic_id != current_topic_id:
+        return []
+    topic = store.get_topic(skill_id, current_topic_id)
+    targets = [(topic, topic["subtopics"][ref.index])]
+    if include_next_topic and ref.is_last_in_topic and ref.next_subtopic_id:
+        next_topic = store.get_topic(skill_id, ref.next_topic_id)
+        targets.append((next_topic, next_topic["subtopics"][0]))
+    skill = store.get_skill(skill_id)
+    user_context = skill.get("user_context", "") if skill else ""
+    return [quiz_request_for(skill_id, t, st, user_context) for t, st in targets]
+
+class QuizPrefetcher:
+    """
+    Background generation of the quiz a learner will need next
+    - Runs on a small bounded worker pool (max_workers concurrent generations)
+    - Shares quiz_flights with /quiz/generate-quiz, so a request arriving mid-prefetch joins it
+    - De-duplicated per subtopic and capped per skill (max_per_skill pending or running)
+    - Cancellable per skill; work nobody else is waiting on stops when cancelled
+    """
+    def __init__(self, registry: AgentRegistry, store: LearningStore, max_workers: int = 2, max_per_skill: int = 2, include_next_topic: bool = False):
+        self.registry = registry
+        self.store = store
+        self.max_per_skill = max_per_skill
+        # Also warm the first subtopic of the next topic when the learner reaches a topic's last subtopic
+        self.include_next_topic = include_next_topic
+        self._workers = asyncio.Semaphore(max_workers)
+        self._tasks: Dict[Tuple[str, str, str], asyncio.Task] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self) -> None:
+        """Bind to the running event loop (called from the FastAPI lifespan)"""
+        self._loop = asyncio.get_running_loop()
+
+    def schedule(self, skill_id: str, requests: List[GenerateQuizRequest]) -> None:
+        """
+        Queue prefetches for a skill, replacing any of its older ones no longer wanted
+        Safe to call from sync route handlers running in the threadpool
+        """
+        if self._loop is None or not self.registry.available:
+            return
+        self._loop.call_soon_threadsafe(self._schedule, skill_id, requests)
+
+    def schedule_upcoming(self, skill_id: str) -> None:
+        """Prefetch the quiz for the plan's current subtopic (and optionally the next topic's first)"""
+        self.schedule(skill_id, upcoming_quiz_requests(self.store, skill_id, self.include_next_topic))
+
+    def cancel(self, skill_id: Optional[str] = None, keep: tuple = ()) -> int:
+        """Cancel pending/running prefetches for one skill (or all), except keys in keep"""
+        cancelled = 0
+        for key, task in list(self._tasks.items()):
+            if (skill_id is None or key[0] == skill_id) and key not in keep:
+                task.cancel()
+                cancelled += 1
+        return cancelled
+
+    async def aclose(self) -> None:
+        """Cancel everything and wait for workers to stop (called on shutdown)"""
+        tasks = list(self._tasks.values())
+        self.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _schedule(self, skill_id: str, requests: List[GenerateQuizRequest]) -> None:
+        wanted = tuple((r.skill_id, r.topic_id, r.subtopic_id) for r in requests)
+        # The learner moved on, so older prefetches for this skill are stale
+        self.cancel(skill_id, keep=wanted)
+        for key, request in zip(wanted, requests):
+            if key in self._tasks or quiz_flights.in_flight(quiz_flight_key(request)):
+                continue
+            if sum(1 for k in self._tasks if k[0] == skill_id) >= self.max_per_skill:
+                break
+            task = self._loop.create_task(self._prefetch(key, request))
+            self._tasks[key] = task
+            task.add_done_callback(lambda done, key=key: self._tasks.pop(key, None))
+
+    async def _prefetch(self, key: Tuple[str, str, str], request: GenerateQuizRequest) -> None:
+        # Already saved: nothing to warm (checked in the threadpool, off the event loop)
+        if await run_in_threadpool(self.store.get_quiz, *key):
+            return
+        async with self._workers:
+            agent = self.registry.get("quiz")
+            try:
+                await quiz_flights.do(
+                    quiz_flight_key(request),
+                    lambda: generate_and_store_quiz(agent, self.store, request),
+                    cancel_when_abandoned=True
+                )
+                print(f"Prefetched quiz for {key}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"DEBUG: Quiz prefetch failed for {key}: {e}")
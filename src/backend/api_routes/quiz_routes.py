@@ -1,16 +1,20 @@
 # src/backend/api_routes/quiz_routes.py
-import os
-import json
-from fastapi import APIRouter, HTTPException
-from dotenv import load_dotenv
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from ..MMagents.quiz_agent import QuizAgent
+from ..MMagents.call_policy import AgentTimeoutError
+from ..MMagents.key_pool import RateLimitedError
 from ..MMagents.schemas.QA_schemas import QuizInput, QuizOutput
 from pydantic import BaseModel
-from typing import Optional
-from pathlib import Path
-from .utils import init_learning_folders, get_existing_quiz
+from typing import TYPE_CHECKING, Optional
+from ..MMagents.agent_registry import AgentRegistry
+from ..storage.base import LearningStore
+from .dependencies import agent_unavailable, get_agent_registry, get_learning_store, get_quiz_prefetcher, resolve_agent
+from .singleflight import SingleFlight
+
+if TYPE_CHECKING:
+    from .prefetch import QuizPrefetcher
 
-load_dotenv()
 router = APIRouter()
 
 # Request body schema 
@@ -24,6 +28,10 @@ class GenerateQuizRequest(BaseModel):
     user_context: str = ""
     current_mastery: float = 0.0
     evaluator_feedback: str | None = None
+    # Topic difficulty the question bank is indexed by (looked up from the plan when omitted)
+    difficulty: Optional[str] = None
+    # Replace the stored quiz with questions this skill has not had yet
+    retake: bool = False
 
 class GetQuizRequest(BaseModel):
     skill_id: str
@@ -31,119 +39,154 @@ class GetQuizRequest(BaseModel):
     subtopic_id: str
     question_number: int = 1
 
-# Helper Functions 
-def load_json(path: Path) -> dict:
-    if not path.exists():
-        return {}
-    try:
-        return json.loads(path.read_text(encoding="utf-8"))
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=500, detail=f"Invalid JSON format in {path.name}")
-def save_json(path: Path, data: dict):
-    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+# Concurrent generate-quiz calls for the same subtopic share one generation
+quiz_flights = SingleFlight()
+
+def quiz_flight_key(request: GenerateQuizRequest) -> tuple:
+    """A retake never joins a flight that would hand back the quiz it is replacing (and vice versa)"""
+    return (request.skill_id, request.topic_id, request.subtopic_id, request.retake)
 
-# Initialize learning folders and get paths
-paths = init_learning_folders(3)
-MM_LEARNING_ROOT = paths["MM_LEARNING_ROOT"]
-LEARNING_SKILLS_PATH = paths["LEARNING_SKILLS_PATH"]
+def quiz_request_for(skill_id: str, topic: dict, subtopic: dict, user_context: str = "") -> GenerateQuizRequest:
+    """The generate-quiz request the frontend would send for a stored topic and subtopic"""
+    return GenerateQuizRequest(
+        skill_id=skill_id,
+        topic_id=topic["topic_id"],
+        subtopic_id=subtopic["subtopic_id"],
+        subtopic_name=subtopic.get("name", ""),
+        subtopic_description=subtopic.get("description") or "",
+        focus_areas=topic.get("focus_areas", []),
+        user_context=user_context,
+        current_mastery=0,
+        difficulty=topic.get("difficulty")
+    )
+
+async def generate_and_store_quiz(agent: QuizAgent, store: LearningStore, request: GenerateQuizRequest) -> dict:
+    """Assemble a quiz for one subtopic (banked questions plus the generated shortfall) and save it in the learning store"""
+    # A flight that finished just before this one started may already have saved it
+    existing_quiz = await run_in_threadpool(
+        store.get_quiz,
+        request.skill_id,
+        request.topic_id,
+        request.subtopic_id
+    )
+    if existing_quiz and not request.retake:
+        return existing_quiz["quiz_data"]
+    difficulty = request.difficulty
+    if difficulty is None:
+        topic = await run_in_threadpool(store.get_topic, request.skill_id, request.topic_id)
+        difficulty = topic.get("difficulty") if topic else None
+    # Create Quiz Input 
+    quiz_input = QuizInput(
+        topic_name=request.topic_id,
+        subtopic_name=request.subtopic_name,
+        subtopic_description=request.subtopic_description,
+        focus_areas=request.focus_areas,
+        user_context=request.user_context,
+        current_mastery=request.current_mastery,
+        evaluator_feedback=request.evaluator_feedback
+    )
+    if existing_quiz:
+        # Retake: the questions just answered are neither drawn from the bank nor asked for again
+        previous = QuizOutput.model_validate(existing_quiz["quiz_data"]).questions
+        await run_in_threadpool(agent.retire, quiz_input, request.skill_id, difficulty, previous)
+        quiz_input.avoid_questions = [q.Q for q in previous]
+    # Compose Quiz (only questions the bank cannot supply are generated)
+    quiz_output: QuizOutput = await agent.acompose(quiz_input, request.skill_id, difficulty)
+    # Save Quiz (the store's per-skill lock keeps flights for other subtopics of the same topic from interleaving their writes)
+    quiz_data = quiz_output.model_dump()
+    await run_in_threadpool(
+        store.save_quiz,
+        request.skill_id,
+        request.topic_id,
+        request.subtopic_id,
+        request.subtopic_name,
+        request.subtopic_description,
+        quiz_data
+    )
+    return quiz_data
 
 @router.post("/generate-quiz")
-def generate_quiz(request: GenerateQuizRequest):
-    """Generate 5 quiz questions for a specific subtopic."""
+async def generate_quiz(request: GenerateQuizRequest, registry: AgentRegistry = Depends(get_agent_registry), store: LearningStore = Depends(get_learning_store)):
+    """Generate 5 quiz questions for a specific subtopic (retake=True replaces the stored quiz with unseen questions)."""
     try:
-        # Extract numeric part from subtopic_id for storage
-        subtopic_num = request.subtopic_id.split('_')[-1].lstrip('0')
         # Check if quiz already exists
-        existing_quiz = get_existing_quiz(
-            LEARNING_SKILLS_PATH,
+        existing_quiz = await run_in_threadpool(
+            store.get_quiz,
             request.skill_id,
             request.topic_id,
             request.subtopic_id
         )
-        if existing_quiz:
+        if existing_quiz and not request.retake:
             return {
                 "status": "success",
                 "quiz_data": existing_quiz["quiz_data"],
                 "skill_id": request.skill_id,
                 "topic_id": request.topic_id
             }
-        # Initialize API + Agent
-        api_key = os.getenv("GEMINI_PRIMARY_KEY")
-        if not api_key:
-            print("ERROR: GEMINI_PRIMARY_KEY not found in environment variables")
-            raise HTTPException(status_code=500, detail="Gemini API key not found. Please check your .env file.")
-        agent = QuizAgent(api_key=api_key)
-        # Create Quiz Input 
-        quiz_input = QuizInput(
-            topic_name=request.topic_id,
-            subtopic_name=request.subtopic_name,
-            subtopic_description=request.subtopic_description,
-            focus_areas=request.focus_areas,
-            user_context=request.user_context,
-            current_mastery=request.current_mastery,
-            evaluator_feedback=request.evaluator_feedback
-        )
-        # Generate Quiz
-        quiz_output: QuizOutput = agent.run(quiz_input)
-        # Save Quiz to File
-        skill_folder = LEARNING_SKILLS_PATH / request.skill_id
-        skill_folder.mkdir(exist_ok=True)
-        quiz_path = skill_folder / f"quiz_{request.topic_id}.json"
-        quiz_data = load_json(quiz_path)
-        quiz_data[subtopic_num] = {
-            "subtopic_name": request.subtopic_name,
-            "subtopic_description": request.subtopic_description,
-            "quiz_data": quiz_output.model_dump()
-        }
-        save_json(quiz_path, quiz_data)
+        # Only a cache miss needs the (shared) Quiz Agent
+        agent: QuizAgent = resolve_agent(registry, "quiz")
+        quiz_data = await quiz_flights.do(quiz_flight_key(request), lambda: generate_and_store_quiz(agent, store, request))
         # Return Response
         return {
             "status": "success",
-            "quiz_data": quiz_output.model_dump(),
+            "quiz_data": quiz_data,
             "skill_id": request.skill_id,
             "topic_id": request.topic_id
         }
+    except (RateLimitedError, AgentTimeoutError) as e:
+        raise agent_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/bank-stats")
+def question_bank_stats(request: Request):
+    """Question bank: questions served from the bank versus generated, near-duplicates caught and bank size."""
+    bank = getattr(request.app.state, "question_bank", None)
+    return {"status": "success", **(bank.stats() if bank is not None else {})}
+
+@router.delete("/prefetch/{skill_id}")
+async def cancel_prefetch(skill_id: str, prefetcher: "QuizPrefetcher" = Depends(get_quiz_prefetcher)):
+    """Cancel background quiz generation queued or running for a skill."""
+    return {
+        "status": "success",
+        "cancelled": prefetcher.cancel(skill_id)
+    }
+
 @router.post("/get-question")
-def get_question(request: GetQuizRequest):
+def get_question(request: GetQuizRequest, store: LearningStore = Depends(get_learning_store)):
     try:
-        # Extract numeric part from subtopic_id
-        existing_quiz = get_existing_quiz(
-            LEARNING_SKILLS_PATH,
+        # Indexed lookup of the one question (plus the quiz's size and subtopic name)
+        found = store.get_question(
             request.skill_id,
             request.topic_id,
-            request.subtopic_id
+            request.subtopic_id,
+            request.question_number
         )
-        if not existing_quiz:
+        if found is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"No quiz found for topic '{request.topic_id}' and subtopic '{request.subtopic_id}'."
             )
-        # Extract question data 
-        questions = existing_quiz["quiz_data"].get("questions", [])
-        if not questions:
+        question, total_questions, subtopic_name = found
+        if not total_questions:
             raise HTTPException(
                 status_code=404,
                 detail=f"No questions available for subtopic '{request.subtopic_id}'."
             )
-        question_index = request.question_number - 1  
-        if question_index < 0 or question_index >= len(questions):
+        if question is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"Question {request.question_number} out of range for subtopic '{request.subtopic_id}'."
             )
-        question = questions[question_index]
         return {
             "status": "success",
             "question": question,
             "question_number": request.question_number,
-            "total_questions": len(questions),
-            "subtopic_name": existing_quiz.get("subtopic_name", ""),
+            "total_questions": total_questions,
+            "subtopic_name": subtopic_name,
             "subtopic_id": request.subtopic_id
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-
-
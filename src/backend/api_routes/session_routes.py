@@ -0,0 +1,129 @@
+# src/backend/api_routes/session_routes.py
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from ..MMagents.agent_registry import AgentRegistry
+from ..MMagents.call_policy import AgentTimeoutError
+from ..MMagents.key_pool import RateLimitedError
+from ..storage.base import LearningStore, NotFoundError
+from .dependencies import agent_unavailable, get_agent_registry, get_learning_store, get_quiz_prefetcher, resolve_agent
+from .prefetch import QuizPrefetcher
+from .quiz_routes import generate_and_store_quiz, quiz_flight_key, quiz_flights, quiz_request_for
+from .utils import build_learning_context, find_current_subtopic
+
+router = APIRouter()
+
+class AdvanceSessionRequest(BaseModel):
+    topic_id: str
+    subtopic_id: str
+    correct_answers: int = 0
+    total_questions: int = 5
+    generate_quiz: bool = True
+
+async def session_response(
+    skill_id: str,
+    session: dict,
+    store: LearningStore,
+    registry: AgentRegistry,
+    prefetcher: QuizPrefetcher,
+    generate_quiz: bool
+) -> dict:
+    """
+    Shape a store session into the learning screen's payload
+    A missing quiz is generated inline (joining any prefetch already running for it),
+    or with generate_quiz=False only queued for prefetch
+    With no current topic, all_topics_completed waits until all planned_topics are stored (plan_generating until then)
+    """
+    current_topic_id, current_subtopic_id = session["current_topic_id"], session["current_subtopic_id"]
+    topic = session["topic"]
+    if current_topic_id is None:
+        # No topic left so far: a plan still being streamed gets its next topic from append_topics
+        skill = session["skill"] or {}
+        plan_generating = skill.get("topic_count", 0) < skill.get("planned_topics", 0)
+        return {
+            "status": "success",
+            "skill_id": skill_id,
+            "all_topics_completed": not plan_generating,
+            "plan_generating": plan_generating,
+            "context": None,
+            "topic": None,
+            "subtopics": [],
+            "quiz_data": None
+        }
+    subtopic = await run_in_threadpool(find_current_subtopic, store, skill_id, topic, current_subtopic_id)
+    quiz_data = session["quiz"]["quiz_data"] if session["quiz"] else None
+    if quiz_data is None and subtopic is not None:
+        user_context = session["skill"].get("user_context", "") if session["skill"] else ""
+        request = quiz_request_for(skill_id, topic, subtopic, user_context)
+        if generate_quiz:
+            agent = resolve_agent(registry, "quiz")
+            quiz_data = await quiz_flights.do(quiz_flight_key(request), lambda: generate_and_store_quiz(agent, store, request))
+        else:
+            prefetcher.schedule(skill_id, [request])
+    return {
+        "status": "success",
+        "skill_id": skill_id,
+        "all_topics_completed": False,
+        "plan_generating": False,
+        "context": build_learning_context(session["skill"], current_topic_id, current_subtopic_id, topic, subtopic),
+        "topic": topic,
+        "subtopics": topic.get("subtopics", []) if topic else [],
+        "quiz_data": quiz_data
+    }
+
+@router.get("/{skill_id}")
+async def get_session(
+    skill_id: str,
+    generate_quiz: bool = True,
+    store: LearningStore = Depends(get_learning_store),
+    registry: AgentRegistry = Depends(get_agent_registry),
+    prefetcher: QuizPrefetcher = Depends(get_quiz_prefetcher)
+):
+    """
+    Open a skill in one round trip: current context (skill-details shape), topic data with subtopics
+    and the current subtopic's quiz (cached, or generated now)
+    """
+    try:
+        session = await run_in_threadpool(store.get_session, skill_id)
+        return await session_response(skill_id, session, store, registry, prefetcher, generate_quiz)
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except HTTPException:
+        raise
+    except (RateLimitedError, AgentTimeoutError) as e:
+        raise agent_unavailable(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{skill_id}/advance")
+async def advance_session(
+    skill_id: str,
+    request: AdvanceSessionRequest,
+    store: LearningStore = Depends(get_learning_store),
+    registry: AgentRegistry = Depends(get_agent_registry),
+    prefetcher: QuizPrefetcher = Depends(get_quiz_prefetcher)
+):
+    """
+    Finish the current subtopic's quiz and move on in one round trip:
+    mastery and completion are applied in one storage write, which also reads back the next session state
+    """
+    try:
+        new_mastery, session = await run_in_threadpool(
+            store.advance_session,
+            skill_id,
+            request.topic_id,
+            request.subtopic_id,
+            request.correct_answers,
+            request.total_questions
+        )
+        response = await session_response(skill_id, session, store, registry, prefetcher, request.generate_quiz)
+        response["new_mastery"] = new_mastery
+        return response
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except HTTPException:
+        raise
+    except (RateLimitedError, AgentTimeoutError) as e:
+        raise agent_unavailable(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,48 @@
+# src/backend/api_routes/singleflight.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Set
+
+class SingleFlight:
+    """
+    In-process request coalescing
+    - Concurrent callers with the same key await one in-flight coroutine and share its result (or error)
+    - The shared work is shielded, so one caller going away does not cancel it for the others
+    - cancel_when_abandoned (set by the caller that starts the flight) cancels the work once no caller waits on it
+    - Once the work finishes the key is released and the next call starts fresh
+    """
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self._abandonable: Set[Hashable] = set()
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]], cancel_when_abandoned: bool = False) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            if cancel_when_abandoned:
+                self._abandonable.add(key)
+            task.add_done_callback(lambda done: self._release(key, done))
+        elif not cancel_when_abandoned:
+            # A caller that wants the result keeps the work alive from now on
+            self._abandonable.discard(key)
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                if self._inflight.get(key) is task and key in self._abandonable and not task.done():
+                    task.cancel()
+
+    def _release(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            self._abandonable.discard(key)
+        # Mark the error as seen even if every caller went away before it finished
+        if not task.cancelled():
+            task.exception()
@@ -5,12 +5,24 @@ from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 import os
 
-# Import routers (3 main agents + planning + database)
+# Import routers (3 main agents + planning + database + learning sessions + jobs)
 from .api_routes.chat_routes import router as chat_router
 from .api_routes.quiz_routes import router as quiz_router
 from .api_routes.evaluator_routes import router as evaluator_router
 from .api_routes.planning_routes import router as planning_router
 from .api_routes.database_routes import router as database_router
+from .api_routes.session_routes import router as session_router
+from .api_routes.job_routes import router as job_router
+from .api_routes.jobs import JobQueue
+from .api_routes.prefetch import QuizPrefetcher
+from .api_routes.utils import init_learning_folders
+from .MMagents.agent_registry import AgentRegistry
+from .MMagents.base_agent import load_prompt
+from .MMagents.evaluator_agent import PROMPT_FILE as EVALUATOR_PROMPT_FILE
+from .MMagents.key_pool import load_api_keys
+from .MMagents.question_bank import QuestionBank
+from .MMagents.verdict_memo import VerdictMemo, prompt_version
+from .storage.factory import create_learning_store
 
 # do not create .pyc files
 import sys
@@ -22,8 +34,51 @@ load_dotenv(os.path.join(os.path.dirname(__file__), "../../.env"))
 # Define lifespan event handler
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Learning data (MMagent_learning/): SQLite by default, JSON files with MM_STORAGE_BACKEND=json
+    paths = init_learning_folders(3)
+    app.state.learning_store = create_learning_store(paths)
+    # Evaluator verdicts for answers seen before; MM_EVAL_MEMO_VERSION pins the version (default: EA.md fingerprint),
+    # MM_EVAL_MEMO=off bypasses the memo
+    app.state.verdict_memo = VerdictMemo(
+        paths["MM_LEARNING_ROOT"] / "evaluation_memo.db",
+        version=os.getenv("MM_EVAL_MEMO_VERSION") or prompt_version(load_prompt(EVALUATOR_PROMPT_FILE)),
+        bypass=os.getenv("MM_EVAL_MEMO", "on").strip().lower() == "off"
+    )
+    # Generated quiz questions, reused for retakes and similar subtopics; MM_QUESTION_BANK=off always generates
+    app.state.question_bank = QuestionBank(
+        paths["MM_LEARNING_ROOT"] / "question_bank.db",
+        bypass=os.getenv("MM_QUESTION_BANK", "on").strip().lower() == "off"
+    )
+    # One registry (Gemini clients for every configured key + agents) for the whole process
+    # GEMINI_KEY_RPM / GEMINI_KEY_TPM: optional per-key quotas, so calls spread out before Gemini answers 429
+    app.state.agent_registry = AgentRegistry(
+        api_key=load_api_keys(),
+        rpm=float(os.getenv("GEMINI_KEY_RPM", 0)) or None,
+        tpm=float(os.getenv("GEMINI_KEY_TPM", 0)) or None,
+        agent_options={"evaluator": {"memo": app.state.verdict_memo}, "quiz": {"bank": app.state.question_bank}}
+    )
+    if not app.state.agent_registry.available:
+        print("WARNING: no Gemini API key (GEMINI_PRIMARY_KEY, GEMINI_KEY_1.. or GEMINI_KEYS) found in environment variables")
+    # Background worker pool that warms the next subtopic's quiz
+    app.state.quiz_prefetcher = QuizPrefetcher(app.state.agent_registry, app.state.learning_store)
+    app.state.quiz_prefetcher.start()
+    # Persistent queue for plan/quiz jobs (MMagent_learning/jobs.db); queued and interrupted jobs resume here
+    app.state.job_queue = JobQueue(
+        paths["MM_LEARNING_ROOT"] / "jobs.db",
+        app.state.agent_registry,
+        app.state.learning_store,
+        app.state.quiz_prefetcher,
+        max_workers=int(os.getenv("MM_JOB_WORKERS", 4))
+    )
+    app.state.job_queue.start()
     print("FastAPI backend initialized successfully (STARTUP)")
     yield
+    await app.state.job_queue.aclose()
+    await app.state.quiz_prefetcher.aclose()
+    await app.state.agent_registry.aclose()
+    app.state.question_bank.close()
+    app.state.verdict_memo.close()
+    app.state.learning_store.close()
     print("FastAPI backend shutting down (SHUTDOWN)")
 
 # Create FastAPI app
@@ -55,6 +110,8 @@ app.include_router(chat_router, prefix="/chat", tags=["Chat Agent"])
 app.include_router(quiz_router, prefix="/quiz", tags=["Quiz Agent"])
 app.include_router(evaluator_router, prefix="/evaluate", tags=["Evaluator Agent"])
 app.include_router(database_router, prefix="/db", tags=["Database Operations"])
+app.include_router(session_router, prefix="/session", tags=["Learning Sessions"])
+app.include_router(job_router, prefix="/jobs", tags=["Jobs"])
 
 # Root endpoint
 @app.get("/")
@@ -0,0 +1,71 @@
+# src/backend/startup_benchmark.py
+"""
+Measure how long importing the backend takes (what every --reload restart and worker start pays)
+
+    python -m src.backend.startup_benchmark [--runs 5] [--budget-ms 1000]
+
+Each run imports src.backend.mentormind_main in a fresh interpreter under `python -X importtime`.
+Exits with status 1 when the median import time is over budget or a module that should load lazily
+(the genai SDK) is imported, so it can gate CI or a pre-commit hook
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+TARGET = "src.backend.mentormind_main"
+# Imported on first use only (building a Gemini client or config), never when the app is imported
+LAZY_MODULES = ("google.genai",)
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+def import_times(root: Path) -> Dict[str, Tuple[int, int, int]]:
+    """{module: (self_us, cumulative_us, depth)} from one `python -X importtime` import of TARGET"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {TARGET}"],
+        cwd=root, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {TARGET} failed:\n{result.stderr[-2000:]}")
+    times = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            times[module] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return times
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark backend import time with python -X importtime")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to measure (after one warm-up)")
+    parser.add_argument("--budget-ms", type=float, default=1000, help="fail when the median import takes longer")
+    parser.add_argument("--top", type=int, default=10, help="slowest direct imports to list")
+    args = parser.parse_args()
+    root = Path(__file__).resolve().parents[2]
+    # Warm-up: bytecode compilation and a cold disk cache would skew the first run
+    import_times(root)
+    runs: List[Dict[str, Tuple[int, int, int]]] = [import_times(root) for _ in range(max(1, args.runs))]
+    totals = [run[TARGET][1] / 1000 for run in runs]
+    median = statistics.median(totals)
+    print(f"{TARGET}: median {median:.1f} ms over {len(totals)} runs (min {min(totals):.1f}, max {max(totals):.1f})")
+    last = runs[-1]
+    children = sorted(
+        ((module, cumulative) for module, (_, cumulative, depth) in last.items() if depth == 1),
+        key=lambda item: item[1], reverse=True
+    )
+    for module, cumulative in children[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {module}")
+    failures = []
+    if median > args.budget_ms:
+        failures.append(f"median import time {median:.1f} ms is over the {args.budget_ms:g} ms budget")
+    eager = [module for module in LAZY_MODULES if any(module in run for run in runs)]
+    if eager:
+        failures.append(f"imported at startup but should load lazily: {', '.join(eager)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
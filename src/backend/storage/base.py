@@ -0,0 +1,218 @@
+# src/backend/storage/base.py
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .plan_index import PlanIndex
+
+class NotFoundError(LookupError):
+    """Raised when a skill, topic, subtopic or quiz does not exist in the store"""
+
+def topic_id_for(number: int) -> str:
+    """ID of a plan's topic number `number` (1-based)"""
+    return f"topic_{number:03d}"  # e.g., topic_001
+
+def assign_topic_ids(topic: dict, number: int) -> dict:
+    """Topic/subtopic IDs, order, mastery and completion fields for the plan's topic number `number`"""
+    topic_id = topic_id_for(number)
+    topic.update({
+        "topic_id": topic_id,
+        "order": number,
+        "mastery": 0,
+        "completed": False
+    })
+    # Add IDs to subtopics if they exist
+    if "subtopics" in topic:
+        for sub_index, subtopic in enumerate(topic["subtopics"]):
+            subtopic_id = f"{topic_id}_sub_{sub_index + 1:02d}"  # e.g., topic_001_sub_01
+            subtopic.update({
+                "subtopic_id": subtopic_id,
+                "order": sub_index + 1,
+                "completed": False,
+                "mastery": 0
+            })
+    return topic
+
+def first_pointer(topics: List[dict]) -> Tuple[Optional[str], Optional[str]]:
+    """Progress pointer at the start of topics: (first topic_id, its first subtopic_id)"""
+    if not topics:
+        return None, None
+    subtopics = topics[0].get("subtopics")
+    return topics[0]["topic_id"], subtopics[0]["subtopic_id"] if subtopics else None
+
+def assign_plan_ids(plan_dict: dict) -> dict:
+    """
+    Turn a PlanOutput dump into the stored plan shape:
+    topic/subtopic IDs, order, mastery and completion fields plus the progress pointer
+    """
+    for index, topic in enumerate(plan_dict["topics"]):
+        assign_topic_ids(topic, index + 1)
+    # Add metadata about topics structure
+    current_topic_id, current_subtopic_id = first_pointer(plan_dict["topics"])
+    plan_dict.update({
+        "total_topics": len(plan_dict["topics"]),
+        "current_topic_id": current_topic_id,
+        "current_subtopic_id": current_subtopic_id
+    })
+    return plan_dict
+
+def blend_mastery(existing: float, correct_answers: int, total_questions: int) -> float:
+    """New subtopic mastery: 30% previous score + 70% current performance"""
+    performance = correct_answers / total_questions
+    return round(0.3 * existing + 0.7 * performance, 2)
+
+def average_mastery(masteries: List[float]) -> float:
+    """Topic mastery is the rounded average of its subtopics"""
+    return round(sum(masteries) / len(masteries), 2) if masteries else 0
+
+def skill_mastery_percent(mastery_sum: float, topic_count: int) -> float:
+    """Skill mastery shown in /plan/all-skills: average topic mastery in percent"""
+    return round(mastery_sum / topic_count * 100, 3) if topic_count else 0.0
+
+def new_event(event_type: str, **fields) -> dict:
+    """
+    A progress journal event
+    - mastery_update: correct_answers/total_questions of the quiz attempt plus the resulting masteries
+    - subtopic_completed: topic completion/mastery and the new progress pointer
+    - topics_added: topics appended to a plan still being generated, plus the resulting progress pointer
+    - evaluation: one graded answer (history only)
+    """
+    return {"type": event_type, "at": datetime.now().isoformat(), **fields}
+
+# Orderings accepted by list_skill_summaries
+SUMMARY_SORTS = ("created", "mastery", "recent")
+
+class LearningStore:
+    """
+    Storage interface for everything MentorMind persists
+    - skills: metadata entries (id, name, created_at, topic_count, status, user_context)
+    - plans: topics and subtopics with mastery, completion and the current progress pointer
+    - quizzes: generated questions per subtopic
+    Implementations: JsonLearningStore (MMagent_learning/ JSON files) and SqliteLearningStore
+    Missing records raise NotFoundError; the routes turn that into a 404
+    """
+    # Skills
+    def list_skills(self) -> List[dict]:
+        """All skill metadata entries in creation order"""
+        raise NotImplementedError("Subclasses must implement the `list_skills` method")
+
+    def get_skill(self, skill_id: str) -> Optional[dict]:
+        raise NotImplementedError("Subclasses must implement the `get_skill` method")
+
+    def list_skill_summaries(self, sort: str = "created", limit: Optional[int] = None, offset: int = 0) -> Tuple[List[dict], int]:
+        """
+        One page of the skill summary index and the total number of skills
+        - Entries: skill_id, name, mastery (percent), topic_count, current_topic_id, current_topic, last_activity
+        - The index is kept up to date by create_skill, append_topics, update_subtopic_mastery and mark_subtopic_completed,
+          so listing never loads plans
+        - sort: created (oldest first), mastery (highest first) or recent (latest activity first)
+        """
+        raise NotImplementedError("Subclasses must implement the `list_skill_summaries` method")
+
+    def create_skill(self, skill_name: str, user_context: str, plan_dict: dict, planned_topics: Optional[int] = None) -> str:
+        """
+        Store a new skill and its plan (a PlanOutput dump), returning the new skill_id
+        - planned_topics: how many topics the plan will have once append_topics has added the rest
+          (defaults to the topics given); kept on the skill as `planned_topics`
+        """
+        raise NotImplementedError("Subclasses must implement the `create_skill` method")
+
+    def append_topics(self, skill_id: str, topics: List[dict]) -> List[str]:
+        """
+        Add topics (ConceptTopic dumps) after the plan's last one, for plans stored while still being generated
+        - IDs continue the plan's numbering; a plan whose pointer is None (no topics left) moves onto the first new topic
+        - Changes the skill version and topic_count; returns the new topic IDs
+        """
+        raise NotImplementedError("Subclasses must implement the `append_topics` method")
+
+    # Plans
+    def get_plan(self, skill_id: str) -> Optional[dict]:
+        """Full plan in plan_config.json shape (read-only)"""
+        raise NotImplementedError("Subclasses must implement the `get_plan` method")
+
+    def get_progress_pointer(self, skill_id: str) -> Tuple[Optional[str], Optional[str]]:
+        """(current_topic_id, current_subtopic_id); raises NotFoundError for unknown skills"""
+        raise NotImplementedError("Subclasses must implement the `get_progress_pointer` method")
+
+    def get_topic(self, skill_id: str, topic_id: str) -> Optional[dict]:
+        """One topic including its subtopics (read-only)"""
+        raise NotImplementedError("Subclasses must implement the `get_topic` method")
+
+    def get_skill_version(self, skill_id: str) -> Optional[int]:
+        """Changes with every write to the skill's plan or progress (the seq of its last progress event); None for unknown skills"""
+        raise NotImplementedError("Subclasses must implement the `get_skill_version` method")
+
+    def get_skills_version(self) -> str:
+        """Cheap token that changes whenever a skill is created or written (for /plan/all-skills)"""
+        raise NotImplementedError("Subclasses must implement the `get_skills_version` method")
+
+    def get_plan_index(self, skill_id: str) -> Optional["PlanIndex"]:
+        """ID -> position index over the skill's plan (built once, then cached), or None for unknown skills"""
+        raise NotImplementedError("Subclasses must implement the `get_plan_index` method")
+
+    def update_subtopic_mastery(self, skill_id: str, topic_id: str, subtopic_id: str, correct_answers: int, total_questions: int) -> float:
+        """Blend in a quiz result, refresh the topic average and return the new subtopic mastery"""
+        raise NotImplementedError("Subclasses must implement the `update_subtopic_mastery` method")
+
+    def mark_subtopic_completed(self, skill_id: str, topic_id: str, subtopic_id: str) -> Tuple[Optional[str], Optional[str]]:
+        """Complete a subtopic, advance the progress pointer and return the new pointer"""
+        raise NotImplementedError("Subclasses must implement the `mark_subtopic_completed` method")
+
+    def record_quiz_result(self, skill_id: str, topic_id: str, subtopic_id: str, correct_answers: int, total_questions: int) -> Tuple[float, Optional[str], Optional[str]]:
+        """Update mastery and complete the subtopic as one atomic write; returns (new_mastery, *new pointer)"""
+        raise NotImplementedError("Subclasses must implement the `record_quiz_result` method")
+
+    # Learning sessions
+    def get_session(self, skill_id: str) -> dict:
+        """
+        Everything the learning screen needs for the current subtopic:
+        {skill, current_topic_id, current_subtopic_id, topic (with subtopics), quiz (get_quiz or None)}
+        Stores override this to read it as one consistent snapshot; raises NotFoundError for unknown skills
+        """
+        skill = self.get_skill(skill_id)
+        current_topic_id, current_subtopic_id = self.get_progress_pointer(skill_id)
+        topic = self.get_topic(skill_id, current_topic_id) if current_topic_id else None
+        quiz = self.get_quiz(skill_id, current_topic_id, current_subtopic_id) if topic and current_subtopic_id else None
+        return {
+            "skill": skill,
+            "current_topic_id": current_topic_id,
+            "current_subtopic_id": current_subtopic_id,
+            "topic": topic,
+            "quiz": quiz
+        }
+
+    def advance_session(self, skill_id: str, topic_id: str, subtopic_id: str, correct_answers: int, total_questions: int) -> Tuple[float, dict]:
+        """record_quiz_result plus the resulting get_session, in the same write; returns (new_mastery, session)"""
+        raise NotImplementedError("Subclasses must implement the `advance_session` method")
+
+    # Progress history
+    def record_event(self, skill_id: str, event: dict) -> None:
+        """Append a history-only event (see new_event) to the skill's progress journal"""
+        raise NotImplementedError("Subclasses must implement the `record_event` method")
+
+    def list_progress_events(self, skill_id: str, after: int = 0, limit: Optional[int] = None) -> List[dict]:
+        """Journal events with seq > after, oldest first; raises NotFoundError for unknown skills"""
+        raise NotImplementedError("Subclasses must implement the `list_progress_events` method")
+
+    # Quizzes
+    def get_quiz(self, skill_id: str, topic_id: str, subtopic_id: str) -> Optional[dict]:
+        """{subtopic_name, subtopic_description, quiz_data} for a subtopic, or None"""
+        raise NotImplementedError("Subclasses must implement the `get_quiz` method")
+
+    def get_question(self, skill_id: str, topic_id: str, subtopic_id: str, question_number: int) -> Optional[Tuple[Optional[dict], int, str]]:
+        """
+        (question, total_questions, subtopic_name) for a 1-based question number, or None without a quiz
+        question is None when the number is out of range
+        """
+        quiz = self.get_quiz(skill_id, topic_id, subtopic_id)
+        if quiz is None:
+            return None
+        questions = quiz["quiz_data"].get("questions", [])
+        question = questions[question_number - 1] if 1 <= question_number <= len(questions) else None
+        return question, len(questions), quiz.get("subtopic_name", "")
+
+    def save_quiz(self, skill_id: str, topic_id: str, subtopic_id: str, subtopic_name: str, subtopic_description: Optional[str], quiz_data: dict) -> None:
+        raise NotImplementedError("Subclasses must implement the `save_quiz` method")
+
+    def close(self) -> None:
+        """Release resources (called from the FastAPI lifespan on shutdown)"""
@@ -0,0 +1,108 @@
+# src/backend/storage/documents.py
+from pathlib import Path
+from collections import OrderedDict
+import copy
+import json
+import os
+import threading
+import time
+from typing import Any, Dict
+
+class DocumentCache:
+    """
+    Process-wide cache of parsed JSON documents keyed by path
+    - Reads revalidate against the file's (inode, mtime, size) at most every revalidate_after seconds,
+      so hot GETs are served from memory without touching disk; read_json_for_update always revalidates
+    - Writes go to a temp file that is fsynced and os.replace'd over the target, so readers
+      (in any process) see the old document or the new one, never a partial write
+    - write_json stores the written document directly and bumps the path's version,
+      so our own writes never cost a re-read
+    - Bounded by an LRU byte budget (entries are weighed by their on-disk JSON size)
+    - Documents from read_json are shared: never mutate them, use read_json_for_update instead
+    """
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, revalidate_after: float = 2.0):
+        self.max_bytes = max_bytes
+        self.revalidate_after = revalidate_after
+        self._entries: "OrderedDict[Path, dict]" = OrderedDict()
+        self._versions: Dict[Path, int] = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+    def read_json(self, path: Path, default: Any = None, revalidate: bool = False) -> Any:
+        """Parsed document at path (shared, read-only), or default if the file does not exist"""
+        with self._lock:
+            entry = self._entries.get(path)
+            now = time.monotonic()
+            if entry is not None and not revalidate and now - entry["checked_at"] < self.revalidate_after:
+                self._entries.move_to_end(path)
+                return entry["data"]
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                self._drop(path)
+                return default
+            signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if entry is not None and entry["signature"] == signature:
+                entry["checked_at"] = now
+                self._entries.move_to_end(path)
+                return entry["data"]
+            # Changed outside this process (or never loaded): parse and remember it
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+            self._versions[path] = self._versions.get(path, 0) + 1
+            self._store(path, data, signature, stat.st_size)
+            return data
+
+    def read_json_for_update(self, path: Path, default: Any = None) -> Any:
+        """Private deep copy of the document, safe to mutate and pass to write_json (checked against disk, since
+        another worker process may have written it moments ago)"""
+        return copy.deepcopy(self.read_json(path, default, revalidate=True))
+
+    def write_json(self, path: Path, data: Any) -> None:
+        """Atomically replace the document on disk and make it the cached version"""
+        path = Path(path)
+        text = json.dumps(data, indent=2)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        with self._lock:
+            stat = os.stat(path)
+            self._versions[path] = self._versions.get(path, 0) + 1
+            self._store(path, data, (stat.st_ino, stat.st_mtime_ns, stat.st_size), stat.st_size)
+
+    def version(self, path: Path) -> int:
+        """Counter bumped whenever the cached document at path changes"""
+        with self._lock:
+            return self._versions.get(path, 0)
+
+    def invalidate(self, path: Path) -> None:
+        with self._lock:
+            self._drop(path)
+            self._versions[path] = self._versions.get(path, 0) + 1
+
+    def _store(self, path: Path, data: Any, signature: tuple, size: int) -> None:
+        self._drop(path)
+        if size > self.max_bytes:
+            return
+        self._entries[path] = {"data": data, "signature": signature, "size": size, "checked_at": time.monotonic()}
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted["size"]
+
+    def _drop(self, path: Path) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._bytes -= entry["size"]
+
+# Shared process-wide; every JSON read and write (JSON store, learning folder setup) goes through it
+document_cache = DocumentCache()
+read_json = document_cache.read_json
+read_json_for_update = document_cache.read_json_for_update
+write_json = document_cache.write_json
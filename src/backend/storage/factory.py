@@ -0,0 +1,30 @@
+# src/backend/storage/factory.py
+import os
+from pathlib import Path
+from typing import Dict
+from .base import LearningStore
+
+# MM_STORAGE_BACKEND=sqlite (default) or json (the original whole-file layout)
+DEFAULT_BACKEND = "sqlite"
+DB_FILENAME = "mentormind.db"
+
+def create_learning_store(paths: Dict[str, Path], backend: str = None) -> LearningStore:
+    """
+    Build the learning store selected by MM_STORAGE_BACKEND
+    - sqlite: MMagent_learning/mentormind.db; a new database imports any existing JSON skills once
+    - json: MMagent_learning/ JSON documents, as before
+    """
+    backend = (backend or os.getenv("MM_STORAGE_BACKEND") or DEFAULT_BACKEND).strip().lower()
+    if backend == "json":
+        from .json_store import JsonLearningStore
+        return JsonLearningStore(paths)
+    if backend == "sqlite":
+        from .sqlite_store import SqliteLearningStore
+        from .migrate import import_json_tree
+        db_path = paths["MM_LEARNING_ROOT"] / DB_FILENAME
+        is_new = not db_path.exists()
+        store = SqliteLearningStore(db_path)
+        if is_new:
+            import_json_tree(paths, store)
+        return store
+    raise ValueError(f"Unknown MM_STORAGE_BACKEND: {backend!r} (expected 'sqlite' or 'json')")
@@ -0,0 +1,144 @@
+# src/backend/storage/journal.py
+import copy
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+from .plan_index import PlanIndex
+
+# Event types that change plan state; everything else (e.g. "evaluation") is history only
+STATE_EVENTS = ("mastery_update", "subtopic_completed", "topics_added")
+
+def apply_event(plan_config: dict, event: dict, index: Optional[PlanIndex] = None) -> None:
+    """
+    Replay one journal event onto a plan (index, if given, locates the topic and subtopic without scanning)
+    Events carry resulting values (not deltas), so replaying one twice is harmless
+    topics_added changes the plan's structure: callers rebuild their index after applying it
+    """
+    if event.get("type") not in STATE_EVENTS:
+        return
+    if event["type"] == "topics_added":
+        known = {topic["topic_id"] for topic in plan_config["topics"]}
+        plan_config["topics"].extend(copy.deepcopy(t) for t in event["topics"] if t["topic_id"] not in known)
+        plan_config["total_topics"] = len(plan_config["topics"])
+        plan_config["current_topic_id"] = event["current_topic_id"]
+        plan_config["current_subtopic_id"] = event["current_subtopic_id"]
+        return
+    index = index or PlanIndex(plan_config)
+    topic_ref = index.topics.get(event["topic_id"])
+    if topic_ref is None:
+        return
+    topic = plan_config["topics"][topic_ref.index]
+    ref = index.subtopics.get(event["subtopic_id"])
+    subtopic = topic["subtopics"][ref.index] if ref is not None and ref.topic_id == event["topic_id"] else None
+    if event["type"] == "mastery_update":
+        if subtopic is not None:
+            subtopic["mastery"] = event["subtopic_mastery"]
+        topic["mastery"] = event["topic_mastery"]
+    else:
+        if subtopic is not None:
+            subtopic["completed"] = True
+        if event.get("topic_completed"):
+            topic["completed"] = True
+            topic["mastery"] = event["topic_mastery"]
+        plan_config["current_topic_id"] = event["current_topic_id"]
+        plan_config["current_subtopic_id"] = event["current_subtopic_id"]
+
+class ProgressJournal:
+    """
+    Append-only JSONL journals (one per skill)
+    - append writes its lines in one write and hands it to the OS right away; fsync is batched by a
+      background thread every fsync_interval seconds, so bursts of appends share one disk sync
+    - read_from(path, offset) returns the complete events after a byte offset, so state is
+      rebuilt from a snapshot plus the journal tail
+    - A torn last line (crash mid-append) is cut off before the next append
+    - on_tick runs on the background thread after each sync (used for compaction)
+    """
+    def __init__(self, fsync_interval: float = 0.2, max_open: int = 64, on_tick: Optional[Callable[[], None]] = None):
+        self.fsync_interval = fsync_interval
+        self.max_open = max_open
+        self.on_tick = on_tick
+        self._handles: "OrderedDict[Path, object]" = OrderedDict()
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="progress-journal", daemon=True)
+        self._thread.start()
+
+    def append(self, path: Path, *events: dict) -> int:
+        """Append events in a single write and return the journal's new end offset"""
+        lines = "".join(json.dumps(event) + "\n" for event in events).encode("utf-8")
+        with self._lock:
+            handle = self._handle(path)
+            handle.write(lines)
+            handle.flush()
+            self._dirty.add(path)
+            return handle.tell()
+
+    def read_from(self, path: Path, offset: int) -> Tuple[List[dict], int]:
+        """Complete events after offset, and the offset just past the last one"""
+        try:
+            if os.path.getsize(path) <= offset:
+                return [], offset
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return [], offset
+        end = data.rfind(b"\n") + 1
+        events = [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+        return events, offset + end
+
+    def read_all(self, path: Path) -> List[dict]:
+        return self.read_from(path, 0)[0]
+
+    def flush(self) -> None:
+        """fsync every journal written since the last sync"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            for path in dirty:
+                handle = self._handles.get(path)
+                if handle is not None:
+                    os.fsync(handle.fileno())
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        with self._lock:
+            for handle in self._handles.values():
+                handle.close()
+            self._handles.clear()
+
+    def _handle(self, path: Path):
+        handle = self._handles.get(path)
+        if handle is not None:
+            self._handles.move_to_end(path)
+            return handle
+        handle = open(path, "a+b")
+        # Drop a torn last line so the next event starts on a fresh line
+        size = handle.seek(0, os.SEEK_END)
+        if size:
+            handle.seek(max(0, size - 65536))
+            tail = handle.read()
+            if not tail.endswith(b"\n"):
+                handle.truncate(size - len(tail) + tail.rfind(b"\n") + 1)
+        self._handles[path] = handle
+        while len(self._handles) > self.max_open:
+            old_path, old = self._handles.popitem(last=False)
+            if old_path in self._dirty:
+                os.fsync(old.fileno())
+                self._dirty.discard(old_path)
+            old.close()
+        return handle
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.fsync_interval):
+            try:
+                self.flush()
+                if self.on_tick:
+                    self.on_tick()
+            except Exception as e:
+                print(f"DEBUG: Progress journal background sync failed: {e}")
@@ -0,0 +1,425 @@
+# src/backend/storage/json_store.py
+import copy
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from .documents import read_json, read_json_for_update, write_json
+from .base import SUMMARY_SORTS, LearningStore, NotFoundError, assign_plan_ids, assign_topic_ids, average_mastery, blend_mastery, first_pointer, new_event, skill_mastery_percent
+from .journal import ProgressJournal, apply_event
+from .locks import SkillLockManager
+from .plan_index import PlanIndex
+
+class JsonLearningStore(LearningStore):
+    """
+    The original MMagent_learning/ layout: whole-document JSON files
+    - skills_metadata.json: skill entries and total_skills
+    - skills_summary.json: per-skill summary index behind /plan/all-skills, with the version its ETag follows
+    - learning_skills/<skill_id>/plan_config.json (plan snapshot), progress.jsonl (progress journal), quiz_<topic_id>.json
+    Mastery and completion are O(1) journal appends: the current plan is the snapshot plus the
+    journal tail, folded into a new snapshot in the background once compact_after events pile up
+    Writers hold the skill's lock (threads and uvicorn worker processes); documents are replaced atomically
+    """
+    def __init__(self, paths: Dict[str, Path], compact_after: int = 50, fsync_interval: float = 0.2):
+        self.learning_skills_path = paths["LEARNING_SKILLS_PATH"]
+        self.metadata_path = paths["SKILLS_METADATA_PATH"]
+        self.summary_path = paths["MM_LEARNING_ROOT"] / "skills_summary.json"
+        self.compact_after = compact_after
+        self.locks = SkillLockManager(paths["MM_LEARNING_ROOT"] / ".locks")
+        # skill_id -> {snapshot, plan (snapshot + tail), index, offset, seq, tail}
+        self._states: Dict[str, dict] = {}
+        # Plan structure only changes when topics are appended, so each skill's index is built once per append
+        self._indexes: Dict[str, PlanIndex] = {}
+        # Summary entries changed here but not yet merged into skills_summary.json (every access holds _pending_lock)
+        self._pending_summary: Dict[str, dict] = {}
+        self._pending_lock = threading.Lock()
+        # Summary entries refreshed by this process (part of the skills version while any are pending)
+        self._summary_changes = 0
+        self.journal = ProgressJournal(fsync_interval, on_tick=self._background_tick)
+        # Trees created before the summary index existed get it built once
+        with self.locks.lock("skills_summary"):
+            summary = read_json(self.summary_path)
+            if summary is None or len(summary.get("skills", {})) != len(self.list_skills()):
+                self._rebuild_summary()
+
+    def _plan_path(self, skill_id: str) -> Path:
+        return self.learning_skills_path / skill_id / "plan_config.json"
+
+    def _quiz_path(self, skill_id: str, topic_id: str) -> Path:
+        return self.learning_skills_path / skill_id / f"quiz_{topic_id}.json"
+
+    @staticmethod
+    def _quiz_key(subtopic_id: str) -> str:
+        # Quizzes are keyed by the subtopic's number (e.g., "topic_001_sub_01" -> "1")
+        return subtopic_id.split('_')[-1].lstrip('0')
+
+    def _journal_path(self, skill_id: str) -> Path:
+        return self.learning_skills_path / skill_id / "progress.jsonl"
+
+    def _state(self, skill_id: str) -> Optional[dict]:
+        """Materialized plan for a skill: its snapshot plus every journal event after it (hold the skill's lock)"""
+        try:
+            snapshot = read_json(self._plan_path(skill_id))
+        except json.JSONDecodeError:
+            raise ValueError("Invalid JSON in plan config.")
+        if snapshot is None:
+            self._states.pop(skill_id, None)
+            return None
+        state = self._states.get(skill_id)
+        if state is None or state["snapshot"] is not snapshot:
+            # First use, or another process wrote a newer snapshot
+            plan_config = copy.deepcopy(snapshot)
+            index = self._indexes.get(skill_id)
+            if index is None or len(index.topics) != len(plan_config["topics"]):
+                index = self._indexes[skill_id] = PlanIndex(plan_config)
+            state = {
+                "snapshot": snapshot,
+                "offset": plan_config.pop("journal_offset", 0),
+                "seq": plan_config.pop("journal_seq", 0),
+                "plan": plan_config,
+                "index": index,
+                "tail": 0
+            }
+            self._states[skill_id] = state
+        # Catch up with events appended since (by this or another process)
+        events, state["offset"] = self.journal.read_from(self._journal_path(skill_id), state["offset"])
+        for event in events:
+            self._apply(skill_id, state, event)
+        state["seq"] += len(events)
+        state["tail"] += len(events)
+        return state
+
+    def _require_state(self, skill_id: str) -> dict:
+        state = self._state(skill_id)
+        if state is None:
+            raise NotFoundError("Plan config not found for this skill.")
+        return state
+
+    def _append(self, skill_id: str, state: dict, *events: dict) -> dict:
+        """Journal events in one write and apply them to the materialized plan (hold the skill's write lock)"""
+        for number, event in enumerate(events, start=1):
+            event["seq"] = state["seq"] + number
+        try:
+            state["offset"] = self.journal.append(self._journal_path(skill_id), *events)
+        except BaseException:
+            # The in-memory plan may be ahead of the journal; rebuild it on next use
+            self._states.pop(skill_id, None)
+            raise
+        for event in events:
+            self._apply(skill_id, state, event)
+        state["seq"] += len(events)
+        state["tail"] += len(events)
+        return events[-1]
+
+    def _apply(self, skill_id: str, state: dict, event: dict) -> None:
+        apply_event(state["plan"], event, state["index"])
+        if event.get("type") == "topics_added":
+            # New topics change the next pointers of the previous last subtopic, so the index is rebuilt
+            state["index"] = self._indexes[skill_id] = PlanIndex(state["plan"])
+
+    def _compact(self, skill_id: str, state: dict) -> None:
+        """Fold the journal tail into a new plan_config.json snapshot"""
+        snapshot = copy.deepcopy(state["plan"])
+        snapshot.update({"journal_offset": state["offset"], "journal_seq": state["seq"]})
+        write_json(self._plan_path(skill_id), snapshot)
+        state["snapshot"] = snapshot
+        state["tail"] = 0
+
+    def _background_tick(self, compact_after: Optional[int] = None) -> None:
+        threshold = self.compact_after if compact_after is None else compact_after
+        for skill_id, state in list(self._states.items()):
+            if state["tail"] >= max(threshold, 1):
+                with self.locks.lock(skill_id):
+                    state = self._state(skill_id)
+                    if state is not None:
+                        self._compact(skill_id, state)
+        self._write_summary()
+
+    def _write_summary(self) -> None:
+        """
+        Merge pending entries into skills_summary.json (newest last_activity wins across processes)
+        Entries stay pending until written, so list_skill_summaries never misses one mid-merge
+        """
+        with self._pending_lock:
+            pending = dict(self._pending_summary)
+        if not pending:
+            return
+        with self.locks.lock("skills_summary"):
+            summary = read_json_for_update(self.summary_path, {"skills": {}})
+            for skill_id, entry in pending.items():
+                current = summary["skills"].get(skill_id)
+                if current is None or (entry["last_activity"] or "") >= (current.get("last_activity") or ""):
+                    summary["skills"][skill_id] = entry
+            summary["version"] = summary.get("version", 0) + 1
+            write_json(self.summary_path, summary)
+        with self._pending_lock:
+            # Entries refreshed while the file was being written wait for the next tick
+            for skill_id, entry in pending.items():
+                if self._pending_summary.get(skill_id) is entry:
+                    del self._pending_summary[skill_id]
+
+    @staticmethod
+    def _summary_entry(skill: dict, plan_config: dict, last_activity: str, index: Optional[PlanIndex] = None) -> dict:
+        topics = plan_config.get("topics", [])
+        if not isinstance(topics, list):
+            raise ValueError(f"Invalid topics format in plan for {skill['id']}")
+        current_topic_id = plan_config.get("current_topic_id")
+        current_topic = (index or PlanIndex(plan_config)).topics.get(current_topic_id)
+        return {
+            "skill_id": skill["id"],
+            "name": skill.get("name", "Unnamed Skill"),
+            "mastery": skill_mastery_percent(sum(t.get("mastery", 0) for t in topics), len(topics)),
+            "topic_count": len(topics),
+            "current_topic_id": current_topic_id,
+            "current_topic": current_topic.name if current_topic else None,
+            "last_activity": last_activity
+        }
+
+    def _rebuild_summary(self) -> None:
+        entries = {}
+        for skill in self.list_skills():
+            plan_config = self.get_plan(skill["id"])
+            if plan_config is None:
+                # Skip missing skills rather than failing entire call
+                continue
+            entries[skill["id"]] = self._summary_entry(skill, plan_config, skill.get("created_at"), self.get_plan_index(skill["id"]))
+        version = read_json(self.summary_path, {}).get("version", 0) + 1
+        write_json(self.summary_path, {"skills": entries, "version": version})
+
+    def _update_summary(self, skill_id: str, plan_config: dict, last_activity: str, index: Optional[PlanIndex] = None) -> None:
+        """Refresh one skill's summary entry from its current plan (persisted by the background thread)"""
+        skill = self.get_skill(skill_id) or {"id": skill_id}
+        entry = self._summary_entry(skill, plan_config, last_activity, index)
+        with self._pending_lock:
+            self._pending_summary[skill_id] = entry
+            self._summary_changes += 1
+
+    # Skills
+    def list_skills(self) -> List[dict]:
+        return read_json(self.metadata_path, {}).get("skills", [])
+
+    def get_skill(self, skill_id: str) -> Optional[dict]:
+        return next((s for s in self.list_skills() if s.get("id") == skill_id), None)
+
+    def list_skill_summaries(self, sort: str = "created", limit: Optional[int] = None, offset: int = 0) -> Tuple[List[dict], int]:
+        if sort not in SUMMARY_SORTS:
+            raise ValueError(f"Unknown sort: {sort}")
+        # Pending entries first: one merged and dropped from pending after this is already in the file read below
+        with self._pending_lock:
+            pending = dict(self._pending_summary)
+        entries = dict(read_json(self.summary_path, {}).get("skills", {}))
+        entries.update(pending)
+        entries = list(entries.values())
+        if sort == "mastery":
+            entries = sorted(entries, key=lambda e: e["mastery"], reverse=True)
+        elif sort == "recent":
+            entries = sorted(entries, key=lambda e: e.get("last_activity") or "", reverse=True)
+        end = None if limit is None else offset + limit
+        return entries[offset:end], len(entries)
+
+    def create_skill(self, skill_name: str, user_context: str, plan_dict: dict, planned_topics: Optional[int] = None) -> str:
+        # Metadata read-modify-write under its lock, so concurrent plans get distinct skill IDs
+        with self.locks.lock("skills_metadata"):
+            metadata = read_json_for_update(self.metadata_path, {"total_skills": 0, "skills": []})
+            # Create new skill folder
+            new_skill_number = metadata["total_skills"] + 1
+            skill_id = f"skill_{new_skill_number:03d}"
+            skill_folder = self.learning_skills_path / skill_id
+            skill_folder.mkdir(exist_ok=True)
+            print(f"Created skill folder: {skill_folder}")
+            # Save plan_config.json with mastery fields and topic IDs (progress.jsonl starts on the first event)
+            plan_dict = assign_plan_ids(plan_dict)
+            write_json(skill_folder / "plan_config.json", plan_dict)
+            # Update skills_metadata.json
+            created_at = datetime.now().isoformat()
+            metadata["total_skills"] = new_skill_number
+            metadata["skills"].append({
+                "id": skill_id,
+                "name": skill_name,
+                "created_at": created_at,
+                "topic_count": len(plan_dict["topics"]),
+                "planned_topics": planned_topics or len(plan_dict["topics"]),
+                "status": "active",
+                "user_context": user_context
+            })
+            write_json(self.metadata_path, metadata)
+        self._update_summary(skill_id, plan_dict, created_at)
+        return skill_id
+
+    def append_topics(self, skill_id: str, topics: List[dict]) -> List[str]:
+        with self.locks.lock(skill_id):
+            state = self._require_state(skill_id)
+            start = len(state["plan"]["topics"])
+            added = [assign_topic_ids(copy.deepcopy(topic), start + number) for number, topic in enumerate(topics, start=1)]
+            current_topic_id, current_subtopic_id = state["plan"].get("current_topic_id"), state["plan"].get("current_subtopic_id")
+            if current_topic_id is None:
+                current_topic_id, current_subtopic_id = first_pointer(added)
+            event = self._append(skill_id, state, new_event(
+                "topics_added",
+                topics=added,
+                current_topic_id=current_topic_id,
+                current_subtopic_id=current_subtopic_id
+            ))
+            topic_count = len(state["plan"]["topics"])
+            self._update_summary(skill_id, state["plan"], event["at"], state["index"])
+        with self.locks.lock("skills_metadata"):
+            metadata = read_json_for_update(self.metadata_path, {"total_skills": 0, "skills": []})
+            for skill in metadata["skills"]:
+                if skill.get("id") == skill_id:
+                    skill["topic_count"] = max(skill.get("topic_count", 0), topic_count)
+            write_json(self.metadata_path, metadata)
+        return [topic["topic_id"] for topic in added]
+
+    # Plans
+    # The in-memory plan keeps changing under the skill's lock: callers get a copy taken while holding it
+    def get_plan(self, skill_id: str) -> Optional[dict]:
+        with self.locks.thread_lock(skill_id):
+            state = self._state(skill_id)
+            return copy.deepcopy(state["plan"]) if state else None
+
+    def get_progress_pointer(self, skill_id: str) -> Tuple[Optional[str], Optional[str]]:
+        with self.locks.thread_lock(skill_id):
+            plan_config = self._require_state(skill_id)["plan"]
+            return plan_config.get("current_topic_id"), plan_config.get("current_subtopic_id")
+
+    def get_topic(self, skill_id: str, topic_id: str) -> Optional[dict]:
+        with self.locks.thread_lock(skill_id):
+            state = self._state(skill_id)
+            if state is None or topic_id not in state["index"].topics:
+                return None
+            return copy.deepcopy(state["index"].resolve(state["plan"], topic_id)[0])
+
+    def get_skill_version(self, skill_id: str) -> Optional[int]:
+        # Catching up stats the journal, so appends from other worker processes are seen too
+        with self.locks.thread_lock(skill_id):
+            state = self._state(skill_id)
+            return state["seq"] if state else None
+
+    def get_skills_version(self) -> str:
+        # The summary's own counter (bumped by every merge) plus this process's entries not merged yet,
+        # so no plan or journal is read; pending first, as in list_skill_summaries
+        with self._pending_lock:
+            pending = f".{os.getpid()}.{self._summary_changes}" if self._pending_summary else ""
+        return f"{read_json(self.summary_path, {}).get('version', 0)}{pending}"
+
+    def get_plan_index(self, skill_id: str) -> Optional[PlanIndex]:
+        with self.locks.thread_lock(skill_id):
+            state = self._state(skill_id)
+            return state["index"] if state else None
+
+    @staticmethod
+    def _mastery_event(state: dict, topic_id: str, subtopic_id: str, correct_answers: int, total_questions: int) -> dict:
+        topic, subtopic = state["index"].resolve(state["plan"], topic_id, subtopic_id)
+        new_mastery = blend_mastery(subtopic.get("mastery", 0), correct_answers, total_questions)
+        # Topic mastery is the average of its subtopics including the new score
+        masteries = [new_mastery if st is subtopic else st.get("mastery", 0) for st in topic.get("subtopics", [])]
+        return new_event(
+            "mastery_update",
+            topic_id=topic_id,
+            subtopic_id=subtopic_id,
+            correct_answers=correct_answers,
+            total_questions=total_questions,
+            subtopic_mastery=new_mastery,
+            topic_mastery=average_mastery(masteries)
+        )
+
+    @staticmethod
+    def _completion_event(state: dict, topic_id: str, subtopic_id: str) -> dict:
+        topic_ref, ref = state["index"].subtopic(topic_id, subtopic_id)
+        topic = state["plan"]["topics"][topic_ref.index]
+        subtopics = topic.get("subtopics", [])
+        subtopic = subtopics[ref.index]
+        # If all subtopics are done once this one is → topic completed with averaged mastery
+        topic_completed = all(st.get("completed") or st is subtopic for st in subtopics)
+        # Progress pointer moves to the precomputed next subtopic (or next topic's first, or None when done)
+        return new_event(
+            "subtopic_completed",
+            topic_id=topic_id,
+            subtopic_id=subtopic_id,
+            topic_completed=topic_completed,
+            topic_mastery=average_mastery([st.get("mastery", 0) for st in subtopics]) if topic_completed else topic.get("mastery", 0),
+            current_topic_id=ref.next_topic_id,
+            current_subtopic_id=ref.next_subtopic_id
+        )
+
+    def update_subtopic_mastery(self, skill_id: str, topic_id: str, subtopic_id: str, correct_answers: int, total_questions: int) -> float:
+        with self.locks.lock(skill_id):
+            state = self._require_state(skill_id)
+            event = self._mastery_event(state, topic_id, subtopic_id, correct_answers, total_questions)
+            self._append(skill_id, state, event)
+            self._update_summary(skill_id, state["plan"], event["at"], state["index"])
+            return event["subtopic_mastery"]
+
+    def mark_subtopic_completed(self, skill_id: str, topic_id: str, subtopic_id: str) -> Tuple[Optional[str], Optional[str]]:
+        with self.locks.lock(skill_id):
+            state = self._require_state(skill_id)
+            event = self._completion_event(state, topic_id, subtopic_id)
+            self._append(skill_id, state, event)
+            self._update_summary(skill_id, state["plan"], event["at"], state["index"])
+            return event["current_topic_id"], event["current_subtopic_id"]
+
+    def record_quiz_result(self, skill_id: str, topic_id: str, subtopic_id: str, correct_answers: int, total_questions: int) -> Tuple[float, Optional[str], Optional[str]]:
+        with self.locks.lock(skill_id):
+            state = self._require_state(skill_id)
+            mastery = self._mastery_event(state, topic_id, subtopic_id, correct_answers, total_questions)
+            # Completion averages the updated mastery; events are idempotent, so _append re-applying it is harmless
+            apply_event(state["plan"], mastery, state["index"])
+            completion = self._completion_event(state, topic_id, subtopic_id)
+            self._append(skill_id, state, mastery, completion)
+            self._update_summary(skill_id, state["plan"], completion["at"], state["index"])
+            return mastery["subtopic_mastery"], completion["current_topic_id"], completion["current_subtopic_id"]
+
+    # Learning sessions
+    def get_session(self, skill_id: str) -> dict:
+        # The skill's lock keeps the pointer, topic and quiz from straddling a concurrent write in this process
+        with self.locks.thread_lock(skill_id):
+            return super().get_session(skill_id)
+
+    def advance_session(self, skill_id: str, topic_id: str, subtopic_id: str, correct_answers: int, total_questions: int) -> Tuple[float, dict]:
+        with self.locks.lock(skill_id):
+            new_mastery, _, _ = self.record_quiz_result(skill_id, topic_id, subtopic_id, correct_answers, total_questions)
+            return new_mastery, super().get_session(skill_id)
+
+    # Progress history
+    def record_event(self, skill_id: str, event: dict) -> None:
+        with self.locks.lock(skill_id):
+            self._append(skill_id, self._require_state(skill_id), event)
+
+    def list_progress_events(self, skill_id: str, after: int = 0, limit: Optional[int] = None) -> List[dict]:
+        with self.locks.thread_lock(skill_id):
+            self._require_state(skill_id)
+        events = [e for e in self.journal.read_all(self._journal_path(skill_id)) if e.get("seq", 0) > after]
+        return events if limit is None else events[:limit]
+
+    # Quizzes
+    def get_quiz(self, skill_id: str, topic_id: str, subtopic_id: str) -> Optional[dict]:
+        try:
+            quiz_data = read_json(self._quiz_path(skill_id, topic_id))
+        except (OSError, json.JSONDecodeError):
+            return None
+        if quiz_data is None:
+            return None
+        return quiz_data.get(self._quiz_key(subtopic_id))
+
+    def save_quiz(self, skill_id: str, topic_id: str, subtopic_id: str, subtopic_name: str, subtopic_description: Optional[str], quiz_data: dict) -> None:
+        skill_folder = self.learning_skills_path / skill_id
+        skill_folder.mkdir(exist_ok=True)
+        quiz_path = self._quiz_path(skill_id, topic_id)
+        with self.locks.lock(skill_id):
+            try:
+                quizzes = read_json_for_update(quiz_path, {})
+            except json.JSONDecodeError:
+                raise ValueError(f"Invalid JSON format in {quiz_path.name}")
+            quizzes[self._quiz_key(subtopic_id)] = {
+                "subtopic_name": subtopic_name,
+                "subtopic_description": subtopic_description,
+                "quiz_data": quiz_data
+            }
+            write_json(quiz_path, quizzes)
+
+    def close(self) -> None:
+        # Stop the background thread, then fold every journal tail into its snapshot
+        self.journal.close()
+        self._background_tick(compact_after=1)
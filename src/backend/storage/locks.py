@@ -0,0 +1,81 @@
+# src/backend/storage/locks.py
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+class SkillLockManager:
+    """
+    Per-skill write locks that hold across threads and processes
+    - In-process: one RLock per key, so writers to different skills never wait on each other
+    - Across uvicorn workers: an exclusive OS lock on <lock_dir>/<key>.lock (flock, or msvcrt on Windows)
+    - Re-entrant within a thread
+    """
+    def __init__(self, lock_dir: Path):
+        self.lock_dir = Path(lock_dir)
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        self._locks: Dict[str, threading.RLock] = {}
+        self._guard = threading.Lock()
+        self._held = threading.local()
+
+    def thread_lock(self, key: str) -> threading.RLock:
+        """The in-process lock alone (enough for readers of in-memory state)"""
+        with self._guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.RLock()
+            return lock
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        """Exclusive write lock for key in this process and every other process using lock_dir"""
+        with self.thread_lock(key):
+            held: Dict[str, int] = self._held.__dict__.setdefault("counts", {})
+            if held.get(key):
+                held[key] += 1
+                try:
+                    yield
+                finally:
+                    held[key] -= 1
+                return
+            handle = open(self.lock_dir / f"{key}.lock", "a+b")
+            try:
+                self._acquire(handle)
+                held[key] = 1
+                try:
+                    yield
+                finally:
+                    held[key] = 0
+                    self._release(handle)
+            finally:
+                handle.close()
+
+    @staticmethod
+    def _acquire(handle) -> None:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            return
+        handle.seek(0)
+        while True:
+            try:
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK gives up after ~10s; keep waiting like flock does
+                time.sleep(0.05)
+
+    @staticmethod
+    def _release(handle) -> None:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            return
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,76 @@
+# src/backend/storage/migrate.py
+"""
+Import an existing MMagent_learning/ JSON tree into the SQLite learning store
+
+    python -m src.backend.storage.migrate [--root MMagent_learning] [--db MMagent_learning/mentormind.db]
+
+Skills already in the database are skipped, so it is safe to run more than once
+"""
+import argparse
+import json
+from pathlib import Path
+from typing import Dict
+from .json_store import JsonLearningStore
+from .sqlite_store import SqliteLearningStore
+
+def import_json_tree(paths: Dict[str, Path], store: SqliteLearningStore) -> Dict[str, int]:
+    """Copy skills, plans (with mastery, completion and pointer), progress journals and quizzes into store"""
+    counts = {"skills": 0, "skipped": 0, "quizzes": 0}
+    metadata_path = paths["SKILLS_METADATA_PATH"]
+    if not metadata_path.exists() or not json.loads(metadata_path.read_text(encoding="utf-8")).get("skills"):
+        return counts
+    # Plans are read through the JSON store so journal tails not yet compacted are included
+    source = JsonLearningStore(paths)
+    try:
+        for skill in source.list_skills():
+            skill_folder = paths["LEARNING_SKILLS_PATH"] / skill["id"]
+            plan_config = source.get_plan(skill["id"])
+            if plan_config is None:
+                print(f"Skipping {skill['id']}: no plan_config.json")
+                counts["skipped"] += 1
+                continue
+            if not store.import_skill(skill, plan_config):
+                counts["skipped"] += 1
+                continue
+            store.import_events(skill["id"], source.list_progress_events(skill["id"]))
+            counts["skills"] += 1
+            _import_quizzes(skill["id"], skill_folder, store, counts)
+    finally:
+        source.close()
+    print(f"Imported {counts['skills']} skills and {counts['quizzes']} quizzes ({counts['skipped']} skipped)")
+    return counts
+
+def _import_quizzes(skill_id: str, skill_folder: Path, store: SqliteLearningStore, counts: Dict[str, int]) -> None:
+    # quiz_<topic_id>.json is keyed by subtopic number ("1" -> <topic_id>_sub_01)
+    for quiz_path in sorted(skill_folder.glob("quiz_*.json")):
+        topic_id = quiz_path.stem[len("quiz_"):]
+        for subtopic_num, quiz in json.loads(quiz_path.read_text(encoding="utf-8")).items():
+            store.save_quiz(
+                skill_id,
+                topic_id,
+                f"{topic_id}_sub_{int(subtopic_num):02d}",
+                quiz.get("subtopic_name", ""),
+                quiz.get("subtopic_description"),
+                quiz.get("quiz_data", {})
+            )
+            counts["quizzes"] += 1
+
+def main():
+    default_root = Path(__file__).resolve().parents[3] / "MMagent_learning"
+    parser = argparse.ArgumentParser(description="Import MMagent_learning/ JSON files into SQLite")
+    parser.add_argument("--root", type=Path, default=default_root, help="MMagent_learning folder to import")
+    parser.add_argument("--db", type=Path, default=None, help="SQLite database (default: <root>/mentormind.db)")
+    args = parser.parse_args()
+    paths = {
+        "MM_LEARNING_ROOT": args.root,
+        "LEARNING_SKILLS_PATH": args.root / "learning_skills",
+        "SKILLS_METADATA_PATH": args.root / "skills_metadata.json"
+    }
+    store = SqliteLearningStore(args.db or args.root / "mentormind.db")
+    try:
+        import_json_tree(paths, store)
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
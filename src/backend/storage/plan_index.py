@@ -0,0 +1,80 @@
+# src/backend/storage/plan_index.py
+from typing import Dict, Optional, Tuple
+from .base import NotFoundError
+
+class TopicRef:
+    """Where a topic sits in its plan"""
+    __slots__ = ("topic_id", "index", "name", "first_subtopic_id")
+
+    def __init__(self, topic_id: str, index: int, name: str, first_subtopic_id: Optional[str]):
+        self.topic_id = topic_id
+        self.index = index
+        self.name = name
+        self.first_subtopic_id = first_subtopic_id
+
+class SubtopicRef:
+    """Where a subtopic sits in its plan, and the progress pointer that follows it"""
+    __slots__ = ("subtopic_id", "topic_id", "topic_index", "index", "next_topic_id", "next_subtopic_id")
+
+    def __init__(self, subtopic_id: str, topic_id: str, topic_index: int, index: int):
+        self.subtopic_id = subtopic_id
+        self.topic_id = topic_id
+        self.topic_index = topic_index
+        self.index = index
+        self.next_topic_id: Optional[str] = None
+        self.next_subtopic_id: Optional[str] = None
+
+    @property
+    def is_last_in_topic(self) -> bool:
+        return self.next_topic_id != self.topic_id
+
+class PlanIndex:
+    """
+    topic_id / subtopic_id -> position maps over a plan, built once when the plan is loaded
+    - Only structure is indexed (IDs, order, names, next pointers); mastery and completion stay in the plan,
+      so an index stays valid until topics are appended (append_topics), which makes the stores rebuild it
+    - Lookups, and the pointer move when a subtopic is completed, are O(1) instead of scans over topics
+    """
+    __slots__ = ("topics", "subtopics")
+
+    def __init__(self, plan_config: dict):
+        self.topics: Dict[str, TopicRef] = {}
+        self.subtopics: Dict[str, SubtopicRef] = {}
+        previous: Optional[SubtopicRef] = None
+        for topic_index, topic in enumerate(plan_config.get("topics", [])):
+            subtopics = topic.get("subtopics", [])
+            first_subtopic_id = subtopics[0]["subtopic_id"] if subtopics else None
+            self.topics[topic["topic_id"]] = TopicRef(topic["topic_id"], topic_index, topic.get("name", ""), first_subtopic_id)
+            # A topic without subtopics still moves the pointer onto it (with no subtopic), like the routes always did
+            if previous is not None and previous.next_topic_id is None:
+                previous.next_topic_id, previous.next_subtopic_id = topic["topic_id"], first_subtopic_id
+            for index, subtopic in enumerate(subtopics):
+                ref = SubtopicRef(subtopic["subtopic_id"], topic["topic_id"], topic_index, index)
+                if index + 1 < len(subtopics):
+                    ref.next_topic_id, ref.next_subtopic_id = topic["topic_id"], subtopics[index + 1]["subtopic_id"]
+                self.subtopics[ref.subtopic_id] = ref
+                previous = ref
+            if not subtopics:
+                previous = None
+
+    def topic(self, topic_id: str) -> TopicRef:
+        ref = self.topics.get(topic_id)
+        if ref is None:
+            raise NotFoundError(f"Topic {topic_id} not found.")
+        return ref
+
+    def subtopic(self, topic_id: str, subtopic_id: str) -> Tuple[TopicRef, SubtopicRef]:
+        """(topic, subtopic) refs, checked in that order; the subtopic must belong to the topic"""
+        topic = self.topic(topic_id)
+        ref = self.subtopics.get(subtopic_id)
+        if ref is None or ref.topic_id != topic_id:
+            raise NotFoundError(f"Subtopic {subtopic_id} not found.")
+        return topic, ref
+
+    def resolve(self, plan_config: dict, topic_id: str, subtopic_id: Optional[str] = None) -> Tuple[dict, Optional[dict]]:
+        """The topic dict (and subtopic dict) for these IDs in plan_config, without scanning"""
+        if subtopic_id is None:
+            return plan_config["topics"][self.topic(topic_id).index], None
+        topic_ref, ref = self.subtopic(topic_id, subtopic_id)
+        topic = plan_config["topics"][topic_ref.index]
+        return topic, topic["subtopics"][ref.index]
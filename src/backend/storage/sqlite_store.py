@@ -0,0 +1,647 @@
+# src/backend/storage/sqlite_store.py
+import copy
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from .base import SUMMARY_SORTS, LearningStore, NotFoundError, assign_plan_ids, assign_topic_ids, average_mastery, blend_mastery, first_pointer, new_event, skill_mastery_percent
+from .plan_index import PlanIndex
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS skills (
+    seq INTEGER PRIMARY KEY,
+    skill_id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    topic_count INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'active',
+    user_context TEXT NOT NULL DEFAULT '',
+    plan_skill TEXT NOT NULL DEFAULT '',
+    current_topic_id TEXT,
+    current_subtopic_id TEXT
+);
+CREATE TABLE IF NOT EXISTS topics (
+    skill_id TEXT NOT NULL,
+    topic_id TEXT NOT NULL,
+    ord INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT,
+    difficulty TEXT,
+    suggested_time TEXT,
+    focus_areas TEXT NOT NULL DEFAULT '[]',
+    mastery REAL NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (skill_id, topic_id)
+);
+CREATE INDEX IF NOT EXISTS idx_topics_order ON topics (skill_id, ord);
+CREATE TABLE IF NOT EXISTS subtopics (
+    skill_id TEXT NOT NULL,
+    topic_id TEXT NOT NULL,
+    subtopic_id TEXT NOT NULL,
+    ord INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT,
+    mastery REAL NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (skill_id, subtopic_id)
+);
+CREATE INDEX IF NOT EXISTS idx_subtopics_order ON subtopics (skill_id, topic_id, ord);
+CREATE TABLE IF NOT EXISTS quizzes (
+    skill_id TEXT NOT NULL,
+    topic_id TEXT NOT NULL,
+    subtopic_id TEXT NOT NULL,
+    subtopic_name TEXT NOT NULL DEFAULT '',
+    subtopic_description TEXT,
+    question_count INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (skill_id, topic_id, subtopic_id)
+);
+CREATE TABLE IF NOT EXISTS questions (
+    skill_id TEXT NOT NULL,
+    topic_id TEXT NOT NULL,
+    subtopic_id TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    q TEXT NOT NULL,
+    a TEXT NOT NULL,
+    e TEXT NOT NULL,
+    PRIMARY KEY (skill_id, topic_id, subtopic_id, number)
+);
+CREATE TABLE IF NOT EXISTS progress_events (
+    skill_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    at TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (skill_id, seq)
+);
+"""
+
+# Skill summary index behind /plan/all-skills, kept current by every write to a skill's plan
+SUMMARY_COLUMNS = {
+    "mastery_sum": "REAL NOT NULL DEFAULT 0",  # sum of topic mastery (average = mastery_sum / topic_count)
+    "current_topic": "TEXT",  # name of current_topic_id
+    "last_activity": "TEXT"
+}
+
+# Skill columns added after the first schema: name -> type (NULL on rows stored before them)
+SKILL_COLUMNS = {
+    "planned_topics": "INTEGER"  # topic count of the whole plan, while append_topics is still adding to it
+}
+
+SUMMARY_ORDER = {
+    "created": "seq",
+    "mastery": "CASE WHEN topic_count > 0 THEN mastery_sum / topic_count ELSE 0 END DESC, seq",
+    "recent": "last_activity DESC, seq"
+}
+
+class SqliteLearningStore(LearningStore):
+    """
+    SQLite (WAL) learning store: one row per skill, topic, subtopic, quiz and question
+    - Mastery/completion changes touch only the affected rows, so write cost does not grow with plan size
+    - Every change is also appended to progress_events in the same transaction (history for analytics)
+    - Lookups go through the primary keys / (skill_id, ord) indexes
+    - One connection per thread; writes run in BEGIN IMMEDIATE transactions
+    """
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        # Plan structure only changes when topics are appended, so each skill's index is built once per append
+        self._indexes: Dict[str, PlanIndex] = {}
+        self._connect().executescript(SCHEMA)
+        self._add_skill_columns()
+        self._add_summary_columns()
+
+    def _add_skill_columns(self) -> None:
+        with self._transaction() as conn:
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(skills)")}
+            for name in SKILL_COLUMNS:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE skills ADD COLUMN {name} {SKILL_COLUMNS[name]}")
+
+    def _add_summary_columns(self) -> None:
+        """Add (and backfill) the summary index on databases created before it existed"""
+        with self._transaction() as conn:
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(skills)")}
+            missing = [name for name in SUMMARY_COLUMNS if name not in existing]
+            for name in missing:
+                conn.execute(f"ALTER TABLE skills ADD COLUMN {name} {SUMMARY_COLUMNS[name]}")
+            if missing:
+                conn.execute(
+                    """
+                    UPDATE skills SET
+                        mastery_sum = (SELECT COALESCE(SUM(mastery), 0) FROM topics t WHERE t.skill_id = skills.skill_id),
+                        current_topic = (SELECT name FROM topics t WHERE t.skill_id = skills.skill_id AND t.topic_id = skills.current_topic_id),
+                        last_activity = created_at
+                    """
+                )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_skills_activity ON skills (last_activity)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: transactions are opened explicitly in _transaction
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _transaction(self, immediate: bool = True) -> Iterator[sqlite3.Connection]:
+        """Write transaction (BEGIN IMMEDIATE), or with immediate=False a read snapshot"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _skill_entry(row: sqlite3.Row) -> dict:
+        # Same shape as the entries in skills_metadata.json
+        return {
+            "id": row["skill_id"],
+            "name": row["name"],
+            "created_at": row["created_at"],
+            "topic_count": row["topic_count"],
+            "planned_topics": row["planned_topics"] or row["topic_count"],
+            "status": row["status"],
+            "user_context": row["user_context"]
+        }
+
+    @staticmethod
+    def _subtopic_dict(row: sqlite3.Row) -> dict:
+        return {
+            "name": row["name"],
+            "description": row["description"],
+            "subtopic_id": row["subtopic_id"],
+            "order": row["ord"],
+            "completed": bool(row["completed"]),
+            "mastery": row["mastery"]
+        }
+
+    @staticmethod
+    def _topic_dict(row: sqlite3.Row, subtopics: List[dict]) -> dict:
+        return {
+            "name": row["name"],
+            "description": row["description"],
+            "subtopics": subtopics,
+            "difficulty": row["difficulty"],
+            "suggested_time": row["suggested_time"],
+            "focus_areas": json.loads(row["focus_areas"]),
+            "topic_id": row["topic_id"],
+            "order": row["ord"],
+            "mastery": row["mastery"],
+            "completed": bool(row["completed"])
+        }
+
+    # Skills
+    def list_skills(self) -> List[dict]:
+        rows = self._connect().execute("SELECT * FROM skills ORDER BY seq").fetchall()
+        return [self._skill_entry(row) for row in rows]
+
+    def get_skill(self, skill_id: str) -> Optional[dict]:
+        row = self._connect().execute("SELECT * FROM skills WHERE skill_id = ?", (skill_id,)).fetchone()
+        return self._skill_entry(row) if row else None
+
+    def list_skill_summaries(self, sort: str = "created", limit: Optional[int] = None, offset: int = 0) -> Tuple[List[dict], int]:
+        if sort not in SUMMARY_SORTS:
+            raise ValueError(f"Unknown sort: {sort}")
+        conn = self._connect()
+        rows = conn.execute(
+            f"""
+            SELECT skill_id, name, mastery_sum, topic_count, current_topic_id, current_topic, last_activity
+            FROM skills ORDER BY {SUMMARY_ORDER[sort]} LIMIT ? OFFSET ?
+            """,
+            (-1 if limit is None else limit, offset)
+        ).fetchall()
+        total = conn.execute("SELECT COUNT(*) FROM skills").fetchone()[0]
+        return [
+            {
+                "skill_id": row["skill_id"],
+                "name": row["name"] or "Unnamed Skill",
+                "mastery": skill_mastery_percent(row["mastery_sum"], row["topic_count"]),
+                "topic_count": row["topic_count"],
+                "current_topic_id": row["current_topic_id"],
+                "current_topic": row["current_topic"],
+                "last_activity": row["last_activity"]
+            }
+            for row in rows
+        ], total
+
+    def create_skill(self, skill_name: str, user_context: str, plan_dict: dict, planned_topics: Optional[int] = None) -> str:
+        plan_dict = assign_plan_ids(plan_dict)
+        with self._transaction() as conn:
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM skills").fetchone()[0]
+            skill_id = f"skill_{seq:03d}"
+            skill = {
+                "id": skill_id,
+                "name": skill_name,
+                "created_at": datetime.now().isoformat(),
+                "topic_count": len(plan_dict["topics"]),
+                "planned_topics": planned_topics or len(plan_dict["topics"]),
+                "status": "active",
+                "user_context": user_context
+            }
+            self._insert_skill(conn, seq, skill, plan_dict)
+        print(f"Created skill: {skill_id}")
+        return skill_id
+
+    def import_skill(self, skill: dict, plan_config: dict) -> bool:
+        """Insert a skill from the JSON layout as-is (IDs, mastery, pointer); False if it already exists"""
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM skills WHERE skill_id = ?", (skill["id"],)).fetchone():
+                return False
+            number = skill["id"].rsplit("_", 1)[-1]
+            taken = number.isdigit() and conn.execute("SELECT 1 FROM skills WHERE seq = ?", (int(number),)).fetchone()
+            seq = int(number) if number.isdigit() and not taken else conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM skills").fetchone()[0]
+            self._insert_skill(conn, seq, skill, plan_config)
+        return True
+
+    @staticmethod
+    def _insert_skill(conn: sqlite3.Connection, seq: int, skill: dict, plan_config: dict) -> None:
+        topics = plan_config.get("topics", [])
+        current_topic = next((t for t in topics if t.get("topic_id") == plan_config.get("current_topic_id")), None)
+        created_at = skill.get("created_at") or datetime.now().isoformat()
+        conn.execute(
+            """
+            INSERT INTO skills (seq, skill_id, name, created_at, topic_count, planned_topics, status, user_context,
+                                plan_skill, current_topic_id, current_subtopic_id,
+                                mastery_sum, current_topic, last_activity)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (seq, skill["id"], skill.get("name", "Unnamed Skill"), created_at,
+             len(topics), skill.get("planned_topics"), skill.get("status", "active"),
+             skill.get("user_context", ""), plan_config.get("skill", ""),
+             plan_config.get("current_topic_id"), plan_config.get("current_subtopic_id"),
+             sum(t.get("mastery", 0) for t in topics), current_topic["name"] if current_topic else None, created_at)
+        )
+        SqliteLearningStore._insert_topics(conn, skill["id"], topics)
+
+    @staticmethod
+    def _insert_topics(conn: sqlite3.Connection, skill_id: str, topics: List[dict]) -> None:
+        for topic in topics:
+            conn.execute(
+                """
+                INSERT INTO topics (skill_id, topic_id, ord, name, description, difficulty, suggested_time,
+                                    focus_areas, mastery, completed)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (skill_id, topic["topic_id"], topic["order"], topic["name"], topic.get("description"),
+                 topic.get("difficulty"), topic.get("suggested_time"), json.dumps(topic.get("focus_areas", [])),
+                 topic.get("mastery", 0), int(bool(topic.get("completed"))))
+            )
+            conn.executemany(
+                """
+                INSERT INTO subtopics (skill_id, topic_id, subtopic_id, ord, name, description, mastery, completed)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (skill_id, topic["topic_id"], st["subtopic_id"], st["order"], st["name"], st.get("description"),
+                     st.get("mastery", 0), int(bool(st.get("completed"))))
+                    for st in topic.get("subtopics", [])
+                ]
+            )
+
+    def append_topics(self, skill_id: str, topics: List[dict]) -> List[str]:
+        with self._transaction() as conn:
+            skill = conn.execute(
+                "SELECT topic_count, current_topic_id, current_subtopic_id, current_topic FROM skills WHERE skill_id = ?", (skill_id,)
+            ).fetchone()
+            if skill is None:
+                raise NotFoundError("Plan config not found for this skill.")
+            added = [assign_topic_ids(copy.deepcopy(topic), skill["topic_count"] + number) for number, topic in enumerate(topics, start=1)]
+            self._insert_topics(conn, skill_id, added)
+            current_topic_id, current_subtopic_id, current_topic = skill["current_topic_id"], skill["current_subtopic_id"], skill["current_topic"]
+            if current_topic_id is None and added:
+                (current_topic_id, current_subtopic_id), current_topic = first_pointer(added), added[0]["name"]
+            event = self._append_event(conn, skill_id, new_event(
+                "topics_added",
+                topics=added,
+                current_topic_id=current_topic_id,
+                current_subtopic_id=current_subtopic_id
+            ))
+            # New topics start at mastery 0, so mastery_sum is unchanged
+            conn.execute(
+                """
+                UPDATE skills SET topic_count = topic_count + ?, current_topic_id = ?, current_subtopic_id = ?,
+                    current_topic = ?, last_activity = ?
+                WHERE skill_id = ?
+                """,
+                (len(added), current_topic_id, current_subtopic_id, current_topic, event["at"], skill_id)
+            )
+        self._indexes.pop(skill_id, None)
+        return [topic["topic_id"] for topic in added]
+
+    # Plans
+    def get_plan(self, skill_id: str) -> Optional[dict]:
+        conn = self._connect()
+        skill = conn.execute("SELECT * FROM skills WHERE skill_id = ?", (skill_id,)).fetchone()
+        if skill is None:
+            return None
+        subtopics: Dict[str, List[dict]] = {}
+        for row in conn.execute("SELECT * FROM subtopics WHERE skill_id = ? ORDER BY topic_id, ord", (skill_id,)):
+            subtopics.setdefault(row["topic_id"], []).append(self._subtopic_dict(row))
+        topics = [
+            self._topic_dict(row, subtopics.get(row["topic_id"], []))
+            for row in conn.execute("SELECT * FROM topics WHERE skill_id = ? ORDER BY ord", (skill_id,))
+        ]
+        return {
+            "skill": skill["plan_skill"],
+            "topics": topics,
+            "total_topics": len(topics),
+            "current_topic_id": skill["current_topic_id"],
+            "current_subtopic_id": skill["current_subtopic_id"]
+        }
+
+    def get_progress_pointer(self, skill_id: str) -> Tuple[Optional[str], Optional[str]]:
+        row = self._connect().execute(
+            "SELECT current_topic_id, current_subtopic_id FROM skills WHERE skill_id = ?", (skill_id,)
+        ).fetchone()
+        if row is None:
+            raise NotFoundError("Plan config not found for this skill.")
+        return row["current_topic_id"], row["current_subtopic_id"]
+
+    def get_topic(self, skill_id: str, topic_id: str) -> Optional[dict]:
+        conn = self._connect()
+        row = conn.execute("SELECT * FROM topics WHERE skill_id = ? AND topic_id = ?", (skill_id, topic_id)).fetchone()
+        if row is None:
+            return None
+        subtopics = conn.execute(
+            "SELECT * FROM subtopics WHERE skill_id = ? AND topic_id = ? ORDER BY ord", (skill_id, topic_id)
+        ).fetchall()
+        return self._topic_dict(row, [self._subtopic_dict(st) for st in subtopics])
+
+    def get_skill_version(self, skill_id: str) -> Optional[int]:
+        # Every plan/progress write appends an event in the same transaction; MAX(seq) is a primary key lookup
+        row = self._connect().execute(
+            """
+            SELECT (SELECT COALESCE(MAX(seq), 0) FROM progress_events WHERE skill_id = ?) AS version
+            FROM skills WHERE skill_id = ?
+            """,
+            (skill_id, skill_id)
+        ).fetchone()
+        return row["version"] if row else None
+
+    def get_skills_version(self) -> str:
+        row = self._connect().execute(
+            "SELECT (SELECT COUNT(*) FROM skills) AS skills, (SELECT COALESCE(MAX(rowid), 0) FROM progress_events) AS events"
+        ).fetchone()
+        return f"{row['skills']}.{row['events']}"
+
+    def get_plan_index(self, skill_id: str) -> Optional[PlanIndex]:
+        conn = self._connect()
+        index = self._indexes.get(skill_id)
+        if index is not None:
+            # Topics appended by another process since the index was built make it stale
+            row = conn.execute("SELECT topic_count FROM skills WHERE skill_id = ?", (skill_id,)).fetchone()
+            if row is not None and row["topic_count"] == len(index.topics):
+                return index
+        subtopics: Dict[str, List[dict]] = {}
+        for row in conn.execute("SELECT topic_id, subtopic_id FROM subtopics WHERE skill_id = ? ORDER BY topic_id, ord", (skill_id,)):
+            subtopics.setdefault(row["topic_id"], []).append({"subtopic_id": row["subtopic_id"]})
+        topics = [
+            {"topic_id": row["topic_id"], "name": row["name"], "subtopics": subtopics.get(row["topic_id"], [])}
+            for row in conn.execute("SELECT topic_id, name FROM topics WHERE skill_id = ? ORDER BY ord", (skill_id,))
+        ]
+        if not topics and not conn.execute("SELECT 1 FROM skills WHERE skill_id = ?", (skill_id,)).fetchone():
+            return None
+        index = self._indexes[skill_id] = PlanIndex({"topics": topics})
+        return index
+
+    @staticmethod
+    def _locate(conn: sqlite3.Connection, skill_id: str, topic_id: str, subtopic_id: str) -> Tuple[sqlite3.Row, sqlite3.Row]:
+        """(topic row, subtopic row) or NotFoundError, checked in the same order as the JSON store"""
+        if not conn.execute("SELECT 1 FROM skills WHERE skill_id = ?", (skill_id,)).fetchone():
+            raise NotFoundError("Plan config not found for this skill.")
+        topic = conn.execute("SELECT ord, mastery FROM topics WHERE skill_id = ? AND topic_id = ?", (skill_id, topic_id)).fetchone()
+        if topic is None:
+            raise NotFoundError(f"Topic {topic_id} not found.")
+        subtopic = conn.execute(
+            "SELECT ord, mastery FROM subtopics WHERE skill_id = ? AND subtopic_id = ? AND topic_id = ?",
+            (skill_id, subtopic_id, topic_id)
+        ).fetchone()
+        if subtopic is None:
+            raise NotFoundError(f"Subtopic {subtopic_id} not found.")
+        return topic, subtopic
+
+    @staticmethod
+    def _append_event(conn: sqlite3.Connection, skill_id: str, event: dict) -> dict:
+        seq = conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM progress_events WHERE skill_id = ?", (skill_id,)).fetchone()[0]
+        event["seq"] = seq
+        data = {k: v for k, v in event.items() if k not in ("seq", "type", "at")}
+        conn.execute(
+            "INSERT INTO progress_events (skill_id, seq, type, at, data) VALUES (?, ?, ?, ?, ?)",
+            (skill_id, seq, event["type"], event["at"], json.dumps(data))
+        )
+        return event
+
+    @staticmethod
+    def _topic_masteries(conn: sqlite3.Connection, skill_id: str, topic_id: str) -> List[sqlite3.Row]:
+        return conn.execute(
+            "SELECT mastery, completed FROM subtopics WHERE skill_id = ? AND topic_id = ?", (skill_id, topic_id)
+        ).fetchall()
+
+    def _apply_mastery(self, conn: sqlite3.Connection, skill_id: str, topic_id: str, subtopic_id: str, correct_answers: int, total_questions: int) -> float:
+        topic, subtopic = self._locate(conn, skill_id, topic_id, subtopic_id)
+        new_mastery = blend_mastery(subtopic["mastery"], correct_answers, total_questions)
+        conn.execute(
+            "UPDATE subtopics SET mastery = ? WHERE skill_id = ? AND subtopic_id = ?",
+            (new_mastery, skill_id, subtopic_id)
+        )
+        # Recalculate topic mastery as average of subtopics
+        topic_mastery = average_mastery([row["mastery"] for row in self._topic_masteries(conn, skill_id, topic_id)])
+        conn.execute(
+            "UPDATE topics SET mastery = ? WHERE skill_id = ? AND topic_id = ?",
+            (topic_mastery, skill_id, topic_id)
+        )
+        event = self._append_event(conn, skill_id, new_event(
+            "mastery_update",
+            topic_id=topic_id,
+            subtopic_id=subtopic_id,
+            correct_answers=correct_answers,
+            total_questions=total_questions,
+            subtopic_mastery=new_mastery,
+            topic_mastery=topic_mastery
+        ))
+        # Summary index: shift the skill's mastery sum by this topic's change
+        conn.execute(
+            "UPDATE skills SET mastery_sum = mastery_sum + ?, last_activity = ? WHERE skill_id = ?",
+            (topic_mastery - topic["mastery"], event["at"], skill_id)
+        )
+        return new_mastery
+
+    def _apply_completion(self, conn: sqlite3.Connection, skill_id: str, topic_id: str, subtopic_id: str) -> Tuple[Optional[str], Optional[str]]:
+        topic, subtopic = self._locate(conn, skill_id, topic_id, subtopic_id)
+        conn.execute(
+            "UPDATE subtopics SET completed = 1 WHERE skill_id = ? AND subtopic_id = ?", (skill_id, subtopic_id)
+        )
+        # If all subtopics done → mark topic completed and average its mastery
+        rows = self._topic_masteries(conn, skill_id, topic_id)
+        mastery_change = 0
+        topic_completed = all(row["completed"] for row in rows)
+        topic_mastery = topic["mastery"]
+        if topic_completed:
+            topic_mastery = average_mastery([row["mastery"] for row in rows])
+            mastery_change = topic_mastery - topic["mastery"]
+            conn.execute(
+                "UPDATE topics SET completed = 1, mastery = ? WHERE skill_id = ? AND topic_id = ?",
+                (topic_mastery, skill_id, topic_id)
+            )
+        # Move progress pointer to the precomputed next subtopic (or next topic's first, or None when done)
+        index = self.get_plan_index(skill_id)
+        _, ref = index.subtopic(topic_id, subtopic_id)
+        current_topic_id, current_subtopic_id = ref.next_topic_id, ref.next_subtopic_id
+        current_topic = index.topics[current_topic_id].name if current_topic_id else None
+        event = self._append_event(conn, skill_id, new_event(
+            "subtopic_completed",
+            topic_id=topic_id,
+            subtopic_id=subtopic_id,
+            topic_completed=topic_completed,
+            topic_mastery=topic_mastery,
+            current_topic_id=current_topic_id,
+            current_subtopic_id=current_subtopic_id
+        ))
+        # Pointer plus summary index (current topic name only changes when the topic does)
+        conn.execute(
+            """
+            UPDATE skills SET current_topic_id = ?, current_subtopic_id = ?,
+                current_topic = CASE WHEN ? THEN current_topic ELSE ? END,
+                mastery_sum = mastery_sum + ?, last_activity = ?
+            WHERE skill_id = ?
+            """,
+            (current_topic_id, current_subtopic_id, current_topic_id == topic_id, current_topic,
+             mastery_change, event["at"], skill_id)
+        )
+        return current_topic_id, current_subtopic_id
+
+    def update_subtopic_mastery(self, skill_id: str, topic_id: str, subtopic_id: str, correct_answers: int, total_questions: int) -> float:
+        with self._transaction() as conn:
+            return self._apply_mastery(conn, skill_id, topic_id, subtopic_id, correct_answers, total_questions)
+
+    def mark_subtopic_completed(self, skill_id: str, topic_id: str, subtopic_id: str) -> Tuple[Optional[str], Optional[str]]:
+        with self._transaction() as conn:
+            return self._apply_completion(conn, skill_id, topic_id, subtopic_id)
+
+    def record_quiz_result(self, skill_id: str, topic_id: str, subtopic_id: str, correct_answers: int, total_questions: int) -> Tuple[float, Optional[str], Optional[str]]:
+        # One BEGIN IMMEDIATE transaction (one commit / WAL sync) for both updates
+        with self._transaction() as conn:
+            new_mastery = self._apply_mastery(conn, skill_id, topic_id, subtopic_id, correct_answers, total_questions)
+            current_topic_id, current_subtopic_id = self._apply_completion(conn, skill_id, topic_id, subtopic_id)
+        return new_mastery, current_topic_id, current_subtopic_id
+
+    # Learning sessions
+    def get_session(self, skill_id: str) -> dict:
+        # The reads use this thread's connection, so they all see the transaction's snapshot
+        with self._transaction(immediate=False):
+            return super().get_session(skill_id)
+
+    def advance_session(self, skill_id: str, topic_id: str, subtopic_id: str, correct_answers: int, total_questions: int) -> Tuple[float, dict]:
+        with self._transaction() as conn:
+            new_mastery = self._apply_mastery(conn, skill_id, topic_id, subtopic_id, correct_answers, total_questions)
+            self._apply_completion(conn, skill_id, topic_id, subtopic_id)
+            return new_mastery, super().get_session(skill_id)
+
+    # Progress history
+    def record_event(self, skill_id: str, event: dict) -> None:
+        with self._transaction() as conn:
+            if not conn.execute("SELECT 1 FROM skills WHERE skill_id = ?", (skill_id,)).fetchone():
+                raise NotFoundError("Plan config not found for this skill.")
+            self._append_event(conn, skill_id, event)
+
+    def import_events(self, skill_id: str, events: List[dict]) -> None:
+        """Copy journal events from the JSON layout, keeping their seq"""
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO progress_events (skill_id, seq, type, at, data) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (skill_id, event["seq"], event["type"], event["at"],
+                     json.dumps({k: v for k, v in event.items() if k not in ("seq", "type", "at")}))
+                    for event in events
+                ]
+            )
+
+    def list_progress_events(self, skill_id: str, after: int = 0, limit: Optional[int] = None) -> List[dict]:
+        conn = self._connect()
+        if not conn.execute("SELECT 1 FROM skills WHERE skill_id = ?", (skill_id,)).fetchone():
+            raise NotFoundError("Plan config not found for this skill.")
+        rows = conn.execute(
+            "SELECT seq, type, at, data FROM progress_events WHERE skill_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+            (skill_id, after, -1 if limit is None else limit)
+        ).fetchall()
+        return [{"type": row["type"], "at": row["at"], **json.loads(row["data"]), "seq": row["seq"]} for row in rows]
+
+    # Quizzes
+    def get_quiz(self, skill_id: str, topic_id: str, subtopic_id: str) -> Optional[dict]:
+        conn = self._connect()
+        quiz = conn.execute(
+            "SELECT * FROM quizzes WHERE skill_id = ? AND topic_id = ? AND subtopic_id = ?",
+            (skill_id, topic_id, subtopic_id)
+        ).fetchone()
+        if quiz is None:
+            return None
+        questions = conn.execute(
+            "SELECT q, a, e FROM questions WHERE skill_id = ? AND topic_id = ? AND subtopic_id = ? ORDER BY number",
+            (skill_id, topic_id, subtopic_id)
+        ).fetchall()
+        return {
+            "subtopic_name": quiz["subtopic_name"],
+            "subtopic_description": quiz["subtopic_description"],
+            "quiz_data": {"questions": [{"Q": row["q"], "A": row["a"], "E": row["e"]} for row in questions]}
+        }
+
+    def get_question(self, skill_id: str, topic_id: str, subtopic_id: str, question_number: int) -> Optional[Tuple[Optional[dict], int, str]]:
+        conn = self._connect()
+        quiz = conn.execute(
+            "SELECT subtopic_name, question_count FROM quizzes WHERE skill_id = ? AND topic_id = ? AND subtopic_id = ?",
+            (skill_id, topic_id, subtopic_id)
+        ).fetchone()
+        if quiz is None:
+            return None
+        row = conn.execute(
+            "SELECT q, a, e FROM questions WHERE skill_id = ? AND topic_id = ? AND subtopic_id = ? AND number = ?",
+            (skill_id, topic_id, subtopic_id, question_number)
+        ).fetchone()
+        question = {"Q": row["q"], "A": row["a"], "E": row["e"]} if row else None
+        return question, quiz["question_count"], quiz["subtopic_name"]
+
+    def save_quiz(self, skill_id: str, topic_id: str, subtopic_id: str, subtopic_name: str, subtopic_description: Optional[str], quiz_data: dict) -> None:
+        questions = quiz_data.get("questions", [])
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO quizzes (skill_id, topic_id, subtopic_id, subtopic_name, subtopic_description,
+                                                question_count, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (skill_id, topic_id, subtopic_id, subtopic_name, subtopic_description, len(questions), datetime.now().isoformat())
+            )
+            conn.execute(
+                "DELETE FROM questions WHERE skill_id = ? AND topic_id = ? AND subtopic_id = ?",
+                (skill_id, topic_id, subtopic_id)
+            )
+            conn.executemany(
+                "INSERT INTO questions (skill_id, topic_id, subtopic_id, number, q, a, e) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (skill_id, topic_id, subtopic_id, number, q.get("Q", ""), q.get("A", ""), q.get("E", ""))
+                    for number, q in enumerate(questions, start=1)
+                ]
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
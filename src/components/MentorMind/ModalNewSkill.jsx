@@ -1,7 +1,6 @@
 // src/components/MentorMind/ModalNewSkill.jsx
-import React, { useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import './Modal.css';
-import axios from 'axios';
 
 const ModalNewSkill = ({ onClose, onSkillSelect }) => {
   const [skillName, setSkillName] = useState('');
@@ -9,32 +8,105 @@ const ModalNewSkill = ({ onClose, onSkillSelect }) => {
   const [style, setStyle] = useState('');
   const [level, setLevel] = useState('');
   const [loading, setLoading] = useState(false);
+  // Plan progress from /plan/create-skill-plan/stream: outline topic names, topics stored so far, new skill ID
+  const [topicNames, setTopicNames] = useState([]);
+  const [readyTopics, setReadyTopics] = useState(0);
+  const [skillId, setSkillId] = useState(null);
+  const planStreamRef = useRef(null);
+
+  // Stop reading the stream when the modal closes (the backend keeps generating the rest of the plan)
+  useEffect(() => {
+    return () => planStreamRef.current?.abort();
+  }, []);
+
+  const openSkill = (id) => {
+    planStreamRef.current?.abort();
+    onSkillSelect(id);
+    onClose();
+  };
 
   const handleSubmit = async () => {
     setLoading(true);
+    setTopicNames([]);
+    setReadyTopics(0);
+    setSkillId(null);
+    const controller = new AbortController();
+    planStreamRef.current = controller;
     try {
       const context = JSON.stringify({
         target,
         style,
         level
       });
-      const res = await axios.post('http://127.0.0.1:8000/plan/create-skill-plan', 
-        {
+      const response = await fetch('http://127.0.0.1:8000/plan/create-skill-plan/stream', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
           skill_name: skillName,
           user_context: context
+        }),
+        signal: controller.signal
+      });
+      if (!response.ok || !response.body) {
+        throw new Error(`Plan request failed with status ${response.status}`);
+      }
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        // SSE events are separated by a blank line
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        for (const rawEvent of events) {
+          let eventType = 'message';
+          let data = '';
+          for (const line of rawEvent.split('\n')) {
+            if (line.startsWith('event:')) eventType = line.slice(6).trim();
+            else if (line.startsWith('data:')) data += line.slice(5).trim();
+          }
+          if (!data) continue;
+          const payload = JSON.parse(data);
+          if (eventType === 'error') {
+            // Topics stored before the failure stay usable
+            if (payload.skill_id) {
+              alert('Only part of the skill plan could be generated');
+              openSkill(payload.skill_id);
+              return;
+            }
+            throw new Error(payload.detail);
+          }
+          if (eventType === 'outline') setTopicNames(payload.topics);
+          if (eventType === 'topic') {
+            // The skill can be opened as soon as its first topic is stored
+            setSkillId(payload.skill_id);
+            setReadyTopics(payload.order);
+          }
+          if (eventType === 'done') {
+            console.log('Plan created:', payload);
+            openSkill(payload.skill_id);
+            return;
+          }
         }
-      );
-      console.log('Plan created:', res.data);
-      onSkillSelect(res.data.skill_id);
-      onClose();
+      }
     } catch (err) {
-      console.error('Error details:', err.response?.data || err.message);
+      if (err.name === 'AbortError') return;
+      console.error('Error details:', err.message);
       alert('Error generating skill plan');
     } finally {
-      setLoading(false);
+      if (planStreamRef.current === controller) {
+        planStreamRef.current = null;
+        setLoading(false);
+      }
     }
   };
 
+  const progressLabel = topicNames.length
+    ? `Generating... ${readyTopics}/${topicNames.length} topics`
+    : 'Generating...';
+
   return (
     <div className="modal-overlay">
       <div className="modal-content">
@@ -43,8 +115,18 @@ const ModalNewSkill = ({ onClose, onSkillSelect }) => {
         <input type="text" placeholder="Why to learn / Target" value={target} onChange={e => setTarget(e.target.value)} />
         <input type="text" placeholder="Preferred style/speed" value={style} onChange={e => setStyle(e.target.value)} />
         <input type="text" placeholder="Current level" value={level} onChange={e => setLevel(e.target.value)} />
+        {topicNames.length > 0 && (
+          <ol className="plan-progress">
+            {topicNames.map((name, index) => (
+              <li key={index} className={index < readyTopics ? 'ready' : ''}>{name}</li>
+            ))}
+          </ol>
+        )}
         <div className="modal-actions">
-          <button onClick={handleSubmit} disabled={loading}>{loading ? 'Generating...' : 'Create Plan'}</button>
+          {skillId && loading && (
+            <button onClick={() => openSkill(skillId)}>Start learning</button>
+          )}
+          <button onClick={handleSubmit} disabled={loading}>{loading ? progressLabel : 'Create Plan'}</button>
           <button onClick={onClose} className="secondary">Cancel</button>
         </div>
       </div>
@@ -1,5 +1,5 @@
 // src/pages/MM/MentorMind.jsx
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import ReactMarkdown from 'react-markdown';
 import remarkGfm from 'remark-gfm';
@@ -18,6 +18,9 @@ const MentorMind = () => {
   const [userQuery, setUserQuery] = useState('');
   const [aiResponse, setAiResponse] = useState('');
   const [isLoadingResponse, setIsLoadingResponse] = useState(false);
+  const chatStreamRef = useRef(null);
+  // One chat session per page load; the backend keeps its history per skill within it
+  const chatSessionRef = useRef(crypto.randomUUID());
   const [allSubtopics, setAllSubtopics] = useState([]);
   // Quiz-related state
   // 'idle', 'learning', 'question', 'evaluation'
@@ -28,6 +31,8 @@ const MentorMind = () => {
   const [currentQuestionNumber, setCurrentQuestionNumber] = useState(1);
   const [showContinueButton, setShowContinueButton] = useState(false);
   const [correctAnswersCount, setCorrectAnswersCount] = useState(0);
+  // Questions of the current subtopic's quiz (delivered with the session)
+  const [quizQuestions, setQuizQuestions] = useState([]);
 
 
   // Load saved skill ID on mount (only once)
@@ -78,6 +83,7 @@ const MentorMind = () => {
     setCurrentQuestionNumber(1);
     setShowContinueButton(false);
     setCorrectAnswersCount(0);
+    setQuizQuestions([]);
   };
 
   // Handler to update skill ID
@@ -100,24 +106,74 @@ const MentorMind = () => {
     console.log('Current skill ID changed to:', currentSkillId);
   }, [currentSkillId]);
 
-  // Handle chat submission
+  // Handle chat submission (answer is streamed from /chat/ask/stream as Server-Sent Events)
   const handleChatSubmit = async () => {
     if (!userQuery.trim()) return;
+    // Abandon any answer that is still streaming so the backend stops generating it
+    chatStreamRef.current?.abort();
+    const controller = new AbortController();
+    chatStreamRef.current = controller;
     setIsLoadingResponse(true);
+    setAiResponse('');
     try {
-      const response = await axios.post('http://127.0.0.1:8000/chat/ask', {
-        user_query: userQuery,
-        skill_id: currentSkillId
+      const response = await fetch('http://127.0.0.1:8000/chat/ask/stream', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          user_query: userQuery,
+          skill_id: currentSkillId,
+          topic_id: skillDetails?.current_topic_id,
+          session_id: chatSessionRef.current
+        }),
+        signal: controller.signal
       });
-      setAiResponse(response.data.response);
+      if (!response.ok || !response.body) {
+        throw new Error(`Chat request failed with status ${response.status}`);
+      }
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        // SSE events are separated by a blank line
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        for (const rawEvent of events) {
+          let eventType = 'message';
+          let data = '';
+          for (const line of rawEvent.split('\n')) {
+            if (line.startsWith('event:')) eventType = line.slice(6).trim();
+            else if (line.startsWith('data:')) data += line.slice(5).trim();
+          }
+          if (!data) continue;
+          const payload = JSON.parse(data);
+          if (eventType === 'error') throw new Error(payload.detail);
+          if (eventType === 'message') {
+            // Show the first chunk as soon as it arrives
+            setIsLoadingResponse(false);
+            setAiResponse(prev => prev + payload.text);
+          }
+        }
+      }
     } catch (error) {
+      if (error.name === 'AbortError') return;
       console.error('Error getting AI response:', error);
       setAiResponse('Sorry, I encountered an error. Please try again.');
     } finally {
-      setIsLoadingResponse(false);
+      if (chatStreamRef.current === controller) {
+        chatStreamRef.current = null;
+        setIsLoadingResponse(false);
+      }
     }
   };
 
+  // Stop any in-flight chat stream when leaving the page
+  useEffect(() => {
+    return () => chatStreamRef.current?.abort();
+  }, []);
+
   // Handle Enter key press in textarea
   const handleKeyPress = (e) => {
     if (e.key === 'Enter' && !e.shiftKey) {
@@ -135,48 +191,42 @@ const MentorMind = () => {
     textarea.style.height = textarea.scrollHeight + 'px';
   };
 
-  // Load topic data and subtopics
-  const loadTopicData = async () => {
-    if (!currentSkillId || !skillDetails?.current_topic_id) return;
-    try {
-      const planResponse = await axios.get(
-        `http://127.0.0.1:8000/plan/get-topic-data/${currentSkillId}/${skillDetails.current_topic_id}`
-      );
-      const topicData = planResponse.data;
-      setAllSubtopics(topicData.subtopics || []);
-      return topicData;
-    } catch (error) {
-      console.error('Error loading topic data:', error);
-      return null;
-    }
+  // Apply a /session response: current context, topic subtopics and the subtopic's quiz
+  const applySession = (session) => {
+    setSkillDetails(session.context);
+    setAllSubtopics(session.subtopics || []);
+    const questions = session.quiz_data?.questions || [];
+    setQuizQuestions(questions);
+    return questions;
   };
 
-  // Quiz functionality to generate all questions for current subtopic
+  // Quiz functionality: one request returns context, topic data and the quiz for the current subtopic
   const startLearning = async () => {
     if (!currentSkillId || !skillDetails) return;
     setQuizState('learning');
     setShowContinueButton(false);
     try {
-      // Load topic data first
-      const topicData = await loadTopicData();
-      if (!topicData || !topicData.subtopics || topicData.subtopics.length === 0) {
+      const sessionResponse = await axios.get(`http://127.0.0.1:8000/session/${currentSkillId}`);
+      const session = sessionResponse.data;
+      if (session.all_topics_completed) {
+        setQuizState('idle');
+        alert('🎉 You have already completed all topics for this skill.');
+        return;
+      }
+      if (session.plan_generating) {
+        setQuizState('idle');
+        alert('The next topic of this plan is still being generated. Please try again in a moment.');
+        return;
+      }
+      if (!session.subtopics || session.subtopics.length === 0) {
         alert('No subtopics found for this topic. Please check your learning plan.');
         return;
       }
+      const questions = applySession(session);
       // Continue with current_subtopic_index
-      setCorrectAnswersCount(0); 
-      await axios.post('http://127.0.0.1:8000/quiz/generate-quiz', {
-        skill_id: currentSkillId,
-        topic_id: skillDetails.current_topic_id,
-        subtopic_id: skillDetails.current_subtopic_id,
-        subtopic_name: skillDetails.current_subtopic_name,
-        subtopic_description: skillDetails.current_subtopic_description,
-        focus_areas: skillDetails.focus_areas,
-        user_context: skillDetails.user_context,
-        current_mastery: 0,
-      });
+      setCorrectAnswersCount(0);
       setCurrentQuestionNumber(1);
-      loadQuestion(1, skillDetails);
+      loadQuestion(1, session.context, questions);
     } catch (error) {
       console.error('Error starting learning:', error);
       console.error('Error details:', error.response?.data || error.message);
@@ -184,26 +234,19 @@ const MentorMind = () => {
     }
   };
 
-  // Load a specific question
-  const loadQuestion = async (questionNumber , updatedDetails) => {
+  // Show a specific question from the session's quiz (no request needed)
+  const loadQuestion = (questionNumber, updatedDetails, questions = quizQuestions) => {
     console.log(`Loading question ${questionNumber} for subtopic id: ${updatedDetails.current_subtopic_id}`);
-    try {
-      const response = await axios.post('http://127.0.0.1:8000/quiz/get-question', {
-        skill_id: currentSkillId,
-        topic_id: updatedDetails.current_topic_id,
-        subtopic_id: updatedDetails.current_subtopic_id,
-        question_number: questionNumber
-      });
-      console.log(`Question loaded successfully from subtopic ${updatedDetails.current_subtopic_id}`);
-      setCurrentQuestion(response.data.question);
-      setQuizState('question');
-      setUserAnswer('');
-      setEvaluation(null);
-    } catch (error) {
-      console.error('Error loading question:', error);
-      console.error('Error details:', error.response?.data || error.message);
-      alert(`Error loading question: ${error.response?.data?.detail || error.message}`);
+    const question = questions[questionNumber - 1];
+    if (!question) {
+      console.error(`Question ${questionNumber} not found for subtopic ${updatedDetails.current_subtopic_id}`);
+      alert(`Error loading question: Question ${questionNumber} out of range for subtopic '${updatedDetails.current_subtopic_id}'.`);
+      return;
     }
+    setCurrentQuestion(question);
+    setQuizState('question');
+    setUserAnswer('');
+    setEvaluation(null);
   };
 
   // Submit answer for evaluation
@@ -215,7 +258,12 @@ const MentorMind = () => {
       const response = await axios.post('http://127.0.0.1:8000/evaluate/evaluate', {
         true_answer: currentQuestion.A,
         user_answer: userAnswer,
-        give_feedback: false
+        give_feedback: false,
+        question: currentQuestion.Q,
+        skill_id: currentSkillId,
+        topic_id: skillDetails.current_topic_id,
+        subtopic_id: skillDetails.current_subtopic_id,
+        question_number: currentQuestionNumber
       });
       setEvaluation(response.data.evaluation);
       if (response.data.evaluation.evaluation === '1') {
@@ -254,91 +302,37 @@ const MentorMind = () => {
           alert('Error: Current subtopic ID is missing. Please restart the learning session.');
           return;
         }
-        // update mastery
-        await axios.post('http://127.0.0.1:8000/db/update-subtopic-mastery', {
-          skill_id: currentSkillId,
+        // Update mastery, mark current subtopic as completed and get the next subtopic's session (one request)
+        setQuizState('learning');
+        const sessionResponse = await axios.post(`http://127.0.0.1:8000/session/${currentSkillId}/advance`, {
           topic_id: skillDetails.current_topic_id,
           subtopic_id: skillDetails.current_subtopic_id,
           correct_answers: correctAnswersCount,
           total_questions: 5
         });
-        // Mark current subtopic as completed and get the next details
-        const progressResponse = await axios.post('http://127.0.0.1:8000/db/mark-subtopic-completed', {
-          skill_id: currentSkillId,
-          topic_id: skillDetails.current_topic_id,
-          subtopic_id: skillDetails.current_subtopic_id
-        });
         console.log(`Subtopic ${skillDetails.current_subtopic_id} completed! Correct answers: ${correctAnswersCount}/5`);
-        const { current_topic_id } = progressResponse.data;
-        const all_topics_completed = (current_topic_id === null);
-        if (all_topics_completed) {
+        const session = sessionResponse.data;
+        if (session.all_topics_completed) {
           // All topics completed
           setQuizState('idle');
           setShowContinueButton(false);
           alert(`🎉 Congratulations! You have completed all topics for this skill. Final score: ${correctAnswersCount}/5 correct answers in the last subtopic. Great job!`);
-        } else if (current_topic_id !== skillDetails.current_topic_id) {
-          // Moved to next topic
-          console.log(`Moved to next topic: ${current_topic_id}`);
-          // Update skill details
-          const newSkillDetails = await axios.get(`http://127.0.0.1:8000/plan/skill-details/${currentSkillId}`);
-          setSkillDetails(newSkillDetails.data);
-          const updated = newSkillDetails.data;
-          // Load new topic data
-          const topicData = await loadTopicData();
-          if (topicData && topicData.subtopics && topicData.subtopics.length > 0) {
-            setAllSubtopics(topicData.subtopics);
-            setCorrectAnswersCount(0);
-            // Set loading state before generating quiz
-            setQuizState('learning');
-            // Generate quiz for first subtopic of new topic
-            await axios.post('http://127.0.0.1:8000/quiz/generate-quiz', {
-              skill_id: currentSkillId,
-              topic_id: updated.current_topic_id,
-              subtopic_id: updated.current_subtopic_id,
-              subtopic_name: updated.current_subtopic_name,
-              subtopic_description: updated.current_subtopic_description,
-              focus_areas: updated.focus_areas,
-              user_context: updated.user_context,
-              current_mastery: 0
-            });
-            setCurrentQuestionNumber(1);
-            setQuizState('question');
-            setUserAnswer('');
-            setEvaluation(null);
-            setShowContinueButton(false);
-            loadQuestion(1, updated);
-          }
+        } else if (session.plan_generating) {
+          // Finished every topic stored so far; the rest of the plan is still being generated
+          setQuizState('idle');
+          setShowContinueButton(false);
+          alert(`Topic completed! Final score: ${correctAnswersCount}/5. The next topic is still being generated, please continue in a moment.`);
         } else {
-          // Moved to next subtopic in same topic
-          // Update skill details
-          const newSkillDetails = await axios.get(`http://127.0.0.1:8000/plan/skill-details/${currentSkillId}`);
-          setSkillDetails(newSkillDetails.data);
-          const updated = newSkillDetails.data;
-          const nextSubtopicIndex = updated.current_subtopic_index;
-          if (nextSubtopicIndex < allSubtopics.length) {
-            console.log(`Moving to next subtopic: ${nextSubtopicIndex + 1}/${allSubtopics.length}`);
-            const nextSubtopic = allSubtopics[nextSubtopicIndex];
-            console.log('DEBUG: Next subtopic:', nextSubtopic);
-            setCorrectAnswersCount(0);
-            setQuizState('learning');
-            // Generate quiz for next subtopic
-            await axios.post('http://127.0.0.1:8000/quiz/generate-quiz', {
-              skill_id: currentSkillId,
-              topic_id: updated.current_topic_id,
-              subtopic_id: updated.current_subtopic_id,
-              subtopic_name: updated.current_subtopic_name,
-              subtopic_description: updated.current_subtopic_description,
-              focus_areas: updated.focus_areas,
-              user_context: updated.user_context,
-              current_mastery: 0
-            });
-            setCurrentQuestionNumber(1);
-            setQuizState('question');
-            setUserAnswer('');
-            setEvaluation(null);
-            setShowContinueButton(false);
-            loadQuestion(1, updated);
+          if (session.context.current_topic_id !== skillDetails.current_topic_id) {
+            console.log(`Moved to next topic: ${session.context.current_topic_id}`);
+          } else {
+            console.log(`Moving to next subtopic: ${session.context.current_subtopic_index + 1}/${session.subtopics.length}`);
           }
+          const questions = applySession(session);
+          setCorrectAnswersCount(0);
+          setCurrentQuestionNumber(1);
+          setShowContinueButton(false);
+          loadQuestion(1, session.context, questions);
         }
       } catch (error) {
         console.error('Error completing subtopic:', error);
@@ -0,0 +1,16 @@
+import pytest
+from src.backend.storage.documents import write_json
+
+@pytest.fixture
+def learning_paths(tmp_path):
+    """The MMagent_learning/ layout init_learning_folders creates, under a temporary directory"""
+    root = tmp_path / "MMagent_learning"
+    (root / "learning_skills").mkdir(parents=True)
+    write_json(root / "global_stats.json", {"skills_mastered": 0, "current_skill_id": "skill_000"})
+    write_json(root / "skills_metadata.json", {"total_skills": 0, "skills": []})
+    return {
+        "MM_LEARNING_ROOT": root,
+        "LEARNING_SKILLS_PATH": root / "learning_skills",
+        "GLOBAL_STATS_PATH": root / "global_stats.json",
+        "SKILLS_METADATA_PATH": root / "skills_metadata.json"
+    }
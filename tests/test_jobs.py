@@ -0,0 +1,146 @@
+import asyncio
+import time
+import pytest
+from src.backend.api_routes.jobs import JobQueue
+from src.backend.api_routes.quiz_routes import GenerateQuizRequest
+from src.backend.MMagents.schemas.PA_schemas import ConceptTopic, PlanOutline, TopicOutline
+from src.backend.MMagents.schemas.QA_schemas import QuizOutput, QuizQuestion
+from src.backend.storage.factory import create_learning_store
+
+PLAN = {"skill": "Python", "topics": [
+    {"name": "Basics", "description": "d", "difficulty": "easy", "subtopics": [{"name": "Loops", "description": "for and while"}]}
+]}
+
+class StubQuizAgent:
+    def __init__(self):
+        self.calls = 0
+
+    async def acompose(self, quiz_input, skill_id, difficulty=None):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return QuizOutput(questions=[QuizQuestion(Q=f"Q{i}", A="A", E="e") for i in range(5)])
+
+class StubPlanningAgent:
+    """Two-topic plan that records the job's stored checkpoint before yielding the second topic"""
+    def __init__(self):
+        self.queue, self.job_id, self.checkpoints = None, None, []
+
+    async def aoutline(self, skill, context):
+        return PlanOutline(skill=skill, topics=[
+            TopicOutline(name=f"Topic {i}", description="d", difficulty="easy", suggested_time="1h") for i in range(2)
+        ])
+
+    async def aexpand(self, skill, context, outline, start=0):
+        for number, topic in enumerate(outline.topics[start:], start=start):
+            if number > 0:
+                self.checkpoints.append(self.queue._checkpoint(self.job_id))
+            yield ConceptTopic(**topic.model_dump(), subtopics=[{"name": "Loops"}], focus_areas=[])
+
+class StubPrefetcher:
+    def schedule_upcoming(self, skill_id):
+        pass
+
+class SlowCheckpointQueue(JobQueue):
+    def _update(self, job_id, status=None, **fields):
+        if "checkpoint" in fields:
+            time.sleep(0.2)
+        return super()._update(job_id, status, **fields)
+
+class StubRegistry:
+    available = True
+
+    def __init__(self, agent):
+        self.agent = agent
+
+    def get(self, name):
+        return self.agent
+
+def quiz_request(skill_id="skill_001", retake=False) -> GenerateQuizRequest:
+    return GenerateQuizRequest(
+        skill_id=skill_id, topic_id="topic_001", subtopic_id="topic_001_sub_01", subtopic_name="Loops",
+        subtopic_description="for and while", focus_areas=[], retake=retake
+    )
+
+@pytest.fixture
+def store(learning_paths):
+    store = create_learning_store(learning_paths, "sqlite")
+    store.create_skill("Python", "beginner", PLAN)
+    yield store
+    store.close()
+
+@pytest.fixture
+def agent():
+    return StubQuizAgent()
+
+@pytest.fixture
+def queue(learning_paths, store, agent):
+    queue = JobQueue(learning_paths["MM_LEARNING_ROOT"] / "jobs.db", StubRegistry(agent), store, None, lease=60)
+    yield queue
+    asyncio.run(queue.aclose())
+
+def test_an_identical_job_is_deduplicated_but_a_retake_is_not(queue):
+    job, created = queue.submit_quiz(quiz_request())
+    again, created_again = queue.submit_quiz(quiz_request(), priority=20)
+    retake, retake_created = queue.submit_quiz(quiz_request(retake=True))
+    assert created and not created_again and retake_created
+    assert again["job_id"] == job["job_id"] and again["priority"] == 20
+    assert retake["job_id"] != job["job_id"]
+
+def test_jobs_are_claimed_by_priority_then_submission_order(queue):
+    plan, _ = queue.submit_plan("Rust", "beginner")
+    first, _ = queue.submit_quiz(quiz_request("skill_001"))
+    second, _ = queue.submit_quiz(quiz_request("skill_002"))
+    claimed = [queue._claim()["job_id"] for _ in range(3)]
+    assert claimed == [first["job_id"], second["job_id"], plan["job_id"]]
+    assert queue._claim() is None
+
+def test_a_job_whose_lease_ran_out_is_claimed_again_until_max_attempts(queue):
+    queue.lease = 0
+    job, _ = queue.submit_quiz(quiz_request())
+    for attempt in range(1, queue.max_attempts + 1):
+        time.sleep(0.01)
+        claimed = queue._claim()
+        assert claimed["job_id"] == job["job_id"] and claimed["attempts"] == attempt
+    time.sleep(0.01)
+    assert queue._claim() is None
+    assert queue.get(job["job_id"])["status"] == "failed"
+
+def test_a_quiz_job_runs_to_completion_and_stores_the_quiz(learning_paths, store, agent):
+    async def run() -> dict:
+        queue = JobQueue(learning_paths["MM_LEARNING_ROOT"] / "jobs.db", StubRegistry(agent), store, None)
+        queue.start()
+        try:
+            job, _ = queue.submit_quiz(quiz_request())
+            async for update in queue.follow(job["job_id"]):
+                pass
+            return update
+        finally:
+            await queue.aclose()
+
+    job = asyncio.run(run())
+    assert job["status"] == "succeeded"
+    assert job["result"]["quiz_data"]["questions"][0]["Q"] == "Q0"
+    assert store.get_quiz("skill_001", "topic_001", "topic_001_sub_01") is not None
+    assert agent.calls == 1
+
+def test_a_plan_job_stores_the_skill_id_before_generating_on(learning_paths, store):
+    agent = StubPlanningAgent()
+
+    async def run() -> dict:
+        queue = SlowCheckpointQueue(learning_paths["MM_LEARNING_ROOT"] / "jobs.db", StubRegistry(agent), store, StubPrefetcher())
+        agent.queue = queue
+        queue.start()
+        try:
+            job, _ = queue.submit_plan("Rust", "beginner")
+            agent.job_id = job["job_id"]
+            async for update in queue.follow(job["job_id"]):
+                pass
+            return update
+        finally:
+            await queue.aclose()
+
+    job = asyncio.run(run())
+    assert job["status"] == "succeeded"
+    # A crash while the second topic was generated would resume into the skill already created
+    assert agent.checkpoints == [{"outline": agent.checkpoints[0]["outline"], "skill_id": job["result"]["skill_id"]}]
+    assert store.get_skill(job["result"]["skill_id"])["topic_count"] == 2
@@ -0,0 +1,56 @@
+from src.backend.storage.journal import ProgressJournal, apply_event
+from src.backend.storage.json_store import JsonLearningStore
+
+PLAN = {"skill": "Python", "topics": [
+    {"name": f"Topic {i}", "description": "d", "subtopics": [{"name": f"Subtopic {j}", "description": "d"} for j in range(2)]}
+    for i in range(2)
+]}
+
+def test_read_from_returns_the_events_after_an_offset(tmp_path):
+    journal = ProgressJournal(fsync_interval=60)
+    path = tmp_path / "progress.jsonl"
+    offset = journal.append(path, {"type": "evaluation", "n": 1})
+    journal.append(path, {"type": "evaluation", "n": 2}, {"type": "evaluation", "n": 3})
+    events, end = journal.read_from(path, offset)
+    journal.close()
+    assert [e["n"] for e in events] == [2, 3]
+    assert end == path.stat().st_size
+
+def test_a_torn_last_line_is_skipped_then_cut_off(tmp_path):
+    path = tmp_path / "progress.jsonl"
+    path.write_bytes(b'{"type": "evaluation", "n": 1}\n{"type": "eval')
+    journal = ProgressJournal(fsync_interval=60)
+    assert [e["n"] for e in journal.read_all(path)] == [1]
+    journal.append(path, {"type": "evaluation", "n": 2})
+    journal.close()
+    assert [e["n"] for e in journal.read_all(path)] == [1, 2]
+
+def test_replaying_an_event_twice_is_harmless(learning_paths):
+    store = JsonLearningStore(learning_paths)
+    skill_id = store.create_skill("Python", "beginner", PLAN)
+    plan = store.get_plan(skill_id)
+    store.close()
+    subtopic_id = plan["topics"][0]["subtopics"][0]["subtopic_id"]
+    event = {"type": "mastery_update", "topic_id": plan["topics"][0]["topic_id"], "subtopic_id": subtopic_id,
+             "subtopic_mastery": 80.0, "topic_mastery": 40.0}
+    apply_event(plan, event)
+    apply_event(plan, event)
+    assert plan["topics"][0]["subtopics"][0]["mastery"] == 80.0
+    assert plan["topics"][0]["mastery"] == 40.0
+
+def test_progress_survives_a_restart(learning_paths):
+    store = JsonLearningStore(learning_paths)
+    skill_id = store.create_skill("Python", "beginner", PLAN)
+    topic = store.get_plan(skill_id)["topics"][0]
+    subtopic_id = topic["subtopics"][0]["subtopic_id"]
+    mastery = store.update_subtopic_mastery(skill_id, topic["topic_id"], subtopic_id, 4, 5)
+    store.mark_subtopic_completed(skill_id, topic["topic_id"], subtopic_id)
+    store.close()
+    # A new store rebuilds the plan from plan_config.json plus the journal
+    reopened = JsonLearningStore(learning_paths)
+    subtopic = reopened.get_plan(skill_id)["topics"][0]["subtopics"][0]
+    pointer = reopened.get_progress_pointer(skill_id)
+    reopened.close()
+    assert subtopic["mastery"] == mastery
+    assert subtopic["completed"]
+    assert pointer == (topic["topic_id"], topic["subtopics"][1]["subtopic_id"])
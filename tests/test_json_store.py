@@ -0,0 +1,56 @@
+import asyncio
+from src.backend.api_routes.session_routes import session_response
+from src.backend.storage.json_store import JsonLearningStore
+
+PLAN = {"skill": "Python", "topics": [
+    {"name": f"Topic {i}", "description": "d", "subtopics": [{"name": f"Subtopic {j}", "description": "d"} for j in range(2)]}
+    for i in range(2)
+]}
+
+def test_the_skills_version_changes_with_progress_and_survives_the_merge(learning_paths):
+    store = JsonLearningStore(learning_paths)
+    empty = store.get_skills_version()
+    skill_id = store.create_skill("Python", "beginner", PLAN)
+    created = store.get_skills_version()
+    assert created != empty
+    topic = store.get_plan(skill_id)["topics"][0]
+    store.update_subtopic_mastery(skill_id, topic["topic_id"], topic["subtopics"][0]["subtopic_id"], 4, 5)
+    updated = store.get_skills_version()
+    assert updated != created
+    # Merging the pending summary entries bumps the stored counter, and the version stays put afterwards
+    store._write_summary()
+    merged = store.get_skills_version()
+    assert merged not in (empty, created, updated)
+    assert store.get_skills_version() == merged
+    store.close()
+    reopened = JsonLearningStore(learning_paths)
+    assert reopened.get_skills_version() == merged
+    reopened.close()
+
+def test_a_streamed_plan_is_not_completed_before_its_last_topic(learning_paths):
+    store = JsonLearningStore(learning_paths)
+    skill_id = store.create_skill("Python", "beginner", {"skill": "Python", "topics": PLAN["topics"][:1]}, planned_topics=2)
+
+    def finish_current_topic():
+        topic = store.get_session(skill_id)["topic"]
+        for subtopic in topic["subtopics"]:
+            store.record_quiz_result(skill_id, topic["topic_id"], subtopic["subtopic_id"], 5, 5)
+        return asyncio.run(session_response(skill_id, store.get_session(skill_id), store, None, None, generate_quiz=False))
+
+    response = finish_current_topic()
+    assert response["plan_generating"] and not response["all_topics_completed"]
+    store.append_topics(skill_id, PLAN["topics"][1:])
+    response = finish_current_topic()
+    assert response["all_topics_completed"] and not response["plan_generating"]
+    store.close()
+
+def test_plans_and_topics_are_returned_as_copies(learning_paths):
+    store = JsonLearningStore(learning_paths)
+    skill_id = store.create_skill("Python", "beginner", PLAN)
+    plan = store.get_plan(skill_id)
+    topic_id = plan["topics"][0]["topic_id"]
+    plan["topics"][0]["mastery"] = 99.0
+    store.get_topic(skill_id, topic_id)["subtopics"].clear()
+    assert store.get_plan(skill_id)["topics"][0]["mastery"] == 0
+    assert len(store.get_topic(skill_id, topic_id)["subtopics"]) == 2
+    store.close()
@@ -0,0 +1,86 @@
+"""
+Load check for the async agent pipeline with a stub Gemini client (no network, no quota)
+Slow plan generations must neither cap how many requests are in flight (no threadpool ceiling)
+nor hold up cheap evaluations, which run in their own concurrency lane
+"""
+import asyncio
+import json
+import httpx
+from src.backend import mentormind_main
+from src.backend.MMagents.agent_registry import AgentRegistry
+
+PLAN_SECONDS = 2.0
+EVALUATION_SECONDS = 0.02
+PLANS = 20
+EVALUATIONS = 100
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+class StubModels:
+    async def generate_content(self, model, contents, config=None):
+        title = (config.response_schema or {}).get("title") if config is not None else None
+        # A plan is an outline call, then one call per topic
+        if title == "PlanOutline":
+            await asyncio.sleep(PLAN_SECONDS / 2)
+            topics = [{"name": f"Topic {i}", "description": "d", "difficulty": "easy", "suggested_time": "1h"} for i in range(2)]
+            return StubResponse(json.dumps({"skill": "skill", "topics": topics}))
+        if title == "TopicDetails":
+            await asyncio.sleep(PLAN_SECONDS / 2)
+            return StubResponse(json.dumps({"subtopics": [{"name": f"Subtopic {j}", "description": "d"} for j in range(2)], "focus_areas": ["a"]}))
+        await asyncio.sleep(EVALUATION_SECONDS)
+        return StubResponse(json.dumps({"evaluation": "1", "feedback": None, "quiz_agent_feedback": None}))
+
+class StubClient:
+    def __init__(self):
+        self.aio = type("Aio", (), {})()
+        self.aio.models = StubModels()
+
+class InFlight:
+    """ASGI wrapper counting the requests being served at once"""
+    def __init__(self, app):
+        self.app = app
+        self.current = self.peak = 0
+
+    async def __call__(self, scope, receive, send):
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.current -= 1
+
+async def run_load(app) -> tuple:
+    async with mentormind_main.lifespan(app):
+        app.state.agent_registry = AgentRegistry("test-key", client_factory=lambda key: StubClient())
+        counter = InFlight(app)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=counter), base_url="http://test", timeout=30) as client:
+            async def evaluate(i: int) -> None:
+                # Free-text answers the local grader cannot settle, so every one is a model call
+                response = await client.post("/evaluate/evaluate", json={
+                    "true_answer": f"plants turn light into chemical energy ({i})",
+                    "user_answer": f"they make food from sunlight ({i})"
+                })
+                assert response.status_code == 200
+
+            plans = [
+                asyncio.create_task(client.post("/plan/create-skill-plan", json={"skill_name": f"skill {i}", "user_context": "beginner"}))
+                for i in range(PLANS)
+            ]
+            await asyncio.sleep(0.05)
+            await asyncio.gather(*(evaluate(i) for i in range(EVALUATIONS)))
+            plans_done = sum(plan.done() for plan in plans)
+            responses = await asyncio.gather(*plans)
+        assert all(response.status_code == 200 for response in responses)
+        return plans_done, counter.peak
+
+def test_evaluations_are_not_queued_behind_plans(learning_paths, monkeypatch):
+    monkeypatch.setattr(mentormind_main, "init_learning_folders", lambda n: learning_paths)
+    plans_done, peak = asyncio.run(run_load(mentormind_main.app))
+    # Well past uvicorn's 40 threadpool threads, the old ceiling for sync handlers
+    assert peak > 40
+    # Each plan makes at least two model calls of PLAN_SECONDS / 2 (outline, then its topics), while the
+    # evaluations need a few evaluator-lane rounds: if they queued behind plans they would finish after them.
+    # Checked by completion order rather than a latency bound, so a slow runner does not fail it
+    assert plans_done == 0
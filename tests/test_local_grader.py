@@ -0,0 +1,55 @@
+import pytest
+from src.backend.MMagents.local_grader import grade_locally
+from src.backend.MMagents.schemas.EA_schemas import EvaluationInput
+
+def grade(true_answer, user_answer, question=None):
+    verdict = grade_locally(EvaluationInput(true_answer=true_answer, user_answer=user_answer, question=question, give_feedback=False))
+    return None if verdict is None else verdict.evaluation
+
+@pytest.mark.parametrize("true_answer, user_answer", [
+    ("-1", "1"),
+    ("3.14", "314"),
+    ("C++", "C"),
+    ("x != y", "x = y"),
+    ("O(n^2)", "O(n2)"),
+])
+def test_punctuation_that_changes_the_answer_is_never_marked_correct(true_answer, user_answer):
+    assert grade(true_answer, user_answer) != "1"
+
+@pytest.mark.parametrize("true_answer, user_answer", [
+    ("-1", "1"),
+    ("42", "7"),
+    ("1,000", "100"),
+])
+def test_wrong_integers_are_marked_wrong(true_answer, user_answer):
+    assert grade(true_answer, user_answer) == "0"
+
+@pytest.mark.parametrize("true_answer, user_answer", [
+    ("3.14", "3.14159"),
+    ("4", "4.0001"),
+    ("3.14", "314"),
+])
+def test_other_number_mismatches_go_to_the_llm(true_answer, user_answer):
+    assert grade(true_answer, user_answer) is None
+
+@pytest.mark.parametrize("true_answer, user_answer", [
+    ("42", "42.0"),
+    ("1,000", "1000"),
+    ("len()", "`len()`"),
+    ("x += 1", "x+=1"),
+    ("Binary  Search", "binary search"),
+])
+def test_equivalent_answers_are_marked_correct(true_answer, user_answer):
+    assert grade(true_answer, user_answer) == "1"
+
+def test_free_text_that_differs_goes_to_the_llm():
+    assert grade("A stack is LIFO", "It is last in, first out") is None
+
+def test_mcq_letters():
+    question = "Which is immutable?\nA) list\nB) tuple\nC) dict"
+    assert grade("B", "b)", question) == "1"
+    assert grade("B", "A", question) == "0"
+    assert grade("B) tuple", "tuple", question) == "1"
+
+def test_empty_answer_is_wrong():
+    assert grade("5", "  ") == "0"
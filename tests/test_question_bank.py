@@ -0,0 +1,45 @@
+import pytest
+from src.backend.MMagents.question_bank import QuestionBank
+from src.backend.MMagents.schemas.QA_schemas import QuizQuestion
+
+SUBTOPIC = ("Python Basics", "Core python syntax features")
+TOPICS = ["list comprehension", "decorator", "generator", "context manager", "closure", "slicing"]
+
+def question(topic: str) -> QuizQuestion:
+    return QuizQuestion(Q=f"Explain in detail how the {topic} feature works in Python and give an example of when it is useful", A=topic, E="e")
+
+@pytest.fixture
+def bank(tmp_path):
+    bank = QuestionBank(tmp_path / "question_bank.db")
+    yield bank
+    bank.close()
+
+def test_a_near_duplicate_maps_to_the_banked_question(bank):
+    (original, _), = bank.add("skill_001", *SUBTOPIC, "easy", [question("list comprehension")])
+    reworded = QuizQuestion(Q=question("list comprehension").Q.replace("give an example", "give one example"), A="x", E="e")
+    (entry, is_new), (other, other_is_new) = bank.add("skill_002", *SUBTOPIC, "easy", [reworded, question("decorator")])
+    assert not is_new and entry.id == original.id
+    assert other_is_new
+    assert bank.stats()["bank_questions"] == 2
+
+def test_other_skills_draw_banked_questions_but_never_ones_they_were_served(bank):
+    added = bank.add("skill_001", *SUBTOPIC, "easy", [question(t) for t in TOPICS[:3]])
+    bank.assemble("skill_001", [], added, 3)
+    assert bank.draw("skill_001", *SUBTOPIC, "easy", 5) == []
+    drawn = bank.draw("skill_002", *SUBTOPIC, "Easy", 5)
+    assert [entry.question.A for entry in drawn] == TOPICS[:3]
+    bank.assemble("skill_002", drawn[:2], [], 2)
+    assert [entry.question.A for entry in bank.draw("skill_002", *SUBTOPIC, "easy", 5)] == TOPICS[2:3]
+
+def test_similar_subtopics_share_questions_but_difficulties_do_not(bank):
+    bank.add("skill_001", *SUBTOPIC, "easy", [question(t) for t in TOPICS[:2]])
+    similar = (SUBTOPIC[0], SUBTOPIC[1] + " and idioms")
+    assert len(bank.draw("skill_002", *similar, "easy", 5)) == 2
+    assert bank.draw("skill_002", *SUBTOPIC, "hard", 5) == []
+    assert bank.draw("skill_002", "Java Streams", "Collectors and pipelines", "easy", 5) == []
+
+def test_bypass_never_draws(tmp_path):
+    bank = QuestionBank(tmp_path / "question_bank.db", bypass=True)
+    bank.add("skill_001", *SUBTOPIC, "easy", [question(t) for t in TOPICS])
+    assert bank.draw("skill_002", *SUBTOPIC, "easy", 5) == []
+    bank.close()
@@ -0,0 +1,55 @@
+import pytest
+from src.backend.MMagents.response_cache import ResponseCache
+
+SORT = "How do I sort a list in ascending order?"
+CLOSURE = "What is a closure in JavaScript?"
+
+@pytest.fixture
+def cache():
+    cache = ResponseCache()
+    cache.put(SORT, "sorted ascending")
+    cache.put(CLOSURE, "a closure is")
+    return cache
+
+@pytest.mark.parametrize("query", [
+    "how do I sort a list in descending order",
+    "how do I not sort a list in ascending order",
+    "how don't I sort a list in ascending order",
+    "what is not a closure in javascript",
+    "what isn't a closure in javascript",
+])
+def test_negated_or_opposite_questions_miss(cache, query):
+    assert cache.get(query) is None
+
+@pytest.mark.parametrize("query, answer", [
+    ("how to sort lists in ascending order", "sorted ascending"),
+    ("what's a closure in javascript", "a closure is"),
+    ("What are closures in JavaScript", "a closure is"),
+])
+def test_rephrasings_hit_exactly(cache, query, answer):
+    assert cache.get(query) == answer
+    assert cache.stats()["exact_hits"] == 1
+
+def test_reordered_words_hit_fuzzily(cache):
+    assert cache.get("in ascending order, how do I sort a list") == "sorted ascending"
+    assert cache.stats()["fuzzy_hits"] == 1
+
+def test_an_extra_word_is_not_close_enough(cache):
+    assert cache.get("how do I sort a python list in ascending order") is None
+
+def test_different_numbers_miss():
+    cache = ResponseCache()
+    cache.put("what does range 10 return", "0 to 9")
+    assert cache.get("range 10 what does return") == "0 to 9"
+    assert cache.get("what does range 20 return") is None
+
+def test_scopes_do_not_share_answers(cache):
+    assert cache.get(SORT, scope=("skill_002", "topic_001")) is None
+
+def test_entries_expire():
+    now = [0.0]
+    cache = ResponseCache(ttl=10, clock=lambda: now[0])
+    cache.put(CLOSURE, "a closure is")
+    now[0] = 11
+    assert cache.get(CLOSURE) is None
+    assert cache.stats()["expirations"] == 1
@@ -0,0 +1,10 @@
+from pathlib import Path
+from src.backend.startup_benchmark import LAZY_MODULES, TARGET, import_times
+
+ROOT = Path(__file__).resolve().parents[1]
+
+def test_the_genai_sdk_is_not_imported_at_startup():
+    times = import_times(ROOT)
+    assert TARGET in times
+    assert [module for module in LAZY_MODULES if module in times] == []
+    assert "google.genai" in LAZY_MODULES